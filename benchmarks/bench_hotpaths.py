@@ -0,0 +1,223 @@
+"""
+Micro-benchmarks for CPU hot paths outside the LLM round-trip.
+
+Covers page rasterization (``preprocess``), image encoding
+(``_image_to_data_uri``, ``encode_preview``), model output parsing
+(``_safe_json``), vote aggregation, run persistence and schema catalog loading.
+
+    python -m benchmarks.bench_hotpaths
+    python -m benchmarks.bench_hotpaths --only encode safe_json --json out.json
+    python -m benchmarks.bench_hotpaths --compare baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import random
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+from PIL import Image
+
+from benchmarks.bench_run_store import build_run
+from benchmarks.common import compare_results, load_results, time_call, write_results
+from benchmarks.corpus import CorpusSpec, build_corpus
+from src.domain.run_store import RunStore
+from src.domain.schema_store import SchemaStore
+from src.integrations.preprocess import preprocess
+from src.pipeline.extraction import _image_to_data_uri, _safe_json
+from src.pipeline.runner import aggregate_votes, encode_preview
+
+
+Case = tuple[str, Callable[[], Any], int]
+
+
+def _corpus_pages(work_dir: Path, width: int) -> list[Path]:
+    spec = CorpusSpec(scans=1, pdfs=1, texts=0, pages_per_pdf=3, scan_width=width)
+    return build_corpus(work_dir / f"corpus_{width}", spec)
+
+
+def preprocess_cases(work_dir: Path, widths: list[int]) -> Iterator[Case]:
+    for width in widths:
+        scan_path, pdf_path = _corpus_pages(work_dir, width)
+        scan = Image.open(scan_path)
+        png_data = io.BytesIO()
+        scan.save(png_data, format="PNG")
+        inputs = {
+            "jpeg": (scan_path.read_bytes(), "scan.jpg"),
+            "png": (png_data.getvalue(), "scan.png"),
+            "pdf3": (pdf_path.read_bytes(), "scan.pdf"),
+        }
+        for label, (data, filename) in inputs.items():
+
+            def run(data: bytes = data, filename: str = filename) -> None:
+                for page in preprocess(io.BytesIO(data), filename):
+                    page.load()
+
+            yield f"preprocess/{label}/{width}", run, 1
+
+
+def encode_cases(work_dir: Path, widths: list[int]) -> Iterator[Case]:
+    for width in widths:
+        scan_path, _ = _corpus_pages(work_dir, width)
+        page = Image.open(scan_path).convert("RGB")
+        for mode in ("RGB", "L", "RGBA"):
+            image = page.convert(mode)
+            yield (
+                f"image_to_data_uri/{mode}/{width}",
+                lambda image=image: _image_to_data_uri(image),
+                1,
+            )
+        yield f"encode_preview/{width}", lambda page=page: encode_preview([page]), 3
+
+
+def _metadata(field_count: int, rng: random.Random) -> dict[str, Any]:
+    return {
+        f"field_{idx}": " ".join(
+            rng.choice(["ACME", "S.p.A.", "2024-01-31", "1.250,00", "EUR", "Via Roma"])
+            for _ in range(rng.randint(1, 6))
+        )
+        for idx in range(field_count)
+    }
+
+
+def safe_json_cases(field_counts: list[int]) -> Iterator[Case]:
+    rng = random.Random(7)
+    for count in field_counts:
+        payload = json.dumps(_metadata(count, rng), ensure_ascii=False)
+        texts = {
+            "valid": payload,
+            "wrapped": f"Here is the JSON you asked for:\n```json\n{payload}\n```\n",
+            "truncated": payload[: len(payload) * 3 // 4],
+        }
+        for label, text in texts.items():
+            yield f"safe_json/{label}/{count}", lambda text=text: _safe_json(text), 20
+
+
+def aggregate_cases(field_counts: list[int], vote_counts: list[int]) -> Iterator[Case]:
+    rng = random.Random(7)
+    for fields in field_counts:
+        names = [f"field_{idx}" for idx in range(fields)]
+        for votes_count in vote_counts:
+            votes = [_metadata(fields, rng) for _ in range(votes_count)]
+            yield (
+                f"aggregate_votes/{fields}x{votes_count}",
+                lambda votes=votes, names=names: aggregate_votes(votes, names),
+                5,
+            )
+
+
+def run_store_cases(work_dir: Path, doc_counts: list[int]) -> Iterator[Case]:
+    store = RunStore(work_dir / "runs")
+    for docs in doc_counts:
+        run = build_run(f"run_{docs}", docs)
+        store.save(run)
+        yield f"run_store_save/{docs}", lambda run=run: store.save(run), 1
+        yield f"run_store_load/{docs}", lambda run=run: store.load(run.run_id), 1
+
+
+def _catalog(schema_count: int, fields_per_schema: int) -> dict[str, Any]:
+    return {
+        f"Schema {idx:04d}": {
+            "description": f"Synthetic schema {idx}",
+            "version": "v1",
+            "fields": [
+                {
+                    "name": f"field_{n}",
+                    "type": "enum" if n % 10 == 0 else "string",
+                    "required": n % 3 == 0,
+                    "description": f"Field {n} of schema {idx}",
+                    "enum": ["A", "B", "C"] if n % 10 == 0 else [],
+                }
+                for n in range(fields_per_schema)
+            ],
+        }
+        for idx in range(schema_count)
+    }
+
+
+def schema_store_cases(work_dir: Path, schema_counts: list[int]) -> Iterator[Case]:
+    for count in schema_counts:
+        catalog_dir = work_dir / f"schemas_{count}"
+        catalog_dir.mkdir(parents=True)
+        prebuilt = catalog_dir / "prebuilt.json"
+        prebuilt.write_text(json.dumps(_catalog(count, 30)), encoding="utf-8")
+        store = SchemaStore(prebuilt, catalog_dir / "custom.json")
+        yield f"list_schemas/{count}", store.list_schemas, 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--widths", type=int, nargs="+", default=[1240, 2480])
+    parser.add_argument("--fields", type=int, nargs="+", default=[20, 200])
+    parser.add_argument("--votes", type=int, nargs="+", default=[5, 15])
+    parser.add_argument("--docs", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--schemas", type=int, nargs="+", default=[50, 500])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--only", nargs="+", help="Run only cases whose name starts with a prefix."
+    )
+    parser.add_argument("--json", type=Path, help="Write results as JSON.")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON to diff against.")
+    parser.add_argument(
+        "--no-history",
+        action="store_true",
+        help="Do not append to benchmarks/results/bench_hotpaths.jsonl.",
+    )
+    args = parser.parse_args()
+
+    work_dir = Path(tempfile.mkdtemp(prefix="extractly-hotpaths-"))
+    suites = [
+        lambda: preprocess_cases(work_dir, args.widths),
+        lambda: encode_cases(work_dir, args.widths),
+        lambda: safe_json_cases(args.fields),
+        lambda: aggregate_cases(args.fields, args.votes),
+        lambda: run_store_cases(work_dir, args.docs),
+        lambda: schema_store_cases(work_dir, args.schemas),
+    ]
+    results = []
+    print(f"{'case':<36}{'best ms':>12}{'median ms':>12}")
+    try:
+        for suite in suites:
+            for name, func, number in suite():
+                if args.only and not name.startswith(tuple(args.only)):
+                    continue
+                try:
+                    timing = time_call(func, repeat=args.repeat, number=number)
+                except Exception as exc:
+                    print(f"{name:<36}  skipped: {exc}")
+                    continue
+                results.append({"name": name, **timing})
+                print(
+                    f"{name:<36}{timing['best_ms']:>12.3f}{timing['median_ms']:>12.3f}"
+                )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    params = {
+        key: str(value) if isinstance(value, Path) else value
+        for key, value in vars(args).items()
+    }
+    write_results(
+        "bench_hotpaths",
+        results,
+        params,
+        json_path=args.json,
+        history=not args.no_history,
+    )
+    if args.compare:
+        baseline = load_results(args.compare)["results"]
+        for line in compare_results(
+            results, baseline, key="name", metrics=["best_ms", "median_ms"]
+        ):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+End-to-end run_pipeline throughput against the mock LLM server.
+
+Builds a synthetic corpus from data/imgs, preprocesses it and runs the full
+pipeline with a simulated model latency, then reports docs/sec, per-document
+latency percentiles, peak RSS, request bytes and LLM calls per document.
+
+    python -m benchmarks.bench_pipeline --latency lognormal:0.8,0.4 --concurrency 1 4
+    python -m benchmarks.bench_pipeline --json out.json --compare baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from benchmarks.common import (
+    compare_results,
+    load_results,
+    peak_rss_mb,
+    write_results,
+)
+from benchmarks.corpus import CorpusSpec, build_corpus
+from src.cli import percentile
+from src.config import reload_config
+from src.domain.run_store import RunStore
+from src.domain.schema_store import SchemaStore
+from src.integrations.mock_openai import MockSettings, start_mock_server
+from src.integrations.preprocess import load_document
+from src.pipeline.runner import PipelineOptions, run_pipeline
+
+
+def _load_corpus(paths: list[Path]) -> tuple[list[dict[str, Any]], list[str]]:
+    documents, skipped = [], []
+    for path in paths:
+        try:
+            with path.open("rb") as fp:
+                documents.append(load_document(fp, path.name))
+        except Exception as exc:
+            skipped.append(f"{path.name}: {exc}")
+    return documents, skipped
+
+
+def bench_pipeline(
+    paths: list[Path],
+    *,
+    concurrency: int,
+    latency: str,
+    error_rate: float,
+    options: PipelineOptions,
+    seed: int,
+) -> dict[str, Any]:
+    server = start_mock_server(
+        MockSettings(latency=latency, error_rate=error_rate, seed=seed)
+    )
+    os.environ.update(
+        OPENAI_BASE_URL=server.base_url,
+        OPENAI_API_KEY="mock",
+        EXTRACTLY_LLM_BACKEND="live",
+    )
+    base_dir = Path(tempfile.mkdtemp(prefix="extractly-bench-"))
+    try:
+        config = reload_config()
+        schema_store = SchemaStore(
+            config.prebuilt_schemas_path, config.custom_schemas_path
+        )
+        schema_map = {schema.name: schema for schema in schema_store.list_schemas()}
+
+        started = time.perf_counter()
+        documents, skipped = _load_corpus(paths)
+        preprocess_s = time.perf_counter() - started
+        options.max_workers = concurrency
+        run = run_pipeline(
+            files=documents,
+            default_schema=None,
+            schema_map=schema_map,
+            candidates=list(schema_map) + ["Unknown", "Other"],
+            run_store=RunStore(base_dir / "runs", run_format=config.run_format),
+            options=options,
+            schema_name="Benchmark",
+        )
+        elapsed = time.perf_counter() - started
+        latencies = [doc.duration_s or 0.0 for doc in run.documents]
+        doc_count = len(run.documents)
+        stats = server.stats
+        return {
+            "name": f"concurrency={concurrency}",
+            "concurrency": concurrency,
+            "docs": doc_count,
+            "skipped": skipped,
+            "errors": sum(1 for doc in run.documents if doc.errors),
+            "elapsed_s": round(elapsed, 3),
+            "preprocess_s": round(preprocess_s, 3),
+            "docs_per_s": round(doc_count / elapsed, 3) if elapsed else None,
+            "p50_s": round(percentile(latencies, 50), 3),
+            "p95_s": round(percentile(latencies, 95), 3),
+            "p99_s": round(percentile(latencies, 99), 3),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "bytes_uploaded": stats.bytes_received,
+            "bytes_per_doc": stats.bytes_received // doc_count if doc_count else 0,
+            "llm_calls": stats.requests,
+            "calls_per_doc": round(stats.requests / doc_count, 2) if doc_count else 0,
+        }
+    finally:
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(base_dir, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--scans", type=int, default=10)
+    parser.add_argument("--pdfs", type=int, default=4)
+    parser.add_argument("--texts", type=int, default=6)
+    parser.add_argument("--pages-per-pdf", type=int, default=3)
+    parser.add_argument("--scan-width", type=int, default=1654)
+    parser.add_argument("--text-kb", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--latency", default="lognormal:0.8,0.4")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--classification-votes", type=int, default=5)
+    parser.add_argument("--extraction-votes", type=int, default=None)
+    parser.add_argument("--confidence", action="store_true")
+    parser.add_argument("--ocr", action="store_true")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", type=Path, help="Write results as JSON.")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON to diff against.")
+    parser.add_argument(
+        "--no-history",
+        action="store_true",
+        help="Do not append to benchmarks/results/bench_pipeline.jsonl.",
+    )
+    args = parser.parse_args()
+
+    spec = CorpusSpec(
+        scans=args.scans,
+        pdfs=args.pdfs,
+        texts=args.texts,
+        pages_per_pdf=args.pages_per_pdf,
+        scan_width=args.scan_width,
+        text_kb=args.text_kb,
+        seed=args.seed,
+    )
+    corpus_dir = Path(tempfile.mkdtemp(prefix="extractly-corpus-"))
+    try:
+        paths = build_corpus(corpus_dir, spec)
+        corpus_mb = sum(path.stat().st_size for path in paths) / 1024**2
+        print(f"Corpus: {len(paths)} files, {corpus_mb:.1f} MB")
+        results = []
+        print(
+            f"{'concurrency':>11}{'docs':>6}{'docs/s':>9}{'p50 s':>8}{'p95 s':>8}"
+            f"{'p99 s':>8}{'RSS MB':>9}{'KB/doc':>9}{'calls/doc':>11}"
+        )
+        for concurrency in args.concurrency:
+            row = bench_pipeline(
+                paths,
+                concurrency=concurrency,
+                latency=args.latency,
+                error_rate=args.error_rate,
+                options=PipelineOptions(
+                    enable_ocr=args.ocr,
+                    compute_confidence=args.confidence,
+                    classification_votes=args.classification_votes,
+                    extraction_votes=args.extraction_votes,
+                ),
+                seed=args.seed,
+            )
+            results.append(row)
+            print(
+                f"{concurrency:>11}{row['docs']:>6}{row['docs_per_s']:>9.2f}"
+                f"{row['p50_s']:>8.2f}{row['p95_s']:>8.2f}{row['p99_s']:>8.2f}"
+                f"{row['peak_rss_mb']:>9.1f}{row['bytes_per_doc'] / 1024:>9.1f}"
+                f"{row['calls_per_doc']:>11.2f}"
+            )
+            for skipped in row["skipped"]:
+                print(f"  skipped {skipped}")
+    finally:
+        shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    params = {
+        key: str(value) if isinstance(value, Path) else value
+        for key, value in vars(args).items()
+    }
+    write_results(
+        "bench_pipeline",
+        results,
+        params,
+        json_path=args.json,
+        history=not args.no_history,
+    )
+    if args.compare:
+        baseline = load_results(args.compare)["results"]
+        for line in compare_results(
+            results,
+            baseline,
+            key="name",
+            metrics=["docs_per_s", "p95_s", "peak_rss_mb", "bytes_per_doc"],
+        ):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
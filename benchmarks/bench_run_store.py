@@ -0,0 +1,114 @@
+"""
+Save/load throughput of RunStore across run sizes and run formats.
+
+    python -m benchmarks.bench_run_store --docs 10 100 1000 --json results.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import shutil
+import string
+import tempfile
+import time
+from pathlib import Path
+
+from src.domain.run_store import ExtractionRun, RunDocument, RunStore
+from src.domain.serialization import SERIALIZERS
+
+
+def _words(rng: random.Random, count: int) -> str:
+    return " ".join(
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10)))
+        for _ in range(count)
+    )
+
+
+def build_run(run_id: str, doc_count: int, *, seed: int = 7) -> ExtractionRun:
+    rng = random.Random(seed)
+    documents = []
+    for idx in range(doc_count):
+        extracted = {f"field_{n}": _words(rng, 4) for n in range(15)}
+        documents.append(
+            RunDocument(
+                filename=f"doc_{idx:05d}.pdf",
+                document_type="Invoice",
+                confidence=0.8,
+                extracted=extracted,
+                corrected=dict(extracted),
+                document_type_original="Invoice",
+                document_type_corrected="Invoice",
+                preview_path=f"previews/{idx + 1:04d}.webp",
+                field_confidence={key: 0.6 for key in extracted},
+                warnings=[_words(rng, 30)],
+            )
+        )
+    return ExtractionRun(
+        run_id=run_id,
+        started_at="2025-01-01T00:00:00+00:00",
+        schema_name="Invoice",
+        mode="Accurate",
+        documents=documents,
+        logs=[_words(rng, 12) for _ in range(doc_count * 2)],
+    )
+
+
+def bench_format(run_format: str, doc_count: int, repeat: int) -> dict:
+    base_dir = Path(tempfile.mkdtemp(prefix="extractly-bench-"))
+    try:
+        store = RunStore(base_dir, run_format=run_format)
+        run = build_run("run_bench", doc_count)
+        save_times, load_times = [], []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run_path = store.save(run)
+            save_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            store.load(run.run_id)
+            load_times.append(time.perf_counter() - start)
+        size = run_path.stat().st_size
+        save_s, load_s = min(save_times), min(load_times)
+        return {
+            "format": run_format,
+            "docs": doc_count,
+            "bytes": size,
+            "save_s": save_s,
+            "load_s": load_s,
+            "save_mb_s": size / save_s / 1e6 if save_s else None,
+            "load_docs_s": doc_count / load_s if load_s else None,
+        }
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--formats", nargs="+", default=list(SERIALIZERS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", type=Path, help="Write results as JSON.")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'format':<10}{'docs':>7}{'size KB':>11}{'save ms':>10}{'load ms':>10}")
+    for doc_count in args.docs:
+        for run_format in args.formats:
+            try:
+                row = bench_format(run_format, doc_count, args.repeat)
+            except RuntimeError as exc:
+                print(f"{run_format:<10}{doc_count:>7}  skipped: {exc}")
+                continue
+            results.append(row)
+            print(
+                f"{row['format']:<10}{row['docs']:>7}{row['bytes'] / 1024:>11.1f}"
+                f"{row['save_s'] * 1000:>10.2f}{row['load_s'] * 1000:>10.2f}"
+            )
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
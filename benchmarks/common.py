@@ -0,0 +1,116 @@
+"""Helpers shared by the benchmark scripts."""
+
+from __future__ import annotations
+
+import json
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+from src.config import PROJECT_ROOT
+
+
+RESULTS_DIR = PROJECT_ROOT / "benchmarks" / "results"
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux.
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+def time_call(
+    func: Callable[[], Any], *, repeat: int = 5, number: int = 1
+) -> dict[str, float]:
+    """Time ``number`` calls of ``func`` ``repeat`` times; report per-call ms."""
+    func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return {
+        "best_ms": round(min(samples) * 1000, 4),
+        "median_ms": round(statistics.median(samples) * 1000, 4),
+    }
+
+
+def environment() -> dict[str, Any]:
+    return {
+        "git_revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+def write_results(
+    benchmark: str,
+    results: list[dict[str, Any]],
+    params: dict[str, Any],
+    json_path: Path | None = None,
+    history: bool = True,
+) -> dict[str, Any]:
+    """Write a results document and append it to ``results/<benchmark>.jsonl``."""
+    document = {
+        "benchmark": benchmark,
+        **environment(),
+        "params": params,
+        "results": results,
+    }
+    if json_path is not None:
+        json_path.write_text(json.dumps(document, indent=2), encoding="utf-8")
+    if history:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        with (RESULTS_DIR / f"{benchmark}.jsonl").open("a", encoding="utf-8") as fp:
+            fp.write(json.dumps(document) + "\n")
+    return document
+
+
+def load_results(path: Path) -> dict[str, Any]:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def compare_results(
+    current: list[dict[str, Any]],
+    baseline: list[dict[str, Any]],
+    *,
+    key: str,
+    metrics: list[str],
+) -> list[str]:
+    """Describe relative changes of ``metrics`` for rows matched on ``key``."""
+    previous = {row[key]: row for row in baseline}
+    lines = []
+    for row in current:
+        before = previous.get(row[key])
+        if before is None:
+            continue
+        changes = []
+        for metric in metrics:
+            old, new = before.get(metric), row.get(metric)
+            if not old or new is None:
+                continue
+            changes.append(f"{metric} {(new - old) / old * 100:+.1f}%")
+        if changes:
+            lines.append(f"{row[key]}: " + ", ".join(changes))
+    return lines
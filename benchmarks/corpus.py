@@ -0,0 +1,92 @@
+"""Synthetic document corpora built from the sample images in ``data/imgs``."""
+
+from __future__ import annotations
+
+import random
+import string
+from dataclasses import dataclass
+from pathlib import Path
+
+from PIL import Image, ImageFilter
+
+from src.config import PROJECT_ROOT
+
+
+SAMPLES_DIR = PROJECT_ROOT / "data" / "imgs"
+
+
+@dataclass
+class CorpusSpec:
+    scans: int = 10
+    pdfs: int = 4
+    texts: int = 6
+    pages_per_pdf: int = 3
+    scan_width: int = 1654
+    text_kb: int = 8
+    seed: int = 7
+
+
+def _samples() -> list[Image.Image]:
+    paths = sorted(
+        path
+        for path in SAMPLES_DIR.iterdir()
+        if path.suffix.lower() in {".jpg", ".jpeg", ".png"}
+    )
+    if not paths:
+        raise FileNotFoundError(f"No sample images found in {SAMPLES_DIR}.")
+    return [Image.open(path).convert("RGB") for path in paths]
+
+
+def _scan(sample: Image.Image, width: int, rng: random.Random) -> Image.Image:
+    height = round(sample.height * width / sample.width)
+    page = sample.resize((width, height), Image.Resampling.LANCZOS)
+    page = page.rotate(rng.uniform(-1.5, 1.5), expand=False, fillcolor="white")
+    if rng.random() < 0.5:
+        page = page.filter(ImageFilter.GaussianBlur(radius=rng.uniform(0.3, 1.0)))
+    return page
+
+
+def _text(rng: random.Random, size_kb: int) -> str:
+    lines = []
+    total = 0
+    while total < size_kb * 1024:
+        words = [
+            "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 11)))
+            for _ in range(rng.randint(6, 14))
+        ]
+        line = " ".join(words).capitalize() + "."
+        lines.append(line)
+        total += len(line) + 1
+    return "\n".join(lines)
+
+
+def build_corpus(out_dir: Path, spec: CorpusSpec) -> list[Path]:
+    """Write scans (JPEG), multi-page PDFs and text files into ``out_dir``."""
+    rng = random.Random(spec.seed)
+    samples = _samples()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths: list[Path] = []
+
+    for idx in range(spec.scans):
+        page = _scan(samples[idx % len(samples)], spec.scan_width, rng)
+        path = out_dir / f"scan_{idx:04d}.jpg"
+        page.save(path, format="JPEG", quality=rng.randint(70, 90))
+        paths.append(path)
+
+    for idx in range(spec.pdfs):
+        pages = [
+            _scan(samples[(idx + page) % len(samples)], spec.scan_width, rng)
+            for page in range(spec.pages_per_pdf)
+        ]
+        path = out_dir / f"document_{idx:04d}.pdf"
+        pages[0].save(
+            path, format="PDF", save_all=True, append_images=pages[1:], resolution=150
+        )
+        paths.append(path)
+
+    for idx in range(spec.texts):
+        path = out_dir / f"text_{idx:04d}.txt"
+        path.write_text(_text(rng, spec.text_kb), encoding="utf-8")
+        paths.append(path)
+
+    return paths
@@ -10,7 +10,12 @@ from src.config import load_config
 from src.domain.schema_store import SchemaStore, schemas_to_table, table_to_schema
 from src.domain.validation import validate_schema
 from src.integrations.ocr import run_ocr
-from src.integrations.preprocess import preprocess
+from src.integrations.preprocess import (
+    SUPPORTED_EXTENSIONS,
+    is_text_document,
+    preprocess,
+    read_text_document,
+)
 from src.logging import setup_logging
 from src.pipeline.schema_suggest import suggest_schema_from_sample
 from src.ui.components import (
@@ -171,6 +176,7 @@ editor_rows = (
             "description": pd.Series(dtype="str"),
             "example": pd.Series(dtype="str"),
             "enum": pd.Series(dtype="str"),
+            "group": pd.Series(dtype="str"),
         }
     )
 )
@@ -202,6 +208,10 @@ data = st.data_editor(
         "description": st.column_config.TextColumn("Description"),
         "example": st.column_config.TextColumn("Example"),
         "enum": st.column_config.TextColumn("Enum values (comma-separated)"),
+        "group": st.column_config.TextColumn(
+            "Group",
+            help="Fields sharing a group are extracted together in one request.",
+        ),
     },
     key=editor_key,
 )
@@ -356,7 +366,7 @@ with st.sidebar:
     st.subheader("Generate from sample")
     sample = st.file_uploader(
         "Upload a sample document",
-        type=["pdf", "png", "jpg", "jpeg", "txt"],
+        type=sorted(extension.lstrip(".") for extension in SUPPORTED_EXTENSIONS),
         key="schema_sample_upload",
     )
     use_ocr = st.toggle("Use OCR assist", value=True, key="schema_sample_ocr")
@@ -371,8 +381,8 @@ with st.sidebar:
             with st.spinner("Generating schema draft..."):
                 images = []
                 ocr_text = None
-                if sample.name.lower().endswith(".txt"):
-                    ocr_text = sample.read().decode("utf-8", errors="ignore")
+                if is_text_document(sample.name):
+                    ocr_text = read_text_document(sample.read(), sample.name)
                 else:
                     images = preprocess(sample, sample.name)
                     if use_ocr:
@@ -401,6 +411,7 @@ with st.sidebar:
                             "description": field.get("description", ""),
                             "example": field.get("example", ""),
                             "enum": ", ".join(enum_values),
+                            "group": field.get("group", ""),
                         }
                     )
 
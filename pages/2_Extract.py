@@ -3,15 +3,20 @@ from __future__ import annotations
 from datetime import datetime
 from pathlib import Path
 import streamlit as st
-from PIL import Image
 
 from src.config import load_config
 from src.domain.run_store import RunStore
 from src.domain.schema_store import SchemaStore
-from src.integrations.preprocess import preprocess
+from src.integrations.preprocess import SUPPORTED_EXTENSIONS
+from src.jobs.inbox import enqueue_document
+from src.jobs.queue import JobQueue, spool_file
+from src.metrics import start_textfile_exporter
 from src.pipeline.classification import DEFAULT_CLASSIFIER_PROMPT
 from src.pipeline.extraction import DEFAULT_EXTRACTION_PROMPT
-from src.pipeline.runner import PipelineOptions, run_pipeline
+from src.pipeline.executor import RunExecutor
+from src.pipeline.long_document import REDUCE_STRATEGIES
+from src.pipeline.runner import PipelineOptions
+from src.profiling import start_profiler
 from src.logging import setup_logging
 from src.ui.components import (
     inject_branding,
@@ -24,7 +29,18 @@ from src.ui.components import (
 config = load_config()
 setup_logging()
 store = SchemaStore(config.prebuilt_schemas_path, config.custom_schemas_path)
-run_store = RunStore(config.run_store_dir)
+run_store = RunStore(config.run_store_dir, run_format=config.run_format)
+
+BACKGROUND_RUNS_SHOWN = 10
+
+
+@st.cache_resource
+def get_run_executor() -> RunExecutor:
+    start_textfile_exporter(config.metrics_dir)
+    return RunExecutor(max_concurrent_runs=config.max_background_runs)
+
+
+run_executor = get_run_executor()
 
 st.set_page_config(page_title="Extract", page_icon="⚡", layout="wide")
 
@@ -55,7 +71,7 @@ left, _, right = st.columns([5, 1, 4])
 with left:
     files = st.file_uploader(
         "Upload documents",
-        type=["pdf", "png", "jpg", "jpeg", "txt"],
+        type=sorted(extension.lstrip(".") for extension in SUPPORTED_EXTENSIONS),
         accept_multiple_files=True,
     )
 
@@ -63,7 +79,55 @@ with right:
     section_title("Pipeline options")
     compute_conf = st.toggle("Field confidence", value=True)
     enable_ocr = st.toggle("Enable OCR", value=False)
-    st.caption("Runs multi-pass extraction across all pages for maximum accuracy.")
+    long_doc_mode = st.toggle(
+        "Long-document mode",
+        value=False,
+        help="Extract page windows concurrently and merge the values per field.",
+    )
+    if long_doc_mode:
+        window_cols = st.columns(2)
+        page_window = window_cols[0].number_input(
+            "Pages per window", min_value=1, max_value=50, value=4
+        )
+        window_reduce = window_cols[1].selectbox(
+            "Merge strategy",
+            options=sorted(REDUCE_STRATEGIES),
+            index=sorted(REDUCE_STRATEGIES).index("first"),
+        )
+    else:
+        page_window, window_reduce = None, "first"
+    preclassify = st.toggle(
+        "Local pre-classifier",
+        value=False,
+        help="Route documents the local text model is confident about without "
+        "LLM classification. Train it from feedback on the Settings page.",
+    )
+    use_fingerprints = st.toggle(
+        "Layout fingerprint cache",
+        value=False,
+        help="Route documents whose first page matches a confirmed layout "
+        "template without classification.",
+    )
+    combined = schema_mode == "Classify documents" and st.toggle(
+        "Combined classify and extract",
+        value=False,
+        help="Ask for the label and its fields in one call; falls back to "
+        "separate calls when the label is uncertain or the fields are invalid.",
+    )
+    speculate = schema_mode == "Classify documents" and st.toggle(
+        "Speculative extraction",
+        value=False,
+        help="Start extracting the likely schema, once classification votes "
+        "agree or from the pre-classifier, while classification finishes. "
+        "Discarded when the final label differs.",
+    )
+    classify_pages = st.selectbox(
+        "Pages for classification",
+        options=["first:1", "first:2", "density:2", "keywords:2", "all"],
+        index=1,
+        help="Which page images are sent to the classifier.",
+    )
+    st.caption("Runs in the background; progress is shown below the Run button.")
 
 manual_overrides: dict[str, str] = {}
 current_files: list[str] = []
@@ -153,13 +217,12 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-if st.button("Run extraction", type="primary", width="stretch"):
+
+def ensure_ready_to_run() -> None:
     if not files:
         st.error("Upload at least one document.")
         st.stop()
-
-    use_classification = schema_mode == "Classify documents"
-    if not use_classification:
+    if schema_mode != "Classify documents":
         missing = [
             filename for filename in current_files if filename not in manual_overrides
         ]
@@ -167,61 +230,127 @@ if st.button("Run extraction", type="primary", width="stretch"):
             st.error("Select a schema for each document before running.")
             st.stop()
 
-    schema_map = {schema.name: schema for schema in schemas}
-    parsed_files = []
-    progress = st.progress(0.0, "Parsing files")
-
-    for idx, upload in enumerate(files, start=1):
-        filename = upload.name
-        doc_type_override = manual_overrides.get(filename)
-
-        if filename.lower().endswith(".txt"):
-            content = upload.read().decode("utf-8", errors="ignore")
-            blank_image = Image.new("RGB", (800, 1000), color="white")
-            images = [blank_image]
-            payload = {
-                "name": filename,
-                "images": images,
-                "ocr_text": content,
-            }
-        else:
-            images = preprocess(upload, filename)
-            payload = {"name": filename, "images": images}
-
-        if doc_type_override:
-            payload["doc_type_override"] = doc_type_override
-        parsed_files.append(payload)
-
-        progress.progress(idx / len(files), f"Parsed {filename}")
-
-    progress.empty()
-    options = PipelineOptions(
+
+def build_pipeline_options() -> PipelineOptions:
+    return PipelineOptions(
         enable_ocr=enable_ocr,
         compute_confidence=compute_conf,
         classifier_prompt=st.session_state.get("classifier_prompt"),
         extraction_prompt=st.session_state.get("extractor_prompt"),
+        max_workers=config.pipeline_workers,
+        page_window=int(page_window) if page_window else None,
+        window_reduce=window_reduce,
+        classify_pages=classify_pages,
+        preclassify=preclassify,
+        fingerprint=use_fingerprints,
+        combined=combined,
+        speculate=speculate,
     )
 
-    run_schema_name = "Classified" if use_classification else "Manual selection"
-    progress = st.progress(0.0, "Starting pipeline...")
 
-    def update_progress(label: str, value: float) -> None:
-        progress.progress(value, label)
+run_col, queue_col = st.columns([3, 2])
+run_clicked = run_col.button("Run extraction", type="primary", width="stretch")
+queue_clicked = queue_col.button("Queue for background workers", width="stretch")
+
+if queue_clicked:
+    ensure_ready_to_run()
+    job_queue = JobQueue(config.queue_db_path)
+    options = build_pipeline_options()
+    queued_jobs = []
+    for upload in files:
+        upload.seek(0)
+        spooled, _ = spool_file(config.spool_dir, upload, upload.name)
+        upload.seek(0)
+        queued_jobs.append(
+            enqueue_document(
+                job_queue,
+                spooled,
+                upload.name,
+                options=options,
+                doc_type_override=manual_overrides.get(upload.name),
+                max_attempts=config.job_max_attempts,
+            )
+        )
+    st.success(
+        f"Queued {len(queued_jobs)} documents. "
+        "Workers started with `extractly worker` will process them."
+    )
+    st.caption("Job ids: " + ", ".join(job.id for job in queued_jobs))
 
-    run = run_pipeline(
-        files=parsed_files,
+if run_clicked:
+    ensure_ready_to_run()
+    use_classification = schema_mode == "Classify documents"
+    uploads = [
+        {
+            "name": upload.name,
+            "data": upload.getvalue(),
+            "doc_type_override": manual_overrides.get(upload.name),
+        }
+        for upload in files
+    ]
+    submitted_at = datetime.now().strftime("%H:%M:%S")
+    run_id = run_executor.submit(
+        run_store,
+        uploads,
+        label=f"{len(uploads)} documents • {submitted_at}",
         default_schema=None,
-        schema_map=schema_map,
+        schema_map={schema.name: schema for schema in schemas},
         candidates=schema_names + ["Unknown", "Other"],
-        run_store=run_store,
-        options=options,
-        schema_name=run_schema_name,
-        progress_callback=update_progress,
+        options=build_pipeline_options(),
+        schema_name="Classified" if use_classification else "Manual selection",
+        profiler=start_profiler(config),
     )
-    progress.empty()
+    st.session_state["latest_run_id"] = run_id
+    # The executor is shared by every browser session; only list and cancel
+    # the runs this session submitted.
+    st.session_state.setdefault("background_run_ids", []).append(run_id)
+    st.success(
+        "Run submitted. It keeps running if you leave this page; after a "
+        "browser refresh its results appear on the Results page."
+    )
+
 
-    st.session_state["latest_run_id"] = run.run_id
+@st.fragment(run_every=2)
+def render_background_runs() -> None:
+    session_run_ids = set(st.session_state.get("background_run_ids", []))
+    background_runs = run_executor.list_runs(session_run_ids)
+    if not background_runs:
+        return
     section_spacer()
-    completed_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    st.success(f"Extraction completed • {completed_at}")
-    st.page_link("pages/3_Results.py", label="View results", width="stretch")
+    section_title("Background runs")
+    for background_run in background_runs[:BACKGROUND_RUNS_SHOWN]:
+        progress = run_store.read_progress(background_run.run_id) or {}
+        status = progress.get("status", "queued")
+        total = progress.get("total") or background_run.document_count
+        done = progress.get("done", 0)
+        status_parts = [status.title(), f"{done}/{total} docs"]
+        eta_s = progress.get("eta_s")
+        if eta_s is not None and status == "running":
+            status_parts.append(f"ETA {eta_s:.0f}s")
+
+        cols = st.columns([5, 3, 2])
+        cols[0].progress(
+            min(done / total, 1.0) if total else 0.0,
+            text=f"{background_run.label} • {progress.get('message', '')}",
+        )
+        cols[1].caption(" • ".join(status_parts))
+        if background_run.is_active:
+            if (
+                cols[2].button(
+                    "Cancel", key=f"cancel_{background_run.run_id}", width="stretch"
+                )
+                and background_run.run_id in session_run_ids
+            ):
+                run_executor.cancel(background_run.run_id)
+                st.rerun(scope="fragment")
+        elif status in {"completed", "cancelled"}:
+            if cols[2].button(
+                "View results", key=f"open_{background_run.run_id}", width="stretch"
+            ):
+                st.session_state["latest_run_id"] = background_run.run_id
+                st.switch_page("pages/3_Results.py")
+        if progress.get("error"):
+            st.error(progress["error"])
+
+
+render_background_runs()
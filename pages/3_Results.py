@@ -1,17 +1,20 @@
 from __future__ import annotations
 
-import base64
 import csv
 import io
 import json
+import sqlite3
 from datetime import datetime, timezone
 import html
 from pathlib import Path
 import streamlit as st
 
 from src.config import load_config
+from src.domain.corrections import CorrectionConflictError
 from src.domain.run_store import RunStore
-from src.logging import setup_logging
+from src.pipeline.fingerprint import get_fingerprint_index
+from src.logging import get_logger, setup_logging
+from src.tracing import summarize_spans
 from src.ui.components import (
     inject_branding,
     inject_global_styles,
@@ -23,7 +26,8 @@ from utils.utils import diff_fields, upsert_feedback
 
 config = load_config()
 setup_logging()
-run_store = RunStore(config.run_store_dir)
+logger = get_logger(__name__)
+run_store = RunStore(config.run_store_dir, run_format=config.run_format)
 
 st.set_page_config(page_title="Results", page_icon="📊", layout="wide")
 
@@ -33,12 +37,13 @@ inject_global_styles()
 st.title("📊 Results")
 st.caption("Browse extraction runs, review outputs, and export data.")
 
-runs = run_store.list_runs()
-if not runs:
+RUN_HISTORY_LIMIT = 500
+
+run_ids = run_store.list_run_ids(limit=RUN_HISTORY_LIMIT)
+if not run_ids:
     st.info("No runs yet. Run an extraction first.")
     st.stop()
 
-run_ids = [run["run_id"] for run in runs]
 latest_id = st.session_state.get("latest_run_id")
 selected_id = st.selectbox(
     "Select a run",
@@ -92,6 +97,68 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
+stage_rows = summarize_spans(documents)
+if stage_rows:
+    section_spacer()
+    with st.expander("Stage timings and token usage", expanded=False):
+        total_tokens = sum(
+            row["prompt_tokens"] + row["completion_tokens"] for row in stage_rows
+        )
+        cached_tokens = sum(row["cached_tokens"] for row in stage_rows)
+        llm_calls = sum(row["llm_calls"] for row in stage_rows)
+        retries = sum(row["retries"] for row in stage_rows)
+        saved_tokens = sum(
+            (doc.get("text_tokens") or {}).get("saved", 0) for doc in documents
+        )
+        preclassified = sum(
+            1 for doc in documents if doc.get("routed_by") == "preclassifier"
+        )
+        fingerprinted = sum(
+            1 for doc in documents if doc.get("routed_by") == "fingerprint"
+        )
+        speculated = [doc["speculation"] for doc in documents if doc.get("speculation")]
+        speculation_hits = sum(1 for item in speculated if item["outcome"] == "hit")
+        st.caption(
+            f"{llm_calls} LLM calls • {retries} retries • "
+            f"{total_tokens:,} tokens ({cached_tokens:,} cached) • "
+            f"{saved_tokens:,} text tokens saved by budgeting • "
+            f"{preclassified} documents pre-classified locally • "
+            f"{fingerprinted} matched to layout templates • "
+            f"{speculation_hits}/{len(speculated)} speculative extractions kept"
+        )
+        st.dataframe(
+            stage_rows,
+            width="stretch",
+            column_config={
+                "stage": st.column_config.TextColumn("Stage", width="small"),
+                "count": st.column_config.NumberColumn("Spans", width="small"),
+                "total_s": st.column_config.NumberColumn("Total s", format="%.2f"),
+                "max_s": st.column_config.NumberColumn("Max s", format="%.2f"),
+                "llm_calls": st.column_config.NumberColumn("Calls"),
+                "retries": st.column_config.NumberColumn("Retries"),
+                "prompt_tokens": st.column_config.NumberColumn("Prompt tok"),
+                "completion_tokens": st.column_config.NumberColumn("Output tok"),
+                "cached_tokens": st.column_config.NumberColumn("Cached tok"),
+                "payload_mb": st.column_config.NumberColumn("Payload MB"),
+                "errors": st.column_config.NumberColumn("Errors"),
+            },
+        )
+        slowest = sorted(
+            documents, key=lambda doc: doc.get("duration_s") or 0.0, reverse=True
+        )[:5]
+        st.caption(
+            "Slowest documents: "
+            + ", ".join(
+                f"{doc.get('filename')} ({doc.get('duration_s') or 0:.1f}s)"
+                for doc in slowest
+            )
+        )
+
+if run.get("config"):
+    with st.expander("Configuration snapshot", expanded=False):
+        st.caption("Settings in effect when this run started.")
+        st.json(run["config"], expanded=True)
+
 section_spacer("lg")
 
 section_title("Documents")
@@ -151,23 +218,22 @@ st.markdown(
     "<div class='extractly-detail-title'>View document details</div>",
     unsafe_allow_html=True,
 )
-selected_doc_name = st.selectbox(
+selected_doc_index = st.selectbox(
     "Document",
-    options=[doc["filename"] for doc in documents],
+    options=list(range(1, len(documents) + 1)),
+    format_func=lambda index: documents[index - 1].get("filename") or f"#{index}",
     label_visibility="collapsed",
 )
 
-selected_doc = next(
-    (doc for doc in documents if doc["filename"] == selected_doc_name),
-    None,
-)
+selected_doc = documents[selected_doc_index - 1] if selected_doc_index else None
+selected_doc_name = selected_doc.get("filename") if selected_doc else None
 
 if selected_doc:
-    preview_b64 = selected_doc.get("preview_image")
-    if preview_b64:
+    preview_bytes = run_store.document_preview(selected_id, selected_doc)
+    if preview_bytes:
         with st.expander("Document preview", expanded=True):
             st.image(
-                base64.b64decode(preview_b64),
+                preview_bytes,
                 width="stretch",
                 caption=selected_doc_name,
             )
@@ -207,6 +273,7 @@ if selected_doc:
     if low_conf_fields:
         st.caption("Low confidence: " + ", ".join(sorted(low_conf_fields)))
 
+    field_pages = selected_doc.get("field_pages") or {}
     field_rows = []
     for key, value in corrected_payload.items():
         confidence_value = field_confidence.get(key, "")
@@ -224,8 +291,13 @@ if selected_doc:
                 "status": status_label,
             }
         )
+        if field_pages:
+            pages = field_pages.get(key) or []
+            field_rows[-1]["pages"] = (
+                ", ".join(str(page) for page in dict.fromkeys(pages)) if pages else ""
+            )
 
-    with st.form(key=f"doc_corrections_{selected_doc_name}"):
+    with st.form(key=f"doc_corrections_{selected_id}_{selected_doc_index}"):
         doc_type_input = st.text_input("Document type", value=doc_type_current)
         st.markdown(
             "<div class='extractly-detail-subtitle'>Extracted fields</div>",
@@ -242,9 +314,10 @@ if selected_doc:
                     "Confidence", width="small"
                 ),
                 "status": st.column_config.TextColumn("Flag", width="small"),
+                "pages": st.column_config.TextColumn("Pages", width="small"),
             },
-            disabled=["field", "confidence", "status"],
-            key=f"field_editor_{selected_doc_name}",
+            disabled=["field", "confidence", "status", "pages"],
+            key=f"field_editor_{selected_id}_{selected_doc_index}",
         )
         submitted = st.form_submit_button("Save corrections")
 
@@ -271,12 +344,24 @@ if selected_doc:
         selected_doc["document_type_original"] = selected_doc.get(
             "document_type_original", selected_doc.get("document_type")
         )
-        selected_doc["document_type_corrected"] = (
+        corrected_type = (
             doc_type_input.strip() or selected_doc["document_type_original"]
         )
-        selected_doc["document_type"] = selected_doc["document_type_corrected"]
-        selected_doc["corrected"] = corrected_map
-        run_store.update_run(selected_id, run)
+        try:
+            run_store.save_correction(
+                selected_id,
+                selected_doc_index,
+                corrected=corrected_map,
+                document_type_corrected=corrected_type,
+                expected_version=selected_doc.get("correction_version", 0),
+            )
+        except CorrectionConflictError as exc:
+            st.error(f"{exc} Reload the page to review the latest version.")
+            st.stop()
+        except TimeoutError:
+            st.error("Another reviewer is saving this document. Try again.")
+            st.stop()
+        selected_doc["document_type_corrected"] = corrected_type
 
         feedback_row = {
             "doc_id": f"{selected_id}:{selected_doc.get('filename')}",
@@ -291,9 +376,64 @@ if selected_doc:
             "timestamp": datetime.now(timezone.utc).isoformat(),
         }
         upsert_feedback(feedback_row)
+        # Only documents processed with fingerprint routing have a pending
+        # fingerprint to confirm.
+        fingerprinted = any(
+            span.get("name") == "fingerprint"
+            for span in selected_doc.get("spans") or []
+        )
+        if fingerprinted:
+            try:
+                get_fingerprint_index(
+                    config.fingerprint_db_path,
+                    max_entries=config.fingerprint_max_entries,
+                    pending_days=config.fingerprint_pending_days,
+                ).confirm(feedback_row["doc_id"], corrected_type)
+            except sqlite3.Error as exc:
+                logger.warning(
+                    "Could not confirm fingerprint of %s: %s",
+                    feedback_row["doc_id"],
+                    exc,
+                )
         st.success("Corrections saved.")
         st.rerun()
 
+    if selected_doc.get("spans"):
+        with st.expander("Stage timings"):
+            text_tokens = selected_doc.get("text_tokens") or {}
+            if text_tokens:
+                st.caption(
+                    f"Document text: {text_tokens.get('original', 0):,} tokens • "
+                    f"classification prompt {text_tokens.get('classify', '—')} • "
+                    f"extraction prompt {text_tokens.get('extract', '—')} • "
+                    f"{text_tokens.get('saved', 0):,} tokens saved across calls"
+                )
+            pages_used = selected_doc.get("pages_used") or {}
+            if pages_used:
+                st.caption(
+                    "Pages sent: "
+                    + " • ".join(
+                        f"{stage} {', '.join(str(page) for page in pages)}"
+                        for stage, pages in pages_used.items()
+                    )
+                )
+            st.dataframe(
+                [
+                    {
+                        "stage": span.get("name"),
+                        "start_s": span.get("start_s"),
+                        "duration_s": span.get("duration_s"),
+                        "llm_calls": span.get("llm_calls"),
+                        "retries": span.get("retries"),
+                        "tokens": span.get("prompt_tokens", 0)
+                        + span.get("completion_tokens", 0),
+                        "error": span.get("error") or "",
+                    }
+                    for span in selected_doc["spans"]
+                ],
+                width="stretch",
+            )
+
     if selected_doc.get("warnings"):
         st.warning("\n".join(selected_doc.get("warnings")))
     if selected_doc.get("errors"):
@@ -14,7 +14,7 @@ from src.ui.components import (
     section_spacer,
     section_title,
 )
-from utils.utils import load_feedback
+from utils.utils import get_feedback_store
 
 
 config = load_config()
@@ -67,23 +67,55 @@ def _build_diff_rows(original: dict, corrected: dict) -> list[dict]:
     return rows
 
 
-rows = load_feedback()
-if not rows:
+PAGE_SIZE = 50
+
+feedback_store = get_feedback_store()
+stats = feedback_store.stats()
+if not stats["corrections"]:
     st.info("No feedback captured yet.")
     st.stop()
 
-unique_docs = {row.get("doc_id") for row in rows if row.get("doc_id")}
-changed_fields_total = sum(len(row.get("changed_fields", [])) for row in rows)
-
 section_title("Snapshot")
 metrics = st.columns(3)
-metrics[0].metric("Corrections", len(rows))
-metrics[1].metric("Docs touched", len(unique_docs))
-metrics[2].metric("Fields corrected", changed_fields_total)
+metrics[0].metric("Corrections", stats["corrections"])
+metrics[1].metric("Runs touched", stats["runs"])
+metrics[2].metric("Fields corrected", stats["changed_fields"])
 
 section_spacer()
 section_title("Corrections")
 
+filter_cols = st.columns(3)
+schema_filter = filter_cols[0].selectbox(
+    "Schema",
+    options=["All"] + feedback_store.distinct_values("schema_name"),
+)
+run_filter = filter_cols[1].selectbox(
+    "Run",
+    options=["All"] + feedback_store.distinct_values("run_id"),
+)
+field_filter = filter_cols[2].selectbox(
+    "Changed field",
+    options=["All"] + feedback_store.distinct_values("field"),
+)
+filters = {
+    "schema_name": None if schema_filter == "All" else schema_filter,
+    "run_id": None if run_filter == "All" else run_filter,
+    "field": None if field_filter == "All" else field_filter,
+}
+
+total_rows = feedback_store.count(**filters)
+if not total_rows:
+    st.caption("No corrections match these filters.")
+    st.stop()
+
+page_count = max((total_rows + PAGE_SIZE - 1) // PAGE_SIZE, 1)
+page = st.number_input(
+    f"Page (of {page_count})", min_value=1, max_value=page_count, value=1, step=1
+)
+rows = feedback_store.query(
+    **filters, limit=PAGE_SIZE, offset=(int(page) - 1) * PAGE_SIZE
+)
+
 table_rows = []
 for row in rows:
     table_rows.append(
@@ -98,6 +130,7 @@ for row in rows:
 
 df = pd.DataFrame(table_rows)
 st.dataframe(df, width="stretch")
+st.caption(f"Showing {len(rows)} of {total_rows} corrections.")
 
 section_spacer()
 detail_options = [
@@ -140,10 +173,25 @@ with st.expander("Raw correction payload"):
 
 section_spacer()
 section_title("Export")
-jsonl_payload = "\n".join(json.dumps(row, ensure_ascii=False) for row in rows)
 st.download_button(
     "Download feedback JSONL",
-    data=jsonl_payload,
+    data="".join(feedback_store.iter_jsonl()),
     file_name="feedback.jsonl",
     mime="application/jsonl",
 )
+imported_count = st.session_state.pop("feedback_imported_count", None)
+if imported_count is not None:
+    st.success(f"Imported {imported_count} corrections.")
+imported = st.file_uploader("Import feedback JSONL", type=["jsonl"])
+if imported is not None and st.button("Import corrections"):
+    try:
+        lines = imported.getvalue().decode("utf-8").splitlines()
+        count = feedback_store.import_jsonl(lines)
+    except UnicodeDecodeError:
+        st.error("Could not import feedback: the file is not UTF-8 text.")
+    except ValueError as exc:
+        st.error(f"Could not import feedback: {exc}")
+    else:
+        # Shown on the next run; a message rendered before st.rerun() is discarded.
+        st.session_state["feedback_imported_count"] = count
+        st.rerun()
@@ -5,6 +5,10 @@ from pathlib import Path
 import streamlit as st
 
 from src.config import load_config
+from src.domain.retention import apply_retention, policy_from_config
+from src.domain.run_store import RunStore
+from src.pipeline.fingerprint import get_fingerprint_index
+from src.pipeline.preclassifier import get_preclassifier
 from src.ui.components import (
     inject_branding,
     inject_global_styles,
@@ -12,6 +16,7 @@ from src.ui.components import (
     section_title,
 )
 from src.logging import setup_logging
+from utils.utils import get_feedback_store
 
 
 config = load_config()
@@ -42,13 +47,191 @@ section_spacer("lg")
 section_title("📁 Directories")
 st.write(f"Prebuilt schemas: `{config.prebuilt_schemas_path}`")
 st.write(f"Custom schemas: `{config.custom_schemas_path}`")
-st.write(f"Runs: `{config.run_store_dir}`")
+st.write(f"Runs: `{config.run_store_dir}` (format `{config.run_format}`)")
+
+section_spacer("lg")
+section_title("🗄️ Run retention")
+policy = policy_from_config(config)
+retention_cols = st.columns(4)
+retention_cols[0].metric("Archive after (days)", config.retention_days or "—")
+retention_cols[1].metric("Max runs size (GB)", config.retention_max_gb or "—")
+retention_cols[2].metric(
+    "Delete archives after (days)", config.archive_retention_days or "—"
+)
+retention_cols[3].metric("Max archive size (GB)", config.archive_max_gb or "—")
+st.write(f"Archive: `{config.archive_dir}`")
+if not policy.is_enabled:
+    st.caption(
+        "No retention policy configured. Set `EXTRACTLY_RETENTION_DAYS` or "
+        "`EXTRACTLY_RETENTION_MAX_GB` to archive old runs."
+    )
+else:
+    run_store = RunStore(config.run_store_dir, run_format=config.run_format)
+    dry_run_cols = st.columns(2)
+    if dry_run_cols[0].button("Preview retention", width="stretch"):
+        report = apply_retention(run_store, config.archive_dir, policy, dry_run=True)
+        st.info(
+            f"{len(report.archived_runs)} runs would be archived and "
+            f"{len(report.deleted_archives)} archives deleted "
+            f"({report.bytes_freed / 1024**2:.1f} MB)."
+        )
+    if dry_run_cols[1].button("Apply retention now", type="primary", width="stretch"):
+        report = apply_retention(run_store, config.archive_dir, policy)
+        st.success(
+            f"Archived {len(report.archived_runs)} runs into "
+            f"{len(report.archives_written)} bundles, deleted "
+            f"{len(report.deleted_archives)} archives "
+            f"({report.bytes_freed / 1024**2:.1f} MB freed)."
+        )
+
+section_spacer("lg")
+section_title("🏷️ Pre-classifier")
+preclassifier = get_preclassifier(
+    config.preclassifier_dir, config.preclassifier_min_examples
+)
+preclassifier_stats = preclassifier.stats()
+pre_cols = st.columns(4)
+pre_cols[0].metric("Active version", preclassifier_stats["version"] or "—")
+pre_cols[1].metric(
+    "Examples",
+    f"{preclassifier_stats['labelled']}/{preclassifier_stats['examples']}",
+    help="Confirmed / recorded documents.",
+)
+avoidance_rate = preclassifier_stats["avoidance_rate"]
+pre_cols[2].metric(
+    "LLM calls avoided",
+    f"{avoidance_rate:.0%}" if avoidance_rate is not None else "—",
+    help="Share of classified documents routed without LLM classification.",
+)
+new_accuracy = preclassifier_stats["new_example_accuracy"]
+pre_cols[3].metric(
+    "Accuracy on new examples",
+    f"{new_accuracy:.0%}" if new_accuracy is not None else "—",
+)
+if preclassifier_stats["labels"]:
+    st.caption(
+        "Trained labels: "
+        + ", ".join(
+            f"{label} ({count})"
+            for label, count in sorted(preclassifier_stats["labels"].items())
+        )
+    )
+train_cols = st.columns([2, 2, 1])
+if train_cols[0].button("Train from feedback", width="stretch"):
+    model = preclassifier.train(get_feedback_store())
+    if model is None:
+        st.info("Nothing to train: need new confirmed examples of at least 2 labels.")
+    else:
+        st.success(f"Activated v{model.version} on {model.doc_count} examples.")
+versions = preclassifier.list_versions()
+if versions:
+    chosen_version = train_cols[1].selectbox(
+        "Active version",
+        options=versions,
+        index=versions.index(preclassifier_stats["version"])
+        if preclassifier_stats["version"] in versions
+        else len(versions) - 1,
+        label_visibility="collapsed",
+    )
+    if train_cols[2].button(
+        "Activate",
+        disabled=chosen_version == preclassifier_stats["version"],
+        width="stretch",
+    ):
+        preclassifier.activate(chosen_version)
+        st.success(f"Switched to v{chosen_version}.")
+
+section_spacer("lg")
+section_title("🧩 Layout fingerprints")
+fingerprint_index = get_fingerprint_index(
+    config.fingerprint_db_path,
+    max_entries=config.fingerprint_max_entries,
+    pending_days=config.fingerprint_pending_days,
+)
+fingerprint_stats = fingerprint_index.stats()
+fp_cols = st.columns(4)
+fp_cols[0].metric(
+    "Templates",
+    f"{fingerprint_stats['templates']}/{config.fingerprint_max_entries}",
+)
+fp_cols[1].metric("Pending confirmation", fingerprint_stats["pending"])
+fp_hit_rate = fingerprint_stats["hit_rate"]
+fp_cols[2].metric(
+    "Hit rate",
+    f"{fp_hit_rate:.0%}" if fp_hit_rate is not None else "—",
+    help=f"{fingerprint_stats['hits']} hits in {fingerprint_stats['lookups']} lookups.",
+)
+fp_cols[3].metric("Evicted", fingerprint_stats["evicted"])
+templates = fingerprint_index.list_templates()
+if templates:
+    st.caption(
+        "Hints are appended to the extraction prompt for documents matching the "
+        "template."
+    )
+    edited_templates = st.data_editor(
+        templates,
+        width="stretch",
+        disabled=["id", "doc_type", "examples", "hits", "created_at", "last_used_at"],
+        key="fingerprint_templates",
+    )
+    if st.button("Save template hints"):
+        for original, edited in zip(templates, edited_templates):
+            if (edited.get("hint") or None) != original.get("hint"):
+                fingerprint_index.set_hint(original["id"], edited.get("hint"))
+        st.success("Template hints saved.")
+else:
+    st.caption(
+        "No confirmed layout templates yet. Documents processed with the fingerprint "
+        "cache become templates once their type is confirmed by a schema override "
+        "or saved feedback."
+    )
+
+section_spacer("lg")
+section_title("🔬 Profiling")
+PROFILED_RUNS_SCANNED = 50
+profile_cols = st.columns(3)
+profile_cols[0].metric("Mode", config.profile_mode)
+profile_cols[1].metric("Sampled runs", f"{config.profile_sample_rate:.0%}")
+profile_cols[2].metric("Report entries", config.profile_top_n)
+if config.profile_mode == "off":
+    st.caption(
+        "Profiling is disabled. Set `EXTRACTLY_PROFILE` to `cpu`, `memory` or `all` "
+        "to write cProfile and tracemalloc reports into each run directory."
+    )
+profile_store = RunStore(config.run_store_dir, run_format=config.run_format)
+profiled_runs = [
+    (run_id, artifacts)
+    for run_id in profile_store.list_run_ids(limit=PROFILED_RUNS_SCANNED)
+    if (artifacts := profile_store.list_profile_artifacts(run_id))
+]
+if profiled_runs:
+    artifacts_by_run = dict(profiled_runs)
+    # Only the selected run's artifacts are read, not every profiled run's.
+    selected_run = st.selectbox(
+        "Profiled run",
+        options=list(artifacts_by_run),
+        format_func=lambda run_id: (
+            f"{run_id} • {len(artifacts_by_run[run_id])} artifacts"
+        ),
+    )
+    artifacts = artifacts_by_run[selected_run]
+    artifact_cols = st.columns(len(artifacts))
+    for col, artifact in zip(artifact_cols, artifacts):
+        col.download_button(
+            artifact.name,
+            data=artifact.read_bytes(),
+            file_name=f"{selected_run}_{artifact.name}",
+            key=f"profile_{selected_run}_{artifact.name}",
+            width="stretch",
+        )
+else:
+    st.caption("No profile artifacts in recent runs.")
 
 section_spacer("lg")
 section_title("📝 Notes")
 st.info(
     "To update models or pipeline settings, set the environment variables in your `.env` file. "
-    "Run `streamlit run Home.py` after changing them.",
+    "Changes are picked up within a few seconds; each run records the settings it used.",
     icon="📝",
 )
 
@@ -0,0 +1,417 @@
+from __future__ import annotations
+
+import json
+import multiprocessing
+import re
+import signal
+import socket
+import time
+from dataclasses import dataclass
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, BinaryIO
+from urllib.parse import parse_qs, urlsplit
+
+from src.config import AppConfig, load_config
+from src.domain.run_store import RunStore
+from src.domain.schema_store import SchemaStore
+from src.integrations.preprocess import SUPPORTED_EXTENSIONS
+from src.jobs.inbox import enqueue_document
+from src.jobs.queue import DEFAULT_QUEUE, STATUS_DONE, Job, JobQueue, spool_file
+from src.logging import get_logger, setup_logging
+from src.metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    REGISTRY,
+    register_queue_depth,
+    start_textfile_exporter,
+)
+from src.pipeline.runner import PipelineOptions
+
+
+logger = get_logger(__name__)
+
+CLASSIFY_MODE = "classify"
+RUN_ID_PATTERN = re.compile(r"^run_[A-Za-z0-9_]+$")
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class ApiError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+@dataclass
+class ApiResponse:
+    status: HTTPStatus
+    body: dict[str, Any]
+    headers: dict[str, str] | None = None
+
+
+class _BoundedReader:
+    """Expose at most ``length`` bytes of the request body as a file object."""
+
+    def __init__(self, stream: BinaryIO, length: int):
+        self.stream = stream
+        self.remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if self.remaining <= 0:
+            return b""
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        chunk = self.stream.read(size)
+        self.remaining -= len(chunk)
+        return chunk
+
+
+def _flag(params: dict[str, list[str]], name: str, default: bool) -> bool:
+    values = params.get(name)
+    if not values:
+        return default
+    return values[-1].strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _param(params: dict[str, list[str]], name: str) -> str | None:
+    values = params.get(name)
+    value = values[-1].strip() if values else ""
+    return value or None
+
+
+class IngestionApi:
+    def __init__(self, config: AppConfig):
+        self.config = config
+        self.queue = JobQueue(config.queue_db_path)
+        self.run_store = RunStore(config.run_store_dir, run_format=config.run_format)
+        self.schema_store = SchemaStore(
+            config.prebuilt_schemas_path, config.custom_schemas_path
+        )
+        self.max_upload_bytes = int(config.api_max_upload_mb * 1024**2)
+        register_queue_depth(config.queue_db_path)
+
+    def health(self) -> ApiResponse:
+        return ApiResponse(
+            HTTPStatus.OK, {"status": "ok", "queues": self.queue.counts()}
+        )
+
+    def list_schemas(self) -> ApiResponse:
+        return ApiResponse(
+            HTTPStatus.OK,
+            {"schemas": [schema.name for schema in self.schema_store.list_schemas()]},
+        )
+
+    def submit(
+        self,
+        body: BinaryIO,
+        content_length: int | None,
+        params: dict[str, list[str]],
+        idempotency_key: str | None = None,
+        filename: str | None = None,
+    ) -> ApiResponse:
+        filename = Path(filename or _param(params, "filename") or "").name
+        if not filename:
+            raise ApiError(
+                HTTPStatus.BAD_REQUEST,
+                "Pass the file name as ?filename= or an X-Filename header.",
+            )
+        if Path(filename).suffix.lower() not in SUPPORTED_EXTENSIONS:
+            raise ApiError(
+                HTTPStatus.UNSUPPORTED_MEDIA_TYPE,
+                f"Unsupported file type. Use one of {sorted(SUPPORTED_EXTENSIONS)}.",
+            )
+        if content_length is None:
+            raise ApiError(HTTPStatus.LENGTH_REQUIRED, "Content-Length is required.")
+        if content_length > self.max_upload_bytes:
+            raise ApiError(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                f"Upload exceeds the {self.max_upload_bytes} byte limit.",
+            )
+        if content_length == 0:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Request body is empty.")
+
+        schema_name = _param(params, "schema")
+        if schema_name == CLASSIFY_MODE:
+            schema_name = None
+        if schema_name and self.schema_store.get_schema(schema_name) is None:
+            raise ApiError(
+                HTTPStatus.UNPROCESSABLE_ENTITY, f"Unknown schema '{schema_name}'."
+            )
+        queue_name = _param(params, "queue") or DEFAULT_QUEUE
+        options = PipelineOptions(
+            enable_ocr=_flag(params, "ocr", False),
+            compute_confidence=_flag(params, "confidence", True),
+        )
+
+        try:
+            spooled, sha256 = spool_file(
+                self.config.spool_dir,
+                _BoundedReader(body, content_length),
+                filename,
+                max_bytes=self.max_upload_bytes,
+            )
+        except ValueError as exc:
+            raise ApiError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, str(exc)) from exc
+        if spooled.stat().st_size != content_length:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Request body ended early.")
+
+        if idempotency_key:
+            key = f"api:key:{idempotency_key}"
+        else:
+            key = f"api:{queue_name}:{schema_name or CLASSIFY_MODE}:{sha256}"
+        received_at = time.time()
+        job = enqueue_document(
+            self.queue,
+            spooled,
+            filename,
+            queue_name=queue_name,
+            options=options,
+            doc_type_override=schema_name,
+            schema_name="API" if schema_name is None else f"API: {schema_name}",
+            max_attempts=self.config.job_max_attempts,
+            idempotency_key=key,
+            sha256=sha256,
+        )
+        replayed = job.created_at < received_at
+        if replayed and not self.queue.path_in_use(spooled):
+            # The job already existed, so nothing reads this upload's spool file
+            # unless a pending job shares the same content.
+            spooled.unlink(missing_ok=True)
+        if replayed and job.payload.get("sha256", sha256) != sha256:
+            raise ApiError(
+                HTTPStatus.UNPROCESSABLE_ENTITY,
+                f"Idempotency-Key '{idempotency_key}' was already used for a "
+                f"different file (job {job.id}).",
+            )
+        body_payload = self._job_payload(job)
+        body_payload["sha256"] = sha256
+        body_payload["replayed"] = replayed
+        return ApiResponse(
+            HTTPStatus.OK if replayed else HTTPStatus.ACCEPTED,
+            body_payload,
+            {"Location": f"/v1/jobs/{job.id}"},
+        )
+
+    def _get_job(self, job_id: str) -> Job:
+        job = self.queue.get(job_id) if JOB_ID_PATTERN.match(job_id) else None
+        if job is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Job '{job_id}' not found.")
+        return job
+
+    @staticmethod
+    def _job_payload(job: Job) -> dict[str, Any]:
+        run_id = (job.result or {}).get("run_id")
+        return {
+            "job_id": job.id,
+            "status": job.status,
+            "queue": job.queue,
+            "filename": job.payload.get("filename"),
+            "schema": job.payload.get("doc_type_override") or CLASSIFY_MODE,
+            "attempts": job.attempts,
+            "max_attempts": job.max_attempts,
+            "last_error": job.last_error,
+            "run_id": run_id,
+            "created_at": job.created_at,
+            "updated_at": job.updated_at,
+            "links": {
+                "self": f"/v1/jobs/{job.id}",
+                "result": f"/v1/jobs/{job.id}/result",
+            },
+        }
+
+    def job_status(self, job_id: str) -> ApiResponse:
+        return ApiResponse(HTTPStatus.OK, self._job_payload(self._get_job(job_id)))
+
+    def job_result(self, job_id: str) -> ApiResponse:
+        job = self._get_job(job_id)
+        if job.status != STATUS_DONE:
+            return ApiResponse(HTTPStatus.CONFLICT, self._job_payload(job))
+        response = self.run(job.result["run_id"])
+        response.body["job_id"] = job.id
+        return response
+
+    def run(self, run_id: str) -> ApiResponse:
+        payload = self.run_store.load(run_id) if RUN_ID_PATTERN.match(run_id) else None
+        if payload is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Run '{run_id}' not found.")
+        return ApiResponse(HTTPStatus.OK, payload)
+
+
+class IngestionRequestHandler(BaseHTTPRequestHandler):
+    server_version = "Extractly"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def api(self) -> IngestionApi:
+        return self.server.api
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.info("%s %s", self.address_string(), format % args)
+
+    def _send(self, response: ApiResponse) -> None:
+        data = json.dumps(response.body, ensure_ascii=False, default=str).encode()
+        self.send_response(response.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (response.headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _dispatch(self, handler: Any) -> None:
+        try:
+            response = handler()
+        except ApiError as exc:
+            response = ApiResponse(exc.status, {"error": exc.message})
+        except Exception:
+            logger.exception("Unhandled error for %s %s", self.command, self.path)
+            response = ApiResponse(
+                HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Internal server error."}
+            )
+        if response.status >= 400 and self.command == "POST":
+            # The body may be partially unread; do not reuse the connection.
+            self.close_connection = True
+        self._send(response)
+
+    def _route_get(self) -> ApiResponse:
+        parts = [part for part in urlsplit(self.path).path.split("/") if part]
+        if parts == ["healthz"]:
+            return self.api.health()
+        if parts == ["v1", "schemas"]:
+            return self.api.list_schemas()
+        if len(parts) == 3 and parts[:2] == ["v1", "jobs"]:
+            return self.api.job_status(parts[2])
+        if len(parts) == 4 and parts[:2] == ["v1", "jobs"] and parts[3] == "result":
+            return self.api.job_result(parts[2])
+        if len(parts) == 3 and parts[:2] == ["v1", "runs"]:
+            return self.api.run(parts[2])
+        raise ApiError(HTTPStatus.NOT_FOUND, "Not found.")
+
+    def _route_post(self) -> ApiResponse:
+        url = urlsplit(self.path)
+        if [part for part in url.path.split("/") if part] != ["v1", "jobs"]:
+            raise ApiError(HTTPStatus.NOT_FOUND, "Not found.")
+        if "chunked" in (self.headers.get("Transfer-Encoding") or "").lower():
+            raise ApiError(
+                HTTPStatus.LENGTH_REQUIRED, "Chunked uploads are not supported."
+            )
+        content_length = self.headers.get("Content-Length")
+        try:
+            length = int(content_length) if content_length is not None else None
+        except ValueError as exc:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length.") from exc
+        return self.api.submit(
+            self.rfile,
+            length,
+            parse_qs(url.query),
+            idempotency_key=self.headers.get("Idempotency-Key"),
+            filename=self.headers.get("X-Filename"),
+        )
+
+    def handle_expect_100(self) -> bool:
+        content_length = self.headers.get("Content-Length", "")
+        if content_length.isdigit() and int(content_length) > self.api.max_upload_bytes:
+            self.close_connection = True
+            self._send(
+                ApiResponse(
+                    HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                    {
+                        "error": (
+                            f"Upload exceeds the {self.api.max_upload_bytes} "
+                            "byte limit."
+                        )
+                    },
+                )
+            )
+            return False
+        return super().handle_expect_100()
+
+    def do_GET(self) -> None:
+        if urlsplit(self.path).path == "/metrics":
+            data = REGISTRY.render().encode("utf-8")
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", METRICS_CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        self._dispatch(self._route_get)
+
+    def do_POST(self) -> None:
+        self._dispatch(self._route_post)
+
+
+class IngestionServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, api: IngestionApi, sock: socket.socket):
+        super().__init__(
+            sock.getsockname()[:2], IngestionRequestHandler, bind_and_activate=False
+        )
+        self.socket.close()
+        self.socket = sock
+        self.api = api
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(128)
+    return sock
+
+
+def _serve_forever(sock: socket.socket) -> None:
+    config = load_config()
+    start_textfile_exporter(config.metrics_dir)
+    server = IngestionServer(IngestionApi(config), sock)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def _server_process(sock: socket.socket) -> None:
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    setup_logging()
+    _serve_forever(sock)
+
+
+def serve_api(host: str, port: int, *, workers: int = 1) -> None:
+    """Serve the ingestion API, sharing one listening socket across processes."""
+    sock = bind_socket(host, port)
+    logger.info("Ingestion API listening on %s:%s", *sock.getsockname()[:2])
+    if workers <= 1:
+        try:
+            _serve_forever(sock)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(
+            target=_server_process, args=(sock,), name=f"extractly-api-{idx}"
+        )
+        for idx in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    def _request_stop(*_: Any) -> None:
+        for process in processes:
+            process.terminate()
+
+    signal.signal(signal.SIGTERM, _request_stop)
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        logger.info("Stopping API workers...")
+        _request_stop()
+        for process in processes:
+            process.join()
+    finally:
+        sock.close()
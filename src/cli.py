@@ -0,0 +1,782 @@
+from __future__ import annotations
+
+import glob
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+import click
+
+from src.api.server import serve_api
+from src.config import AppConfig, load_config
+from src.domain.feedback_store import FeedbackStore
+from src.domain.retention import (
+    apply_retention,
+    policy_from_config,
+    restore_archived_run,
+)
+from src.domain.run_store import RunStore
+from src.domain.schema_store import SchemaStore
+from src.integrations.mock_openai import MockSettings, start_mock_server
+from src.integrations.openai_client import usage_snapshot
+from src.integrations.preprocess import SUPPORTED_EXTENSIONS, load_document
+from src.jobs.inbox import enqueue_document, watch_inbox
+from src.jobs.queue import DEFAULT_QUEUE, JobQueue, spool_path
+from src.jobs.worker import run_workers
+from src.logging import get_logger, setup_logging
+from src.pipeline.long_document import REDUCE_STRATEGIES
+from src.pipeline.combined import COMBINED_CONFIDENCE
+from src.pipeline.fingerprint import (
+    FINGERPRINT_THRESHOLD,
+    FingerprintIndex,
+    get_fingerprint_index,
+)
+from src.pipeline.page_selection import parse_page_policy
+from src.pipeline.preclassifier import PRECLASSIFY_THRESHOLD, get_preclassifier
+from src.pipeline.runner import (
+    SPECULATE_THRESHOLD,
+    SPECULATE_VOTES,
+    PipelineOptions,
+    run_pipeline,
+)
+from src.profiling import RunProfiler, profiled, start_profiler
+
+
+logger = get_logger(__name__)
+
+
+def expand_inputs(inputs: tuple[str, ...], *, recursive: bool) -> list[Path]:
+    paths: list[Path] = []
+    seen: set[Path] = set()
+
+    def _add(path: Path) -> None:
+        if path.suffix.lower() in SUPPORTED_EXTENSIONS and path not in seen:
+            seen.add(path)
+            paths.append(path)
+
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            pattern = "**/*" if recursive else "*"
+            for child in sorted(path.glob(pattern)):
+                if child.is_file():
+                    _add(child)
+        elif path.is_file():
+            _add(path)
+        else:
+            for match in sorted(glob.glob(item, recursive=True)):
+                if Path(match).is_file():
+                    _add(Path(match))
+    return paths
+
+
+def _page_policy(ctx: click.Context, param: click.Parameter, value: str) -> str:
+    try:
+        parse_page_policy(value)
+    except ValueError as exc:
+        raise click.BadParameter(str(exc)) from exc
+    return value
+
+
+def _batches(paths: list[Path], size: int) -> Iterator[list[Path]]:
+    for start in range(0, len(paths), size):
+        yield paths[start : start + size]
+
+
+def _load_payload(
+    path: Path, doc_type_override: str | None, profiler: RunProfiler | None = None
+) -> dict[str, Any] | None:
+    try:
+        with path.open("rb") as fp, profiled(profiler):
+            payload = load_document(fp, path.name)
+    except Exception as exc:
+        logger.error("Could not parse %s: %s", path, exc)
+        return None
+    if doc_type_override:
+        payload["doc_type_override"] = doc_type_override
+    return payload
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def _usage_delta(
+    before: dict[str, dict[str, int]], after: dict[str, dict[str, int]]
+) -> dict[str, int]:
+    totals = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+    for model, usage in after.items():
+        previous = before.get(model, {})
+        for key in totals:
+            totals[key] += usage.get(key, 0) - previous.get(key, 0)
+    return totals
+
+
+PIPELINE_OPTIONS = (
+    click.option("--classification-votes", type=click.IntRange(min=1), default=5),
+    click.option("--extraction-votes", type=click.IntRange(min=1), default=None),
+    click.option("--confidence/--no-confidence", default=True, show_default=True),
+    click.option("--ocr/--no-ocr", default=False, show_default=True),
+    click.option(
+        "--page-window",
+        type=click.IntRange(min=1),
+        default=None,
+        help="Extract documents longer than this many pages in concurrent windows.",
+    ),
+    click.option(
+        "--window-reduce",
+        type=click.Choice(sorted(REDUCE_STRATEGIES)),
+        default="first",
+        show_default=True,
+        help="How values from page windows are merged per field.",
+    ),
+    click.option(
+        "--field-shard-size",
+        type=click.IntRange(min=1),
+        default=None,
+        help="Split schemas wider than this many fields into concurrent requests.",
+    ),
+    click.option(
+        "--classify-pages",
+        default="first:2",
+        show_default=True,
+        callback=_page_policy,
+        help="Pages sent for classification: all, first:N, density:N or keywords:N.",
+    ),
+    click.option(
+        "--extract-pages",
+        default="all",
+        show_default=True,
+        callback=_page_policy,
+        help="Pages sent for extraction: all, first:N, density:N or keywords:N.",
+    ),
+    click.option(
+        "--preclassify/--no-preclassify",
+        default=False,
+        show_default=True,
+        help="Route confident documents with the local pre-classifier.",
+    ),
+    click.option(
+        "--preclassify-threshold",
+        type=click.FloatRange(0.0, 1.0),
+        default=PRECLASSIFY_THRESHOLD,
+        show_default=True,
+        help="Minimum pre-classifier confidence to skip LLM classification.",
+    ),
+    click.option(
+        "--fingerprint/--no-fingerprint",
+        default=False,
+        show_default=True,
+        help="Route documents matching a confirmed layout template.",
+    ),
+    click.option(
+        "--fingerprint-threshold",
+        type=click.FloatRange(0.0, 1.0),
+        default=FINGERPRINT_THRESHOLD,
+        show_default=True,
+        help="Minimum layout similarity for a template match.",
+    ),
+    click.option(
+        "--combined/--no-combined",
+        default=False,
+        show_default=True,
+        help="Classify and extract LLM-routed documents in a single call.",
+    ),
+    click.option(
+        "--combined-threshold",
+        type=click.FloatRange(0.0, 1.0),
+        default=COMBINED_CONFIDENCE,
+        show_default=True,
+        help="Minimum label confidence to keep the combined call's fields.",
+    ),
+    click.option(
+        "--speculate/--no-speculate",
+        default=False,
+        show_default=True,
+        help="Start extraction for a likely schema while classification runs.",
+    ),
+    click.option(
+        "--speculate-threshold",
+        type=click.FloatRange(0.0, 1.0),
+        default=SPECULATE_THRESHOLD,
+        show_default=True,
+        help="Minimum pre-classifier confidence to start a speculative extraction.",
+    ),
+    click.option(
+        "--speculate-votes",
+        type=click.IntRange(min=1),
+        default=SPECULATE_VOTES,
+        show_default=True,
+        help="Agreeing classification votes that start a speculative extraction.",
+    ),
+)
+
+
+def pipeline_options(command: Callable[..., Any]) -> Callable[..., Any]:
+    """Add the pipeline flags shared by ``run``, ``enqueue`` and ``inbox``."""
+    for option in reversed(PIPELINE_OPTIONS):
+        command = option(command)
+    return command
+
+
+def build_pipeline_options(
+    *, ocr: bool, confidence: bool, **params: Any
+) -> PipelineOptions:
+    """Build ``PipelineOptions`` from the values of ``PIPELINE_OPTIONS``."""
+    return PipelineOptions(enable_ocr=ocr, compute_confidence=confidence, **params)
+
+
+@click.group()
+def main() -> None:
+    """Extractly command line tools."""
+    setup_logging()
+
+
+@main.command("run")
+@click.argument("inputs", nargs=-1, required=True)
+@click.option("--schema", "schema_name", help="Extract every file with this schema.")
+@click.option(
+    "--concurrency",
+    type=click.IntRange(min=1),
+    default=4,
+    show_default=True,
+    help="Documents processed in parallel.",
+)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=100,
+    show_default=True,
+    help="Documents saved per run.",
+)
+@pipeline_options
+@click.option("--recursive", is_flag=True, help="Recurse into input directories.")
+@click.option("--input-cost", type=float, default=0.0, help="USD per 1M prompt tokens.")
+@click.option(
+    "--output-cost", type=float, default=0.0, help="USD per 1M completion tokens."
+)
+def run_command(
+    inputs: tuple[str, ...],
+    schema_name: str | None,
+    concurrency: int,
+    batch_size: int,
+    recursive: bool,
+    input_cost: float,
+    output_cost: float,
+    **pipeline_params: Any,
+) -> None:
+    """Run extraction over files, directories or glob patterns."""
+    config = load_config()
+    schema_store = SchemaStore(config.prebuilt_schemas_path, config.custom_schemas_path)
+    run_store = RunStore(config.run_store_dir, run_format=config.run_format)
+
+    schemas = schema_store.list_schemas()
+    schema_map = {schema.name: schema for schema in schemas}
+    if schema_name and schema_name not in schema_map:
+        raise click.BadParameter(
+            f"Unknown schema '{schema_name}'.", param_hint="--schema"
+        )
+
+    paths = expand_inputs(inputs, recursive=recursive)
+    if not paths:
+        raise click.UsageError("No supported documents found.")
+
+    options = build_pipeline_options(max_workers=concurrency, **pipeline_params)
+    candidates = list(schema_map) + ["Unknown", "Other"]
+    run_schema_name = schema_name or "Classified"
+
+    click.echo(f"Processing {len(paths)} documents with concurrency {concurrency}")
+    usage_before = usage_snapshot()
+    started = time.perf_counter()
+    latencies: list[float] = []
+    processed = failed_parse = with_errors = 0
+    routed: dict[str, int] = {}
+    speculated = speculation_hits = speculation_wasted = 0
+
+    with ThreadPoolExecutor(max_workers=concurrency) as parse_pool:
+        for batch in _batches(paths, batch_size):
+            profiler = start_profiler(config)
+            payloads = [
+                payload
+                for payload in parse_pool.map(
+                    partial(
+                        _load_payload, doc_type_override=schema_name, profiler=profiler
+                    ),
+                    batch,
+                )
+                if payload is not None
+            ]
+            failed_parse += len(batch) - len(payloads)
+            if not payloads:
+                if profiler is not None:
+                    profiler.stop()
+                continue
+            run = run_pipeline(
+                files=payloads,
+                default_schema=schema_map.get(schema_name) if schema_name else None,
+                schema_map=schema_map,
+                candidates=candidates,
+                run_store=run_store,
+                options=options,
+                schema_name=run_schema_name,
+                profiler=profiler,
+            )
+            processed += len(run.documents)
+            with_errors += sum(1 for doc in run.documents if doc.errors)
+            for doc in run.documents:
+                routed[doc.routed_by] = routed.get(doc.routed_by, 0) + 1
+                if doc.speculation:
+                    speculated += 1
+                    if doc.speculation["outcome"] == "hit":
+                        speculation_hits += 1
+                    else:
+                        speculation_wasted += doc.speculation["llm_calls"] or 0
+            latencies.extend(
+                doc.duration_s for doc in run.documents if doc.duration_s is not None
+            )
+            elapsed = time.perf_counter() - started
+            click.echo(
+                f"Saved {run.run_id}: {len(run.documents)} docs "
+                f"({processed}/{len(paths)}, {processed / elapsed:.2f} docs/s)"
+            )
+
+    elapsed = time.perf_counter() - started
+    usage = _usage_delta(usage_before, usage_snapshot())
+    cost = (
+        usage["prompt_tokens"] * input_cost + usage["completion_tokens"] * output_cost
+    ) / 1_000_000
+
+    click.echo("")
+    click.echo(
+        f"Documents:     {processed} processed, {failed_parse} unreadable, "
+        f"{with_errors} with errors"
+    )
+    throughput = processed / elapsed if elapsed else 0.0
+    click.echo(f"Elapsed:       {elapsed:.1f}s ({throughput:.2f} docs/s)")
+    click.echo(
+        "Latency (s):   "
+        f"p50 {percentile(latencies, 50):.2f} • "
+        f"p95 {percentile(latencies, 95):.2f} • "
+        f"p99 {percentile(latencies, 99):.2f}"
+    )
+    click.echo(
+        f"LLM calls:     {usage['calls']} "
+        f"({usage['calls'] / processed if processed else 0:.1f}/doc)"
+    )
+    click.echo(
+        f"Tokens:        {usage['prompt_tokens']} prompt • "
+        f"{usage['completion_tokens']} completion"
+    )
+    if options.preclassify or options.fingerprint:
+        local = routed.get("fingerprint", 0) + routed.get("preclassifier", 0)
+        classified = local + routed.get("llm", 0) + routed.get("combined", 0)
+        click.echo(
+            f"Routing:       {local}/{classified} without LLM calls "
+            f"({routed.get('fingerprint', 0)} fingerprint, "
+            f"{routed.get('preclassifier', 0)} pre-classifier)"
+        )
+    if options.combined:
+        click.echo(
+            f"Combined:      {routed.get('combined', 0)} classified and extracted in one call"
+        )
+    if speculated:
+        click.echo(
+            f"Speculation:   {speculation_hits}/{speculated} hits • "
+            f"{speculation_wasted} LLM calls discarded"
+        )
+    if input_cost or output_cost:
+        click.echo(f"Cost:          ${cost:.4f}")
+
+
+@main.command("enqueue")
+@click.argument("inputs", nargs=-1, required=True)
+@click.option("--queue", "queue_name", default=DEFAULT_QUEUE, show_default=True)
+@click.option("--schema", "schema_name", help="Extract every file with this schema.")
+@pipeline_options
+@click.option("--recursive", is_flag=True, help="Recurse into input directories.")
+def enqueue_command(
+    inputs: tuple[str, ...],
+    queue_name: str,
+    schema_name: str | None,
+    recursive: bool,
+    **pipeline_params: Any,
+) -> None:
+    """Queue documents for background workers."""
+    config = load_config()
+    queue = JobQueue(config.queue_db_path)
+    paths = expand_inputs(inputs, recursive=recursive)
+    if not paths:
+        raise click.UsageError("No supported documents found.")
+    options = build_pipeline_options(**pipeline_params)
+    for path in paths:
+        spooled, _ = spool_path(config.spool_dir, path)
+        job = enqueue_document(
+            queue,
+            spooled,
+            path.name,
+            queue_name=queue_name,
+            options=options,
+            doc_type_override=schema_name,
+            max_attempts=config.job_max_attempts,
+        )
+        click.echo(f"{job.id}\t{path}")
+
+
+@main.command("worker")
+@click.option(
+    "--processes",
+    type=click.IntRange(min=1),
+    default=2,
+    show_default=True,
+    help="Worker processes to start.",
+)
+@click.option(
+    "--queue", "queues", multiple=True, help="Only drain these queues (repeatable)."
+)
+def worker_command(processes: int, queues: tuple[str, ...]) -> None:
+    """Run worker processes that drain the job queue."""
+    config = load_config()
+    JobQueue(config.queue_db_path)
+    click.echo(f"Starting {processes} workers on {config.queue_db_path}")
+    run_workers(config.queue_db_path, processes=processes, queues=list(queues) or None)
+
+
+@main.command("inbox")
+@click.argument(
+    "inbox_dir", type=click.Path(exists=True, file_okay=False, path_type=Path)
+)
+@click.option("--queue", "queue_name", default=DEFAULT_QUEUE, show_default=True)
+@click.option("--schema", "schema_name", help="Extract every file with this schema.")
+@pipeline_options
+def inbox_command(
+    inbox_dir: Path,
+    queue_name: str,
+    schema_name: str | None,
+    **pipeline_params: Any,
+) -> None:
+    """Watch a directory and queue files dropped into it."""
+    config = load_config()
+    click.echo(f"Watching {inbox_dir} for documents (queue '{queue_name}')")
+    watch_inbox(
+        inbox_dir,
+        JobQueue(config.queue_db_path),
+        config.spool_dir,
+        queue_name=queue_name,
+        extensions=SUPPORTED_EXTENSIONS,
+        options=build_pipeline_options(**pipeline_params),
+        doc_type_override=schema_name,
+        max_attempts=config.job_max_attempts,
+    )
+
+
+@main.command("queue")
+@click.option(
+    "--limit",
+    "limits",
+    nargs=2,
+    multiple=True,
+    metavar="QUEUE N",
+    help="Set the max concurrent jobs for a queue (0 clears it).",
+)
+@click.option("--requeue", "requeue_ids", multiple=True, help="Retry a dead job.")
+def queue_command(
+    limits: tuple[tuple[str, str], ...], requeue_ids: tuple[str, ...]
+) -> None:
+    """Show queue depth, set concurrency limits and retry dead jobs."""
+    config = load_config()
+    queue = JobQueue(config.queue_db_path)
+    for queue_name, value in limits:
+        limit = int(value)
+        queue.set_queue_limit(queue_name, limit or None)
+    for job_id in requeue_ids:
+        job = queue.get(job_id)
+        if job is not None and not Path(job.payload["path"]).exists():
+            click.echo(f"Job {job_id}: its upload was already removed.", err=True)
+        elif not queue.requeue_dead(job_id):
+            click.echo(f"Job {job_id} is not dead-lettered.", err=True)
+
+    limits_by_queue = queue.queue_limits()
+    counts = queue.counts()
+    for queue_name in sorted(set(counts) | set(limits_by_queue)):
+        statuses = counts.get(queue_name, {})
+        summary = ", ".join(
+            f"{status} {total}" for status, total in sorted(statuses.items())
+        )
+        limit = limits_by_queue.get(queue_name)
+        click.echo(
+            f"{queue_name}: {summary or 'empty'} (limit {limit if limit else 'none'})"
+        )
+    for job in queue.list_jobs(status="dead", limit=20):
+        click.echo(f"dead {job.id} {job.payload.get('filename')}: {job.last_error}")
+
+
+@main.command("serve")
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", type=int, default=8080, show_default=True)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=2,
+    show_default=True,
+    help="Server processes sharing the listening socket.",
+)
+def serve_command(host: str, port: int, workers: int) -> None:
+    """Serve the HTTP ingestion API (jobs are processed by `worker`)."""
+    config = load_config()
+    JobQueue(config.queue_db_path)
+    click.echo(
+        f"Serving ingestion API on http://{host}:{port} with {workers} workers "
+        f"(max upload {config.api_max_upload_mb:g} MB)"
+    )
+    serve_api(host, port, workers=workers)
+
+
+@main.command("mock-llm")
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", type=int, default=8099, show_default=True)
+@click.option(
+    "--latency",
+    default="lognormal:0.8,0.4",
+    show_default=True,
+    help="fixed:S, uniform:LO,HI or lognormal:MEDIAN,SIGMA (seconds).",
+)
+@click.option("--error-rate", type=float, default=0.0, show_default=True)
+@click.option("--rate-limit-rate", type=float, default=0.0, show_default=True)
+@click.option("--seed", type=int, help="Seed latency and error injection.")
+def mock_llm_command(
+    host: str,
+    port: int,
+    latency: str,
+    error_rate: float,
+    rate_limit_rate: float,
+    seed: int | None,
+) -> None:
+    """Serve a mock OpenAI chat completions endpoint for offline runs."""
+    try:
+        server = start_mock_server(
+            MockSettings(
+                latency=latency,
+                error_rate=error_rate,
+                rate_limit_rate=rate_limit_rate,
+                seed=seed,
+            ),
+            host=host,
+            port=port,
+        )
+    except ValueError as exc:
+        raise click.BadParameter(str(exc), param_hint="--latency") from exc
+    click.echo(f"Mock OpenAI API on {server.base_url}")
+    click.echo(f"Use: OPENAI_BASE_URL={server.base_url} OPENAI_API_KEY=mock")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+@main.command("schemas")
+def schemas_command() -> None:
+    """List available schemas."""
+    config = load_config()
+    store = SchemaStore(config.prebuilt_schemas_path, config.custom_schemas_path)
+    for schema in store.list_schemas():
+        source = store.get_schema_source(schema.name)
+        click.echo(f"{schema.name}\t{source}\t{len(schema.fields)} fields")
+
+
+@main.group("preclassifier")
+def preclassifier_group() -> None:
+    """Train and manage the local document pre-classifier."""
+
+
+@preclassifier_group.command("train")
+@click.option("--full", is_flag=True, help="Retrain from scratch, not warm-started.")
+def preclassifier_train_command(full: bool) -> None:
+    """Train a new model version from confirmed labels and activate it."""
+    config = load_config()
+    preclassifier = get_preclassifier(
+        config.preclassifier_dir, config.preclassifier_min_examples
+    )
+    model = preclassifier.train(FeedbackStore(config.feedback_db_path), full=full)
+    if model is None:
+        click.echo("Nothing to train: need new confirmed examples of 2+ labels.")
+        return
+    accuracy = (
+        f", {model.new_example_accuracy:.0%} of new examples predicted correctly"
+        if model.new_example_accuracy is not None
+        else ""
+    )
+    click.echo(
+        f"Activated v{model.version}: {model.doc_count} examples, "
+        f"{len(model.labels)} labels{accuracy}"
+    )
+
+
+@preclassifier_group.command("status")
+def preclassifier_status_command() -> None:
+    """Show the active version, training data and LLM-call avoidance rate."""
+    config = load_config()
+    preclassifier = get_preclassifier(
+        config.preclassifier_dir, config.preclassifier_min_examples
+    )
+    stats = preclassifier.stats()
+    versions = preclassifier.list_versions()
+    click.echo(
+        f"Active version: {stats['version'] or 'none'} "
+        f"(available: {', '.join(map(str, versions)) or 'none'})"
+    )
+    click.echo(f"Examples:       {stats['examples']} ({stats['labelled']} labelled)")
+    for label, count in sorted(stats["labels"].items()):
+        click.echo(f"  {label}: {count}")
+    rate = stats["avoidance_rate"]
+    click.echo(
+        "LLM avoidance:  "
+        + (f"{rate:.1%} of classified documents" if rate is not None else "n/a")
+    )
+
+
+@preclassifier_group.command("activate")
+@click.argument("version", type=int)
+def preclassifier_activate_command(version: int) -> None:
+    """Switch running pipelines to another model version."""
+    config = load_config()
+    preclassifier = get_preclassifier(
+        config.preclassifier_dir, config.preclassifier_min_examples
+    )
+    try:
+        preclassifier.activate(version)
+    except ValueError as exc:
+        raise click.BadParameter(str(exc), param_hint="VERSION") from exc
+    click.echo(f"Activated v{version}")
+
+
+@main.group("fingerprints")
+def fingerprints_group() -> None:
+    """Inspect and maintain the layout-fingerprint cache."""
+
+
+def _fingerprint_index() -> tuple[AppConfig, FingerprintIndex]:
+    config = load_config()
+    return config, get_fingerprint_index(
+        config.fingerprint_db_path,
+        max_entries=config.fingerprint_max_entries,
+        pending_days=config.fingerprint_pending_days,
+    )
+
+
+@fingerprints_group.command("status")
+def fingerprints_status_command() -> None:
+    """Show templates and the lookup hit rate."""
+    _, index = _fingerprint_index()
+    stats = index.stats()
+    hit_rate = stats["hit_rate"]
+    click.echo(
+        f"Templates: {stats['templates']} ({stats['pending']} pending, "
+        f"{stats['evicted']} evicted)"
+    )
+    click.echo(
+        f"Lookups:   {stats['lookups']}, {stats['hits']} hits"
+        + (f" ({hit_rate:.1%})" if hit_rate is not None else "")
+    )
+    for template in index.list_templates():
+        click.echo(
+            f"{template['id']}\t{template['doc_type']}\t"
+            f"{template['examples']} examples\t{template['hits']} hits"
+            + (f"\thint: {template['hint']}" if template["hint"] else "")
+        )
+
+
+@fingerprints_group.command("sync")
+def fingerprints_sync_command() -> None:
+    """Confirm pending fingerprints from saved feedback."""
+    config, index = _fingerprint_index()
+    confirmed = index.sync_feedback(FeedbackStore(config.feedback_db_path))
+    click.echo(f"Confirmed {confirmed} pending fingerprints.")
+
+
+@fingerprints_group.command("hint")
+@click.argument("template_id", type=int)
+@click.argument("hint", required=False)
+def fingerprints_hint_command(template_id: int, hint: str | None) -> None:
+    """Set (or clear, without HINT) the extraction hint of a template."""
+    _, index = _fingerprint_index()
+    if not index.set_hint(template_id, hint):
+        raise click.BadParameter(
+            f"Unknown template {template_id}.", param_hint="TEMPLATE_ID"
+        )
+    click.echo(f"Updated template {template_id}.")
+
+
+@main.group("retention", invoke_without_command=True)
+@click.option("--dry-run", is_flag=True, help="Report without archiving.")
+@click.pass_context
+def retention_group(ctx: click.Context, dry_run: bool) -> None:
+    """Archive and evict old runs according to the retention policy."""
+    if ctx.invoked_subcommand is not None:
+        return
+    config = load_config()
+    policy = policy_from_config(config)
+    if not policy.is_enabled:
+        raise click.UsageError("No retention policy configured.")
+    run_store = RunStore(config.run_store_dir, run_format=config.run_format)
+    report = apply_retention(run_store, config.archive_dir, policy, dry_run=dry_run)
+    if dry_run:
+        click.echo(
+            f"Would archive {len(report.archived_runs)} runs, "
+            f"would delete {len(report.deleted_archives)} archives, "
+            f"{report.bytes_freed / 1024**2:.1f} MB would be freed."
+        )
+    else:
+        click.echo(
+            f"Archived {len(report.archived_runs)} runs, "
+            f"deleted {len(report.deleted_archives)} archives, "
+            f"{report.bytes_freed / 1024**2:.1f} MB freed."
+        )
+
+
+@retention_group.command("restore")
+@click.argument("run_id")
+def retention_restore_command(run_id: str) -> None:
+    """Bring an archived run back into the run store."""
+    config = load_config()
+    run_store = RunStore(config.run_store_dir, run_format=config.run_format)
+    if run_store.run_dir(run_id).exists():
+        raise click.ClickException(f"Run {run_id} is already in the run store.")
+    if not restore_archived_run(run_store, config.archive_dir, run_id):
+        raise click.ClickException(f"No archived run {run_id} in {config.archive_dir}.")
+    click.echo(f"Restored {run_id} to {run_store.run_dir(run_id)}")
+
+
+@main.group("runs")
+def runs_group() -> None:
+    """Maintain the run store."""
+
+
+@runs_group.command("migrate")
+def runs_migrate_command() -> None:
+    """Move runs from the flat layout into yyyy/mm/dd shards."""
+    config = load_config()
+    run_store = RunStore(config.run_store_dir, run_format=config.run_format)
+    moved = run_store.migrate_flat_layout()
+    click.echo(f"Moved {moved} runs into the sharded layout.")
+
+
+@runs_group.command("migrate-previews")
+def runs_migrate_previews_command() -> None:
+    """Move base64 previews embedded in old runs into preview files."""
+    config = load_config()
+    run_store = RunStore(config.run_store_dir, run_format=config.run_format)
+    migrated = run_store.migrate_all_previews()
+    click.echo(f"Migrated previews of {migrated} runs.")
+
+
+if __name__ == "__main__":
+    main()
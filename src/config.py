@@ -1,18 +1,28 @@
 from __future__ import annotations
 
 import os
-from dataclasses import dataclass
+import threading
+import time
+from dataclasses import asdict, dataclass
 from pathlib import Path
+from typing import Any
+
 from dotenv import load_dotenv
 
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
+DOTENV_PATH = PROJECT_ROOT / ".env"
+DOTENV_CHECK_INTERVAL_S = 2.0
+SECRET_FIELDS = {"openai_api_key"}
 
 
 @dataclass(frozen=True)
 class AppConfig:
     app_name: str
     openai_api_key: str | None
+    openai_base_url: str | None
+    llm_backend: str
+    cassette_path: Path
     classify_model: str
     extract_model: str
     ocr_model: str
@@ -20,26 +30,72 @@ class AppConfig:
     max_retries: int
     retry_backoff_s: float
     run_store_dir: Path
+    run_format: str
+    archive_dir: Path
+    retention_days: int | None
+    retention_max_gb: float | None
+    archive_retention_days: int | None
+    archive_max_gb: float | None
     prebuilt_schemas_path: Path
     custom_schemas_path: Path
+    feedback_db_path: Path
+    queue_db_path: Path
+    spool_dir: Path
+    job_max_attempts: int
+    job_visibility_timeout_s: float
+    job_retry_backoff_s: float
+    max_background_runs: int
+    pipeline_workers: int
+    api_max_upload_mb: float
+    metrics_dir: Path | None
+    profile_mode: str
+    profile_sample_rate: float
+    profile_top_n: int
+    profile_memory_frames: int
+    preclassifier_dir: Path
+    preclassifier_min_examples: int
+    fingerprint_db_path: Path
+    fingerprint_max_entries: int
+    fingerprint_pending_days: int
 
 
-def load_config() -> AppConfig:
-    load_dotenv(override=True)
+def _optional_env(name: str, cast: type[int] | type[float]) -> int | float | None:
+    value = os.getenv(name, "").strip()
+    return cast(value) if value else None
+
+
+def _build_config() -> AppConfig:
+    run_store_dir = Path(
+        os.getenv("EXTRACTLY_RUNS_DIR", PROJECT_ROOT / "data" / "runs")
+    )
     schema_dir = Path(os.getenv("EXTRACTLY_SCHEMAS_DIR", PROJECT_ROOT / "schemas"))
 
     return AppConfig(
         app_name=os.getenv("EXTRACTLY_APP_NAME", "Extractly"),
         openai_api_key=os.getenv("OPENAI_API_KEY"),
+        openai_base_url=os.getenv("OPENAI_BASE_URL") or None,
+        llm_backend=os.getenv("EXTRACTLY_LLM_BACKEND", "live").lower(),
+        cassette_path=Path(
+            os.getenv(
+                "EXTRACTLY_CASSETTE_PATH",
+                PROJECT_ROOT / "data" / "cassettes" / "default.jsonl",
+            )
+        ),
         classify_model=os.getenv("CLASSIFY_MODEL", "o4-mini"),
         extract_model=os.getenv("EXTRACT_MODEL", "o4-mini"),
         ocr_model=os.getenv("OCR_MODEL", "o4-mini"),
         request_timeout_s=int(os.getenv("EXTRACTLY_TIMEOUT_S", "40")),
         max_retries=int(os.getenv("EXTRACTLY_MAX_RETRIES", "2")),
         retry_backoff_s=float(os.getenv("EXTRACTLY_RETRY_BACKOFF_S", "1.5")),
-        run_store_dir=Path(
-            os.getenv("EXTRACTLY_RUNS_DIR", PROJECT_ROOT / "data" / "runs")
+        run_store_dir=run_store_dir,
+        run_format=os.getenv("EXTRACTLY_RUN_FORMAT", "json"),
+        archive_dir=Path(
+            os.getenv("EXTRACTLY_ARCHIVE_DIR", run_store_dir.parent / "runs_archive")
         ),
+        retention_days=_optional_env("EXTRACTLY_RETENTION_DAYS", int),
+        retention_max_gb=_optional_env("EXTRACTLY_RETENTION_MAX_GB", float),
+        archive_retention_days=_optional_env("EXTRACTLY_ARCHIVE_RETENTION_DAYS", int),
+        archive_max_gb=_optional_env("EXTRACTLY_ARCHIVE_MAX_GB", float),
         prebuilt_schemas_path=Path(
             os.getenv(
                 "EXTRACTLY_PREBUILT_SCHEMAS_PATH",
@@ -52,4 +108,106 @@ def load_config() -> AppConfig:
                 schema_dir / "custom_schemas.json",
             )
         ),
+        feedback_db_path=Path(
+            os.getenv(
+                "EXTRACTLY_FEEDBACK_DB", PROJECT_ROOT / "data" / "feedback.sqlite3"
+            )
+        ),
+        queue_db_path=Path(
+            os.getenv("EXTRACTLY_QUEUE_DB", PROJECT_ROOT / "data" / "queue.sqlite3")
+        ),
+        spool_dir=Path(
+            os.getenv("EXTRACTLY_SPOOL_DIR", PROJECT_ROOT / "data" / "spool")
+        ),
+        job_max_attempts=int(os.getenv("EXTRACTLY_JOB_MAX_ATTEMPTS", "3")),
+        job_visibility_timeout_s=float(
+            os.getenv("EXTRACTLY_JOB_VISIBILITY_TIMEOUT_S", "300")
+        ),
+        job_retry_backoff_s=float(os.getenv("EXTRACTLY_JOB_RETRY_BACKOFF_S", "10")),
+        max_background_runs=int(os.getenv("EXTRACTLY_MAX_BACKGROUND_RUNS", "2")),
+        pipeline_workers=int(os.getenv("EXTRACTLY_PIPELINE_WORKERS", "1")),
+        api_max_upload_mb=float(os.getenv("EXTRACTLY_API_MAX_UPLOAD_MB", "50")),
+        metrics_dir=(
+            Path(os.environ["EXTRACTLY_METRICS_DIR"])
+            if os.getenv("EXTRACTLY_METRICS_DIR")
+            else None
+        ),
+        profile_mode=os.getenv("EXTRACTLY_PROFILE", "off").lower() or "off",
+        profile_sample_rate=float(os.getenv("EXTRACTLY_PROFILE_SAMPLE_RATE", "1.0")),
+        profile_top_n=int(os.getenv("EXTRACTLY_PROFILE_TOP_N", "40")),
+        profile_memory_frames=int(os.getenv("EXTRACTLY_PROFILE_MEMORY_FRAMES", "1")),
+        preclassifier_dir=Path(
+            os.getenv(
+                "EXTRACTLY_PRECLASSIFIER_DIR", PROJECT_ROOT / "data" / "preclassifier"
+            )
+        ),
+        preclassifier_min_examples=int(
+            os.getenv("EXTRACTLY_PRECLASSIFIER_MIN_EXAMPLES", "5")
+        ),
+        fingerprint_db_path=Path(
+            os.getenv(
+                "EXTRACTLY_FINGERPRINT_DB",
+                PROJECT_ROOT / "data" / "fingerprints.sqlite3",
+            )
+        ),
+        fingerprint_max_entries=int(
+            os.getenv("EXTRACTLY_FINGERPRINT_MAX_ENTRIES", "5000")
+        ),
+        fingerprint_pending_days=int(
+            os.getenv("EXTRACTLY_FINGERPRINT_PENDING_DAYS", "30")
+        ),
     )
+
+
+def _dotenv_mtime() -> float | None:
+    try:
+        return DOTENV_PATH.stat().st_mtime
+    except OSError:
+        return None
+
+
+_config_lock = threading.Lock()
+_config: AppConfig | None = None
+_config_mtime: float | None = None
+_next_check = 0.0
+
+
+def load_config() -> AppConfig:
+    """Return the cached configuration snapshot.
+
+    ``.env`` is re-read only when its mtime changes, and the mtime is checked at
+    most every ``DOTENV_CHECK_INTERVAL_S`` seconds. Changes made directly to
+    ``os.environ`` need an explicit ``reload_config()``.
+    """
+    global _config, _config_mtime, _next_check
+    with _config_lock:
+        now = time.monotonic()
+        if _config is not None and now < _next_check:
+            return _config
+        _next_check = now + DOTENV_CHECK_INTERVAL_S
+        mtime = _dotenv_mtime()
+        if _config is None or mtime != _config_mtime:
+            load_dotenv(DOTENV_PATH, override=True)
+            _config = _build_config()
+            _config_mtime = mtime
+        return _config
+
+
+def reload_config() -> AppConfig:
+    global _config
+    with _config_lock:
+        _config = None
+    return load_config()
+
+
+def config_snapshot(config: AppConfig) -> dict[str, Any]:
+    """JSON-friendly copy of ``config`` with secrets reduced to presence flags."""
+    snapshot: dict[str, Any] = {}
+    for name, value in asdict(config).items():
+        if name in SECRET_FIELDS:
+            snapshot[name] = "set" if value else None
+        elif isinstance(value, Path):
+            snapshot[name] = str(value)
+        else:
+            snapshot[name] = value
+    return snapshot
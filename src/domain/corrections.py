@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import json
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from src.domain.storage import file_lock, write_json_atomic
+
+
+CORRECTIONS_DIRNAME = "corrections"
+
+
+class CorrectionConflictError(RuntimeError):
+    def __init__(self, doc_key: str, expected_version: int, current_version: int):
+        super().__init__(
+            f"Document {doc_key} was updated by another reviewer "
+            f"(expected version {expected_version}, found {current_version})."
+        )
+        self.doc_key = doc_key
+        self.expected_version = expected_version
+        self.current_version = current_version
+
+
+@dataclass
+class DocumentCorrection:
+    doc_key: str
+    version: int
+    corrected: dict[str, Any] = field(default_factory=dict)
+    document_type_corrected: str | None = None
+    updated_at: str = ""
+    author: str | None = None
+
+
+def doc_key_for_index(index: int) -> str:
+    return f"{index:04d}"
+
+
+class CorrectionStore:
+    def __init__(self, run_dir: Path):
+        self.base_dir = run_dir / CORRECTIONS_DIRNAME
+
+    def _path(self, doc_key: str) -> Path:
+        return self.base_dir / f"{doc_key}.json"
+
+    @staticmethod
+    def _read(path: Path) -> DocumentCorrection | None:
+        if not path.exists():
+            return None
+        try:
+            with path.open("r", encoding="utf-8") as fp:
+                payload = json.load(fp)
+        except (json.JSONDecodeError, OSError):
+            return None
+        return DocumentCorrection(
+            doc_key=str(payload.get("doc_key", path.stem)),
+            version=int(payload.get("version", 0)),
+            corrected=payload.get("corrected") or {},
+            document_type_corrected=payload.get("document_type_corrected"),
+            updated_at=payload.get("updated_at", ""),
+            author=payload.get("author"),
+        )
+
+    def get(self, doc_key: str) -> DocumentCorrection | None:
+        return self._read(self._path(doc_key))
+
+    def load_all(self) -> dict[str, DocumentCorrection]:
+        if not self.base_dir.exists():
+            return {}
+        corrections: dict[str, DocumentCorrection] = {}
+        for path in self.base_dir.glob("*.json"):
+            correction = self._read(path)
+            if correction:
+                corrections[correction.doc_key] = correction
+        return corrections
+
+    def save(
+        self,
+        doc_key: str,
+        *,
+        corrected: dict[str, Any],
+        document_type_corrected: str | None,
+        expected_version: int,
+        author: str | None = None,
+    ) -> DocumentCorrection:
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(doc_key)
+        with file_lock(path.with_suffix(".lock")):
+            current = self._read(path)
+            current_version = current.version if current else 0
+            if current_version != expected_version:
+                raise CorrectionConflictError(
+                    doc_key, expected_version, current_version
+                )
+            correction = DocumentCorrection(
+                doc_key=doc_key,
+                version=current_version + 1,
+                corrected=corrected,
+                document_type_corrected=document_type_corrected,
+                updated_at=datetime.now(timezone.utc).isoformat(),
+                author=author,
+            )
+            write_json_atomic(path, asdict(correction))
+        return correction
+
+
+def apply_corrections(
+    payload: dict[str, Any], corrections: dict[str, DocumentCorrection]
+) -> dict[str, Any]:
+    for index, doc in enumerate(payload.get("documents", []), start=1):
+        correction = corrections.get(doc_key_for_index(index))
+        if correction is None:
+            doc.setdefault("correction_version", 0)
+            continue
+        doc["document_type_original"] = doc.get("document_type_original") or doc.get(
+            "document_type"
+        )
+        if correction.document_type_corrected:
+            doc["document_type_corrected"] = correction.document_type_corrected
+            doc["document_type"] = correction.document_type_corrected
+        doc["corrected"] = correction.corrected
+        doc["correction_version"] = correction.version
+        doc["corrected_at"] = correction.updated_at
+    return payload
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Any, Iterable, Iterator, TextIO
+
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS feedback (
+    doc_id TEXT PRIMARY KEY,
+    run_id TEXT,
+    schema_name TEXT,
+    filename TEXT,
+    document_type_corrected TEXT,
+    timestamp TEXT,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_feedback_run ON feedback (run_id);
+CREATE INDEX IF NOT EXISTS idx_feedback_schema ON feedback (schema_name);
+CREATE INDEX IF NOT EXISTS idx_feedback_timestamp ON feedback (timestamp);
+CREATE TABLE IF NOT EXISTS feedback_fields (
+    doc_id TEXT NOT NULL REFERENCES feedback (doc_id) ON DELETE CASCADE,
+    field TEXT NOT NULL,
+    PRIMARY KEY (doc_id, field)
+);
+CREATE INDEX IF NOT EXISTS idx_feedback_fields_field ON feedback_fields (field);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+LEGACY_IMPORT_KEY = "legacy_jsonl_imported"
+
+
+class FeedbackStore:
+    def __init__(self, db_path: Path, legacy_jsonl_path: Path | None = None):
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA_SQL)
+        if legacy_jsonl_path is not None:
+            self._import_legacy(legacy_jsonl_path)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        with closing(sqlite3.connect(self.db_path, timeout=30)) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            with conn:
+                yield conn
+
+    def _import_legacy(self, path: Path) -> None:
+        with self._connect() as conn:
+            done = conn.execute(
+                "SELECT value FROM meta WHERE key = ?", (LEGACY_IMPORT_KEY,)
+            ).fetchone()
+        if done or not path.exists():
+            return
+        with path.open(encoding="utf-8") as fp:
+            self.import_jsonl(fp)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (LEGACY_IMPORT_KEY, str(path)),
+            )
+
+    @staticmethod
+    def _upsert(conn: sqlite3.Connection, row: dict[str, Any]) -> None:
+        doc_id = row["doc_id"]
+        conn.execute(
+            """
+            INSERT INTO feedback (
+                doc_id, run_id, schema_name, filename,
+                document_type_corrected, timestamp, payload
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (doc_id) DO UPDATE SET
+                run_id = excluded.run_id,
+                schema_name = excluded.schema_name,
+                filename = excluded.filename,
+                document_type_corrected = excluded.document_type_corrected,
+                timestamp = excluded.timestamp,
+                payload = excluded.payload
+            """,
+            (
+                doc_id,
+                row.get("run_id"),
+                row.get("schema_name"),
+                row.get("filename"),
+                row.get("document_type_corrected"),
+                row.get("timestamp"),
+                json.dumps(row, ensure_ascii=False),
+            ),
+        )
+        conn.execute("DELETE FROM feedback_fields WHERE doc_id = ?", (doc_id,))
+        conn.executemany(
+            "INSERT OR IGNORE INTO feedback_fields (doc_id, field) VALUES (?, ?)",
+            [(doc_id, str(field)) for field in row.get("changed_fields", []) or []],
+        )
+
+    def upsert(self, row: dict[str, Any]) -> None:
+        with self._connect() as conn:
+            self._upsert(conn, row)
+
+    def upsert_many(self, rows: Iterable[dict[str, Any]]) -> int:
+        count = 0
+        with self._connect() as conn:
+            for row in rows:
+                if not row.get("doc_id"):
+                    continue
+                self._upsert(conn, row)
+                count += 1
+        return count
+
+    def get(self, doc_id: str) -> dict[str, Any] | None:
+        with self._connect() as conn:
+            result = conn.execute(
+                "SELECT payload FROM feedback WHERE doc_id = ?", (doc_id,)
+            ).fetchone()
+        return json.loads(result[0]) if result else None
+
+    @staticmethod
+    def _where(
+        schema_name: str | None, run_id: str | None, field: str | None
+    ) -> tuple[str, list[Any]]:
+        clauses: list[str] = []
+        params: list[Any] = []
+        if schema_name is not None:
+            clauses.append("f.schema_name = ?")
+            params.append(schema_name)
+        if run_id is not None:
+            clauses.append("f.run_id = ?")
+            params.append(run_id)
+        if field is not None:
+            clauses.append(
+                "f.doc_id IN (SELECT doc_id FROM feedback_fields WHERE field = ?)"
+            )
+            params.append(field)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def query(
+        self,
+        *,
+        schema_name: str | None = None,
+        run_id: str | None = None,
+        field: str | None = None,
+        limit: int | None = None,
+        offset: int = 0,
+    ) -> list[dict[str, Any]]:
+        where, params = self._where(schema_name, run_id, field)
+        sql = f"SELECT f.payload FROM feedback f {where} ORDER BY f.timestamp DESC, f.doc_id"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([limit, offset])
+        with self._connect() as conn:
+            return [json.loads(row[0]) for row in conn.execute(sql, params)]
+
+    def count(
+        self,
+        *,
+        schema_name: str | None = None,
+        run_id: str | None = None,
+        field: str | None = None,
+    ) -> int:
+        where, params = self._where(schema_name, run_id, field)
+        with self._connect() as conn:
+            return conn.execute(
+                f"SELECT COUNT(*) FROM feedback f {where}", params
+            ).fetchone()[0]
+
+    def stats(self) -> dict[str, int]:
+        with self._connect() as conn:
+            corrections, runs = conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT run_id) FROM feedback"
+            ).fetchone()
+            fields = conn.execute("SELECT COUNT(*) FROM feedback_fields").fetchone()[0]
+        # One correction is kept per document, so corrections is also the
+        # number of documents touched.
+        return {
+            "corrections": corrections,
+            "runs": runs,
+            "changed_fields": fields,
+        }
+
+    def distinct_values(self, column: str) -> list[str]:
+        if column == "field":
+            sql = "SELECT DISTINCT field FROM feedback_fields ORDER BY field"
+        elif column in {"schema_name", "run_id"}:
+            sql = (
+                f"SELECT DISTINCT {column} FROM feedback "
+                f"WHERE {column} IS NOT NULL ORDER BY {column}"
+            )
+        else:
+            raise ValueError(f"Unsupported column '{column}'.")
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute(sql)]
+
+    def document_types(self) -> dict[str, str]:
+        """Confirmed ``document_type_corrected`` per ``doc_id``."""
+        with self._connect() as conn:
+            return dict(
+                conn.execute(
+                    "SELECT doc_id, document_type_corrected FROM feedback "
+                    "WHERE document_type_corrected IS NOT NULL"
+                ).fetchall()
+            )
+
+    def import_jsonl(self, fp: Iterable[str]) -> int:
+        """Upsert JSONL corrections; nothing is written unless every line parses.
+
+        Raises ``ValueError`` for the first line that is not a JSON object.
+        """
+        rows: list[dict[str, Any]] = []
+        for number, line in enumerate(fp, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise ValueError(
+                    f"Line {number} is not valid JSON: {exc.msg}."
+                ) from exc
+            if not isinstance(row, dict):
+                raise ValueError(f"Line {number} is not a JSON object.")
+            rows.append(row)
+        return self.upsert_many(rows)
+
+    def iter_jsonl(self) -> Iterator[str]:
+        with self._connect() as conn:
+            for (payload,) in conn.execute(
+                "SELECT payload FROM feedback ORDER BY timestamp, doc_id"
+            ):
+                yield payload + "\n"
+
+    def export_jsonl(self, fp: TextIO) -> int:
+        count = 0
+        for line in self.iter_jsonl():
+            fp.write(line)
+            count += 1
+        return count
@@ -24,6 +24,7 @@ class SchemaField:
     description: str = ""
     example: str = ""
     enum_values: list[str] = field(default_factory=list)
+    group: str = ""
 
     def to_dict(self) -> dict[str, Any]:
         payload = {
@@ -35,6 +36,8 @@ class SchemaField:
         }
         if self.enum_values:
             payload["enum"] = self.enum_values
+        if self.group:
+            payload["group"] = self.group
         return payload
 
 
@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tarfile
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from uuid import uuid4
+
+from src.config import AppConfig
+from src.domain.run_store import RunStore, run_started_at
+from src.logging import get_logger
+
+
+logger = get_logger(__name__)
+
+ARCHIVE_INDEX_FILENAME = "index.jsonl"
+
+
+@dataclass
+class RetentionPolicy:
+    archive_after_days: int | None = None
+    max_runs_bytes: int | None = None
+    delete_archives_after_days: int | None = None
+    max_archive_bytes: int | None = None
+
+    @property
+    def is_enabled(self) -> bool:
+        return any(
+            value is not None
+            for value in (
+                self.archive_after_days,
+                self.max_runs_bytes,
+                self.delete_archives_after_days,
+                self.max_archive_bytes,
+            )
+        )
+
+
+@dataclass
+class RetentionReport:
+    archived_runs: list[str] = field(default_factory=list)
+    archives_written: list[Path] = field(default_factory=list)
+    deleted_archives: list[Path] = field(default_factory=list)
+    bytes_freed: int = 0
+    dry_run: bool = False
+
+
+def policy_from_config(config: AppConfig) -> RetentionPolicy:
+    def _gb_to_bytes(value: float | None) -> int | None:
+        return None if value is None else int(value * 1024**3)
+
+    return RetentionPolicy(
+        archive_after_days=config.retention_days,
+        max_runs_bytes=_gb_to_bytes(config.retention_max_gb),
+        delete_archives_after_days=config.archive_retention_days,
+        max_archive_bytes=_gb_to_bytes(config.archive_max_gb),
+    )
+
+
+def _dir_size(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += (Path(root) / name).stat().st_size
+            except FileNotFoundError:
+                continue
+    return total
+
+
+def _remove_empty_shards(store: RunStore, run_dir: Path) -> None:
+    parent = run_dir.parent
+    while parent != store.base_dir and store.base_dir in parent.parents:
+        try:
+            parent.rmdir()
+        except OSError:
+            break
+        parent = parent.parent
+
+
+def _select_runs_to_archive(
+    store: RunStore, policy: RetentionPolicy, now: datetime
+) -> list[tuple[str, Path, int]]:
+    cutoff = (
+        now - timedelta(days=policy.archive_after_days)
+        if policy.archive_after_days is not None
+        else None
+    )
+    runs = []
+    for run_dir in store.iter_run_dirs():
+        started_at = run_started_at(run_dir.name)
+        # Queued or running runs may still be written to; leave them alone.
+        if started_at is None or not store.is_finished(run_dir):
+            continue
+        runs.append((run_dir.name, run_dir, started_at))
+
+    selected: dict[str, tuple[str, Path, int]] = {}
+    sizes: dict[str, int] = {}
+    if cutoff is not None:
+        for run_id, run_dir, started_at in runs:
+            if started_at < cutoff:
+                sizes[run_id] = _dir_size(run_dir)
+                selected[run_id] = (run_id, run_dir, sizes[run_id])
+
+    if policy.max_runs_bytes is not None:
+        for run_id, run_dir, _ in runs:
+            sizes.setdefault(run_id, _dir_size(run_dir))
+        remaining = sum(
+            size for run_id, size in sizes.items() if run_id not in selected
+        )
+        for run_id, run_dir, _ in reversed(runs):
+            if remaining <= policy.max_runs_bytes:
+                break
+            if run_id in selected:
+                continue
+            selected[run_id] = (run_id, run_dir, sizes[run_id])
+            remaining -= sizes[run_id]
+
+    return sorted(selected.values(), key=lambda item: item[0])
+
+
+def _append_index(archive_dir: Path, bundle: Path, run_ids: list[str]) -> None:
+    index_path = archive_dir / ARCHIVE_INDEX_FILENAME
+    with index_path.open("a", encoding="utf-8") as fp:
+        for run_id in run_ids:
+            fp.write(
+                json.dumps(
+                    {
+                        "run_id": run_id,
+                        "bundle": str(bundle.relative_to(archive_dir)),
+                    }
+                )
+                + "\n"
+            )
+
+
+def _archive_runs(
+    store: RunStore,
+    archive_dir: Path,
+    runs: list[tuple[str, Path, int]],
+    report: RetentionReport,
+) -> None:
+    by_day: dict[str, list[tuple[str, Path, int]]] = {}
+    for item in runs:
+        started_at = run_started_at(item[0])
+        by_day.setdefault(f"{started_at:%Y%m%d}", []).append(item)
+
+    for day, day_runs in sorted(by_day.items()):
+        bundle = archive_dir / day[:4] / f"runs_{day}_{uuid4().hex[:6]}.tar.gz"
+        bundle.parent.mkdir(parents=True, exist_ok=True)
+        tmp_bundle = bundle.with_name(f".{bundle.name}.tmp")
+        with tarfile.open(tmp_bundle, "w:gz") as tar:
+            for run_id, run_dir, _ in day_runs:
+                tar.add(run_dir, arcname=run_id)
+        os.replace(tmp_bundle, bundle)
+        _append_index(archive_dir, bundle, [run_id for run_id, _, _ in day_runs])
+        report.archives_written.append(bundle)
+
+        for run_id, run_dir, size in day_runs:
+            shutil.rmtree(run_dir, ignore_errors=True)
+            _remove_empty_shards(store, run_dir)
+            report.archived_runs.append(run_id)
+            report.bytes_freed += size
+
+
+def _evict_archives(
+    archive_dir: Path,
+    policy: RetentionPolicy,
+    now: datetime,
+    report: RetentionReport,
+) -> None:
+    if not archive_dir.exists():
+        return
+    bundles = sorted(
+        (path for path in archive_dir.rglob("runs_*.tar.gz")),
+        key=lambda path: path.name,
+    )
+    cutoff = (
+        now - timedelta(days=policy.delete_archives_after_days)
+        if policy.delete_archives_after_days is not None
+        else None
+    )
+    evicted: list[Path] = []
+    if cutoff is not None:
+        for bundle in bundles:
+            try:
+                bundle_day = datetime.strptime(
+                    bundle.name.split("_")[1], "%Y%m%d"
+                ).replace(tzinfo=timezone.utc)
+            except (IndexError, ValueError):
+                continue
+            if bundle_day < cutoff:
+                evicted.append(bundle)
+
+    if policy.max_archive_bytes is not None:
+        kept = [bundle for bundle in bundles if bundle not in evicted]
+        total = sum(bundle.stat().st_size for bundle in kept)
+        for bundle in kept:
+            if total <= policy.max_archive_bytes:
+                break
+            evicted.append(bundle)
+            total -= bundle.stat().st_size
+
+    for bundle in evicted:
+        size = bundle.stat().st_size
+        if not report.dry_run:
+            bundle.unlink(missing_ok=True)
+        report.deleted_archives.append(bundle)
+        report.bytes_freed += size
+
+    if evicted and not report.dry_run:
+        _prune_index(archive_dir, evicted)
+
+
+def _prune_index(archive_dir: Path, evicted: list[Path]) -> None:
+    index_path = archive_dir / ARCHIVE_INDEX_FILENAME
+    if not index_path.exists():
+        return
+    removed = {str(bundle.relative_to(archive_dir)) for bundle in evicted}
+    with index_path.open(encoding="utf-8") as fp:
+        rows = [json.loads(line) for line in fp if line.strip()]
+    kept = [row for row in rows if row.get("bundle") not in removed]
+    tmp_path = index_path.with_name(f".{index_path.name}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as fp:
+        for row in kept:
+            fp.write(json.dumps(row) + "\n")
+    os.replace(tmp_path, index_path)
+
+
+def apply_retention(
+    store: RunStore,
+    archive_dir: Path,
+    policy: RetentionPolicy,
+    *,
+    now: datetime | None = None,
+    dry_run: bool = False,
+) -> RetentionReport:
+    now = now or datetime.now(timezone.utc)
+    report = RetentionReport(dry_run=dry_run)
+    runs = _select_runs_to_archive(store, policy, now)
+    if runs:
+        if dry_run:
+            report.archived_runs = [run_id for run_id, _, _ in runs]
+            report.bytes_freed = sum(size for _, _, size in runs)
+        else:
+            archive_dir.mkdir(parents=True, exist_ok=True)
+            _archive_runs(store, archive_dir, runs, report)
+    _evict_archives(archive_dir, policy, now, report)
+    logger.info(
+        "Retention archived %s runs, deleted %s archives, freed %s bytes",
+        len(report.archived_runs),
+        len(report.deleted_archives),
+        report.bytes_freed,
+    )
+    return report
+
+
+def find_archived_run(archive_dir: Path, run_id: str) -> Path | None:
+    index_path = archive_dir / ARCHIVE_INDEX_FILENAME
+    if not index_path.exists():
+        return None
+    bundle: str | None = None
+    with index_path.open(encoding="utf-8") as fp:
+        for line in fp:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if row.get("run_id") == run_id:
+                bundle = row.get("bundle")
+    if bundle is None:
+        return None
+    path = archive_dir / bundle
+    return path if path.exists() else None
+
+
+def _checked_members(
+    members: list[tarfile.TarInfo], run_id: str
+) -> list[tarfile.TarInfo]:
+    """Manual stand-in for ``filter="data"`` on Pythons without tar filters."""
+    for member in members:
+        parts = Path(member.name).parts
+        if (
+            Path(member.name).is_absolute()
+            or ".." in parts
+            or parts[:1] != (run_id,)
+            or not (member.isfile() or member.isdir())
+        ):
+            raise tarfile.TarError(f"Refusing to extract {member.name!r}")
+        member.mode &= 0o755
+    return members
+
+
+def restore_archived_run(store: RunStore, archive_dir: Path, run_id: str) -> bool:
+    bundle = find_archived_run(archive_dir, run_id)
+    target = store.shard_dir(run_id)
+    if bundle is None or target is None:
+        return False
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with tarfile.open(bundle, "r:gz") as tar:
+        members = [
+            member
+            for member in tar.getmembers()
+            if member.name == run_id or member.name.startswith(f"{run_id}/")
+        ]
+        if hasattr(tarfile, "data_filter"):
+            tar.extractall(target.parent, members=members, filter="data")
+        else:
+            tar.extractall(target.parent, members=_checked_members(members, run_id))
+    return target.exists()
@@ -1,12 +1,26 @@
 from __future__ import annotations
 
+import base64
 import json
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
+import heapq
 from pathlib import Path
-from typing import Any
+import shutil
+import time
+from typing import Any, Iterator
 from uuid import uuid4
 
+from src.domain.corrections import (
+    CorrectionStore,
+    DocumentCorrection,
+    apply_corrections,
+    doc_key_for_index,
+)
+from src.domain.serialization import RUN_FILENAMES, find_run_file, get_serializer
+from src.domain.storage import write_bytes_atomic, write_json_atomic
+from src.metrics import RUN_STORE_BYTES, RUN_STORE_SECONDS
+
 
 @dataclass
 class RunDocument:
@@ -17,10 +31,17 @@ class RunDocument:
     corrected: dict[str, Any]
     document_type_original: str | None = None
     document_type_corrected: str | None = None
-    preview_image: str | None = None
+    routed_by: str | None = None
+    preview_path: str | None = None
     field_confidence: dict[str, float] = field(default_factory=dict)
+    field_pages: dict[str, list[int]] = field(default_factory=dict)
+    pages_used: dict[str, list[int]] = field(default_factory=dict)
+    speculation: dict[str, Any] = field(default_factory=dict)
     warnings: list[str] = field(default_factory=list)
     errors: list[str] = field(default_factory=list)
+    duration_s: float | None = None
+    spans: list[dict[str, Any]] = field(default_factory=list)
+    text_tokens: dict[str, int] = field(default_factory=dict)
 
 
 @dataclass
@@ -32,6 +53,7 @@ class ExtractionRun:
     documents: list[RunDocument]
     status: str = "completed"
     logs: list[str] = field(default_factory=list)
+    config: dict[str, Any] = field(default_factory=dict)
 
     def to_dict(self) -> dict[str, Any]:
         return {
@@ -41,63 +63,289 @@ class ExtractionRun:
             "mode": self.mode,
             "status": self.status,
             "logs": self.logs,
+            "config": self.config,
             "documents": [
                 {
                     "filename": doc.filename,
                     "document_type": doc.document_type,
                     "document_type_original": doc.document_type_original,
                     "document_type_corrected": doc.document_type_corrected,
-                    "preview_image": doc.preview_image,
+                    "routed_by": doc.routed_by,
+                    "preview_path": doc.preview_path,
                     "confidence": doc.confidence,
                     "extracted": doc.extracted,
                     "corrected": doc.corrected,
                     "field_confidence": doc.field_confidence,
+                    "field_pages": doc.field_pages,
+                    "pages_used": doc.pages_used,
+                    "speculation": doc.speculation,
                     "warnings": doc.warnings,
                     "errors": doc.errors,
+                    "duration_s": doc.duration_s,
+                    "spans": doc.spans,
+                    "text_tokens": doc.text_tokens,
                 }
                 for doc in self.documents
             ],
         }
 
 
+PREVIEWS_DIRNAME = "previews"
+PROGRESS_FILENAME = "progress.json"
+FINAL_STATUSES = {"completed", "cancelled", "failed"}
+PROFILE_DIRNAME = "profile"
+DEFAULT_RUN_FORMAT = "json"
+RUN_TIMESTAMP_FORMAT = "%Y%m%dT%H%M%SZ"
+
+
+def run_started_at(run_id: str) -> datetime | None:
+    parts = run_id.split("_")
+    if len(parts) < 2 or parts[0] != "run":
+        return None
+    try:
+        return datetime.strptime(parts[1], RUN_TIMESTAMP_FORMAT).replace(
+            tzinfo=timezone.utc
+        )
+    except ValueError:
+        return None
+
+
 class RunStore:
-    def __init__(self, base_dir: Path):
+    def __init__(self, base_dir: Path, run_format: str = DEFAULT_RUN_FORMAT):
         self.base_dir = base_dir
         self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.serializer = get_serializer(run_format)
 
     def create_run_id(self) -> str:
-        timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        timestamp = datetime.now(timezone.utc).strftime(RUN_TIMESTAMP_FORMAT)
         return f"run_{timestamp}_{uuid4().hex[:6]}"
 
-    def save(self, run: ExtractionRun) -> Path:
-        run_dir = self.base_dir / run.run_id
-        run_dir.mkdir(parents=True, exist_ok=True)
-        run_path = run_dir / "run.json"
-        with run_path.open("w", encoding="utf-8") as fp:
-            json.dump(run.to_dict(), fp, indent=2, ensure_ascii=False)
+    def shard_dir(self, run_id: str) -> Path | None:
+        started_at = run_started_at(run_id)
+        if started_at is None:
+            return None
+        return (
+            self.base_dir
+            / f"{started_at:%Y}"
+            / f"{started_at:%m}"
+            / f"{started_at:%d}"
+            / run_id
+        )
+
+    def run_dir(self, run_id: str) -> Path:
+        sharded = self.shard_dir(run_id)
+        if sharded is not None and sharded.exists():
+            return sharded
+        legacy = self.base_dir / run_id
+        if legacy.exists() or sharded is None:
+            return legacy
+        return sharded
+
+    def _iter_sharded_run_dirs(self) -> Iterator[Path]:
+        def _children(path: Path, width: int) -> list[Path]:
+            return sorted(
+                (
+                    child
+                    for child in path.iterdir()
+                    if child.is_dir()
+                    and child.name.isdigit()
+                    and len(child.name) == width
+                ),
+                reverse=True,
+            )
+
+        for year_dir in _children(self.base_dir, 4):
+            for month_dir in _children(year_dir, 2):
+                for day_dir in _children(month_dir, 2):
+                    yield from sorted(day_dir.glob("run_*"), reverse=True)
+
+    def iter_run_dirs(self) -> Iterator[Path]:
+        legacy_dirs = sorted(self.base_dir.glob("run_*"), reverse=True)
+        yield from heapq.merge(
+            self._iter_sharded_run_dirs(),
+            legacy_dirs,
+            key=lambda path: path.name,
+            reverse=True,
+        )
+
+    def list_run_ids(self, limit: int | None = None) -> list[str]:
+        run_ids: list[str] = []
+        for run_dir in self.iter_run_dirs():
+            if find_run_file(run_dir, self.serializer) is None:
+                continue
+            run_ids.append(run_dir.name)
+            if limit is not None and len(run_ids) >= limit:
+                break
+        return run_ids
+
+    def migrate_flat_layout(self) -> int:
+        moved = 0
+        for legacy_dir in sorted(self.base_dir.glob("run_*")):
+            target = self.shard_dir(legacy_dir.name)
+            if target is None or target.exists():
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.move(str(legacy_dir), target)
+            moved += 1
+        return moved
+
+    def _write_run(self, run_dir: Path, payload: dict[str, Any]) -> Path:
+        started = time.perf_counter()
+        run_path = run_dir / self.serializer.filename
+        data = self.serializer.dumps(payload)
+        write_bytes_atomic(run_path, data)
+        for filename in RUN_FILENAMES:
+            if filename != self.serializer.filename:
+                (run_dir / filename).unlink(missing_ok=True)
+        RUN_STORE_SECONDS.observe(time.perf_counter() - started, operation="write")
+        RUN_STORE_BYTES.inc(len(data), operation="write")
         return run_path
 
-    def list_runs(self) -> list[dict[str, Any]]:
+    def _read_run(self, run_dir: Path) -> dict[str, Any] | None:
+        started = time.perf_counter()
+        located = find_run_file(run_dir, self.serializer)
+        if located is None:
+            return None
+        run_path, serializer = located
+        data = run_path.read_bytes()
+        payload = serializer.loads(data)
+        RUN_STORE_SECONDS.observe(time.perf_counter() - started, operation="read")
+        RUN_STORE_BYTES.inc(len(data), operation="read")
+        return payload
+
+    def save(self, run: ExtractionRun) -> Path:
+        return self._write_run(self.run_dir(run.run_id), run.to_dict())
+
+    def write_progress(self, run_id: str, progress: dict[str, Any]) -> None:
+        progress = {
+            **progress,
+            "run_id": run_id,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+        write_json_atomic(self.run_dir(run_id) / PROGRESS_FILENAME, progress)
+
+    def is_finished(self, run_dir: Path) -> bool:
+        """Whether the run has been saved and is no longer queued or running."""
+        if find_run_file(run_dir, self.serializer) is None:
+            return False
+        progress = self.read_progress(run_dir.name)
+        return progress is None or progress.get("status") in FINAL_STATUSES
+
+    def read_progress(self, run_id: str) -> dict[str, Any] | None:
+        path = self.run_dir(run_id) / PROGRESS_FILENAME
+        if not path.exists():
+            return None
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError):
+            return None
+
+    def save_preview(self, run_id: str, index: int, data: bytes, extension: str) -> str:
+        preview_dir = self.run_dir(run_id) / PREVIEWS_DIRNAME
+        preview_dir.mkdir(parents=True, exist_ok=True)
+        filename = f"{index:04d}.{extension}"
+        with RUN_STORE_SECONDS.time(operation="write_preview"):
+            (preview_dir / filename).write_bytes(data)
+        RUN_STORE_BYTES.inc(len(data), operation="write_preview")
+        return f"{PREVIEWS_DIRNAME}/{filename}"
+
+    def profile_dir(self, run_id: str) -> Path:
+        return self.run_dir(run_id) / PROFILE_DIRNAME
+
+    def list_profile_artifacts(self, run_id: str) -> list[Path]:
+        profile_dir = self.profile_dir(run_id)
+        if not profile_dir.is_dir():
+            return []
+        return sorted(path for path in profile_dir.iterdir() if path.is_file())
+
+    def load_preview(self, run_id: str, preview_path: str | None) -> bytes | None:
+        if not preview_path:
+            return None
+        run_dir = self.run_dir(run_id)
+        preview_dir = (run_dir / PREVIEWS_DIRNAME).resolve()
+        path = (run_dir / preview_path).resolve()
+        if preview_dir not in path.parents or not path.exists():
+            return None
+        return path.read_bytes()
+
+    def document_preview(self, run_id: str, doc: dict[str, Any]) -> bytes | None:
+        """Preview bytes for ``doc``, decoding the base64 preview of runs that
+        were not migrated to preview files yet."""
+        encoded = doc.get("preview_image")
+        if encoded:
+            try:
+                return base64.b64decode(encoded)
+            except ValueError:
+                return None
+        return self.load_preview(run_id, doc.get("preview_path"))
+
+    def migrate_previews(self, run_id: str, payload: dict[str, Any]) -> bool:
+        migrated = False
+        for index, doc in enumerate(payload.get("documents", []), start=1):
+            encoded = doc.pop("preview_image", None)
+            if encoded is None:
+                continue
+            migrated = True
+            if not encoded:
+                doc.setdefault("preview_path", None)
+                continue
+            try:
+                data = base64.b64decode(encoded)
+            except ValueError:
+                doc.setdefault("preview_path", None)
+                continue
+            doc["preview_path"] = self.save_preview(run_id, index, data, "png")
+        if migrated:
+            self.update_run(run_id, payload)
+        return migrated
+
+    def migrate_all_previews(self) -> int:
+        """Move base64 previews of every stored run into preview files."""
+        migrated = 0
+        for run_dir in self.iter_run_dirs():
+            payload = self._read_run(run_dir)
+            if payload is None:
+                continue
+            if self.migrate_previews(run_dir.name, payload):
+                migrated += 1
+        return migrated
+
+    def list_runs(self, limit: int | None = None) -> list[dict[str, Any]]:
         runs: list[dict[str, Any]] = []
-        for run_dir in sorted(self.base_dir.glob("run_*"), reverse=True):
-            run_path = run_dir / "run.json"
-            if not run_path.exists():
+        for run_dir in self.iter_run_dirs():
+            payload = self._read_run(run_dir)
+            if payload is None:
                 continue
-            with run_path.open("r", encoding="utf-8") as fp:
-                payload = json.load(fp)
             runs.append(payload)
+            if limit is not None and len(runs) >= limit:
+                break
         return runs
 
     def load(self, run_id: str) -> dict[str, Any] | None:
-        run_path = self.base_dir / run_id / "run.json"
-        if not run_path.exists():
+        run_dir = self.run_dir(run_id)
+        payload = self._read_run(run_dir)
+        if payload is None:
             return None
-        with run_path.open("r", encoding="utf-8") as fp:
-            return json.load(fp)
+        corrections = CorrectionStore(run_dir).load_all()
+        return apply_corrections(payload, corrections)
+
+    def save_correction(
+        self,
+        run_id: str,
+        doc_index: int,
+        *,
+        corrected: dict[str, Any],
+        document_type_corrected: str | None,
+        expected_version: int,
+        author: str | None = None,
+    ) -> DocumentCorrection:
+        return CorrectionStore(self.run_dir(run_id)).save(
+            doc_key_for_index(doc_index),
+            corrected=corrected,
+            document_type_corrected=document_type_corrected,
+            expected_version=expected_version,
+            author=author,
+        )
 
     def update_run(self, run_id: str, payload: dict[str, Any]) -> Path:
-        run_path = self.base_dir / run_id / "run.json"
-        run_path.parent.mkdir(parents=True, exist_ok=True)
-        with run_path.open("w", encoding="utf-8") as fp:
-            json.dump(payload, fp, indent=2, ensure_ascii=False)
-        return run_path
+        return self._write_run(self.run_dir(run_id), payload)
@@ -191,6 +191,7 @@ class SchemaStore:
             description=str(field.get("description", "")),
             example=str(field.get("example", "")),
             enum_values=list(field.get("enum", field.get("enum_values", [])) or []),
+            group=str(field.get("group") or "").strip(),
         )
 
 
@@ -203,6 +204,7 @@ def schemas_to_table(schema: DocumentSchema) -> list[dict]:
             "description": field.description,
             "example": field.example,
             "enum": ", ".join(field.enum_values),
+            "group": field.group,
         }
         for field in schema.fields
     ]
@@ -216,6 +218,7 @@ def table_to_schema(
         enum_values = [
             item.strip() for item in str(row.get("enum", "")).split(",") if item.strip()
         ]
+        group = row.get("group")
         fields.append(
             SchemaField(
                 name=str(row.get("name", "")).strip(),
@@ -224,6 +227,7 @@ def table_to_schema(
                 description=str(row.get("description", "")).strip(),
                 example=str(row.get("example", "")).strip(),
                 enum_values=enum_values,
+                group=group.strip() if isinstance(group, str) else "",
             )
         )
     return DocumentSchema(name=name, description=description, fields=fields)
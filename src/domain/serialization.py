@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import gzip
+import json
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_dumps(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode(
+        "utf-8"
+    )
+
+
+def _json_loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class RunSerializer(ABC):
+    name = ""
+    filename = ""
+
+    @abstractmethod
+    def dumps(self, payload: dict[str, Any]) -> bytes: ...
+
+    @abstractmethod
+    def loads(self, data: bytes) -> dict[str, Any]: ...
+
+
+class JsonRunSerializer(RunSerializer):
+    name = "json"
+    filename = "run.json"
+
+    def dumps(self, payload: dict[str, Any]) -> bytes:
+        return _json_dumps(payload)
+
+    def loads(self, data: bytes) -> dict[str, Any]:
+        return _json_loads(data)
+
+
+class GzipJsonRunSerializer(RunSerializer):
+    name = "json.gz"
+    filename = "run.json.gz"
+
+    def __init__(self, level: int = 3):
+        self.level = level
+
+    def dumps(self, payload: dict[str, Any]) -> bytes:
+        return gzip.compress(_json_dumps(payload), compresslevel=self.level, mtime=0)
+
+    def loads(self, data: bytes) -> dict[str, Any]:
+        return _json_loads(gzip.decompress(data))
+
+
+class ZstdJsonRunSerializer(RunSerializer):
+    name = "json.zst"
+    filename = "run.json.zst"
+
+    def __init__(self, level: int = 3):
+        self.level = level
+
+    @staticmethod
+    def _module():
+        try:
+            import zstandard
+        except ImportError as exc:
+            raise RuntimeError(
+                "Run format 'json.zst' requires the 'zstandard' package."
+            ) from exc
+        return zstandard
+
+    def dumps(self, payload: dict[str, Any]) -> bytes:
+        compressor = self._module().ZstdCompressor(level=self.level)
+        return compressor.compress(_json_dumps(payload))
+
+    def loads(self, data: bytes) -> dict[str, Any]:
+        decompressor = self._module().ZstdDecompressor()
+        return _json_loads(decompressor.decompress(data))
+
+
+class MsgpackRunSerializer(RunSerializer):
+    name = "msgpack"
+    filename = "run.msgpack"
+
+    @staticmethod
+    def _module():
+        try:
+            import msgpack
+        except ImportError as exc:
+            raise RuntimeError(
+                "Run format 'msgpack' requires the 'msgpack' package."
+            ) from exc
+        return msgpack
+
+    def dumps(self, payload: dict[str, Any]) -> bytes:
+        return self._module().packb(payload, use_bin_type=True)
+
+    def loads(self, data: bytes) -> dict[str, Any]:
+        return self._module().unpackb(data, raw=False, strict_map_key=False)
+
+
+SERIALIZERS: dict[str, type[RunSerializer]] = {
+    serializer.name: serializer
+    for serializer in (
+        JsonRunSerializer,
+        GzipJsonRunSerializer,
+        ZstdJsonRunSerializer,
+        MsgpackRunSerializer,
+    )
+}
+RUN_FILENAMES = {serializer.filename: name for name, serializer in SERIALIZERS.items()}
+
+
+def get_serializer(name: str) -> RunSerializer:
+    serializer_cls = SERIALIZERS.get(name.strip().lower())
+    if serializer_cls is None:
+        raise ValueError(
+            f"Unknown run format '{name}'. Choose one of: {', '.join(SERIALIZERS)}."
+        )
+    return serializer_cls()
+
+
+def find_run_file(
+    run_dir: Path, preferred: RunSerializer | None = None
+) -> tuple[Path, RunSerializer] | None:
+    if preferred is not None:
+        path = run_dir / preferred.filename
+        if path.exists():
+            return path, preferred
+    for filename, name in RUN_FILENAMES.items():
+        path = run_dir / filename
+        if path.exists():
+            return path, get_serializer(name)
+    return None
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import json
 from dataclasses import dataclass, field
+from typing import Any
 
-from src.domain.models import DocumentSchema, FIELD_TYPES
+from src.domain.models import DocumentSchema, FIELD_TYPES, SchemaField
 
 
 @dataclass
@@ -40,3 +42,56 @@ def validate_schema(schema: DocumentSchema) -> ValidationResult:
             errors.append(f"Field '{field_name}' is enum but has no values.")
 
     return ValidationResult(is_valid=not errors, errors=errors, warnings=warnings)
+
+
+BOOLEAN_STRINGS = {"true", "false", "yes", "no", "1", "0"}
+
+
+def _is_blank(value: Any) -> bool:
+    return value is None or (isinstance(value, (str, list, dict)) and not value)
+
+
+def _type_problem(field: SchemaField, value: Any) -> str | None:
+    # Values keep the document's wording and units, so numbers and dates are
+    # only required to contain digits rather than to parse.
+    if field.field_type in {"number", "integer", "date"}:
+        if isinstance(value, bool) or not any(char.isdigit() for char in str(value)):
+            return f"is not a {field.field_type}"
+    elif field.field_type == "boolean":
+        if not isinstance(value, bool) and str(value).lower() not in BOOLEAN_STRINGS:
+            return "is not a boolean"
+    elif field.field_type == "enum" and field.enum_values:
+        allowed = {option.lower() for option in field.enum_values}
+        if str(value).lower() not in allowed:
+            return f"has value '{value}' outside its enum"
+    elif field.field_type in {"object", "array"}:
+        expected = dict if field.field_type == "object" else list
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except json.JSONDecodeError:
+                return f"is not a JSON {field.field_type}"
+        if not isinstance(value, expected):
+            return f"is not an {field.field_type}"
+    return None
+
+
+def validate_metadata(
+    schema: DocumentSchema, metadata: dict[str, Any]
+) -> ValidationResult:
+    """Check extracted values against ``schema`` field types and requirements."""
+    errors: list[str] = []
+    warnings: list[str] = []
+    unknown = sorted(set(metadata) - {field.name for field in schema.fields})
+    if unknown:
+        warnings.append(f"Unexpected fields: {', '.join(unknown)}.")
+    for field in schema.fields:  # noqa: F402
+        value = metadata.get(field.name)
+        if _is_blank(value):
+            if field.required:
+                errors.append(f"Required field '{field.name}' is empty.")
+            continue
+        problem = _type_problem(field, value)
+        if problem:
+            errors.append(f"Field '{field.name}' {problem}.")
+    return ValidationResult(is_valid=not errors, errors=errors, warnings=warnings)
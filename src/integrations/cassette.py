@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Any
+
+from src.logging import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class CassetteMissError(LookupError):
+    def __init__(self, key: str, path: Path):
+        super().__init__(f"No recorded response for request {key[:12]} in {path}.")
+        self.key = key
+        self.path = path
+
+
+def request_key(request: dict[str, Any]) -> str:
+    canonical = json.dumps(
+        {
+            "model": request.get("model"),
+            "messages": request.get("messages"),
+            "temperature": request.get("temperature"),
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """Append-only JSONL of raw chat completion response bodies keyed by request.
+
+    Identical requests (e.g. repeated votes) are replayed in the order they were
+    recorded, cycling once the recording is exhausted.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._bodies: dict[str, list[str]] | None = None
+        self._cursors: dict[str, int] = {}
+
+    def _load(self) -> dict[str, list[str]]:
+        if self._bodies is None:
+            self._bodies = {}
+            if self.path.exists():
+                with self.path.open(encoding="utf-8") as fp:
+                    for line in fp:
+                        if not line.strip():
+                            continue
+                        entry = json.loads(line)
+                        self._bodies.setdefault(entry["key"], []).append(entry["body"])
+        return self._bodies
+
+    def record(self, request: dict[str, Any], body: str) -> None:
+        key = request_key(request)
+        entry = {"key": key, "model": request.get("model"), "body": body}
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as fp:
+                fp.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._load().setdefault(key, []).append(body)
+
+    def replay(self, request: dict[str, Any]) -> str:
+        key = request_key(request)
+        with self._lock:
+            bodies = self._load().get(key)
+            if not bodies:
+                raise CassetteMissError(key, self.path)
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+            return bodies[cursor % len(bodies)]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(bodies) for bodies in self._load().values())
+
+
+_cassettes: dict[Path, Cassette] = {}
+_cassettes_lock = threading.Lock()
+
+
+def get_cassette(path: Path) -> Cassette:
+    with _cassettes_lock:
+        cassette = _cassettes.get(path)
+        if cassette is None:
+            cassette = _cassettes[path] = Cassette(path)
+        return cassette
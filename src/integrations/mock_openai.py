@@ -0,0 +1,296 @@
+"""
+Local stand-in for the OpenAI chat completions endpoint.
+
+Point the client at it with ``OPENAI_BASE_URL=http://127.0.0.1:8099/v1`` and any
+``OPENAI_API_KEY``. Responses are derived from the request so the pipeline can run
+end to end: classification prompts get one of the offered labels, extraction
+prompts get a JSON object with every requested field and OCR prompts get text.
+"""
+
+from __future__ import annotations
+
+import ast
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable
+from uuid import uuid4
+
+from src.logging import get_logger
+
+
+logger = get_logger(__name__)
+
+IMAGE_TOKENS = 765
+FIELD_LINE = re.compile(
+    r"^- (?P<name>.+?) \((?P<type>[^,()]+), (?:required|optional)\)"
+    r"(?: enum: (?P<enum>.*?))?(?: - .*)?$"
+)
+CANDIDATES_LINE = re.compile(r"Choose one type from: (\[.*\])\.")
+COMPACT_FIELD = re.compile(
+    r"(?P<name>[^,()*]+?)\*? \((?P<type>[a-z]+)(?:: (?P<enum>[^)]*))?\)"
+)
+LABEL_FIELDS_HEADER = "Fields per label"
+NON_LABELS = {"Unknown", "Other"}
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Parse ``fixed:S``, ``uniform:LO,HI`` or ``lognormal:MEDIAN,SIGMA`` (seconds)."""
+    kind, _, raw = spec.partition(":")
+    try:
+        params = [float(value) for value in raw.split(",") if value.strip()]
+    except ValueError as exc:
+        raise ValueError(f"Invalid latency spec '{spec}'.") from exc
+    if kind == "fixed" and len(params) == 1:
+        return lambda rng: params[0]
+    if kind == "uniform" and len(params) == 2:
+        return lambda rng: rng.uniform(params[0], params[1])
+    if kind == "lognormal" and len(params) == 2:
+        mu = math.log(max(params[0], 1e-6))
+        return lambda rng: rng.lognormvariate(mu, params[1])
+    raise ValueError(
+        f"Invalid latency spec '{spec}'. "
+        "Use fixed:S, uniform:LO,HI or lognormal:MEDIAN,SIGMA."
+    )
+
+
+@dataclass
+class MockSettings:
+    latency: str = "fixed:0"
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    seed: int | None = None
+
+
+@dataclass
+class MockStats:
+    requests: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    bytes_received: int = 0
+    by_kind: dict[str, int] = field(default_factory=dict)
+
+
+def _request_text(messages: list[dict[str, Any]]) -> tuple[str, int]:
+    texts: list[str] = []
+    images = 0
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            texts.append(content)
+            continue
+        for part in content or []:
+            if part.get("type") == "image_url":
+                images += 1
+            else:
+                texts.append(part.get("text", ""))
+    return "\n".join(texts), images
+
+
+def _field_value(name: str, field_type: str, enum: str | None) -> Any:
+    if enum:
+        return enum.split(", ")[0]
+    field_type = field_type.strip().lower()
+    if field_type in {"number", "float", "integer", "int"}:
+        return 42
+    if field_type == "boolean":
+        return True
+    if field_type == "date":
+        return "2024-01-31"
+    return f"{name} sample"
+
+
+def _combined_payload(text: str, label: str) -> dict[str, Any]:
+    metadata: dict[str, Any] = {}
+    for line in text.splitlines():
+        if line.startswith(f"{label}: "):
+            for match in COMPACT_FIELD.finditer(line[len(label) + 2 :]):
+                metadata[match["name"].strip()] = _field_value(
+                    match["name"].strip(),
+                    match["type"],
+                    match["enum"].replace("|", ", ") if match["enum"] else None,
+                )
+            break
+    return {"doc_type": label, "confidence": 0.9, "metadata": metadata}
+
+
+def canned_response(messages: list[dict[str, Any]]) -> tuple[str, str]:
+    """Return ``(kind, content)`` for a chat request."""
+    text, _ = _request_text(messages)
+    digest = int(hashlib.sha256(text.encode("utf-8")).hexdigest(), 16)
+
+    candidates_match = CANDIDATES_LINE.search(text)
+    if candidates_match:
+        try:
+            candidates = list(ast.literal_eval(candidates_match.group(1)))
+        except (SyntaxError, ValueError):
+            candidates = []
+        labels = [label for label in candidates if label not in NON_LABELS]
+        label = labels[digest % len(labels)] if labels else "Unknown"
+        if LABEL_FIELDS_HEADER in text:
+            return "combined", json.dumps(_combined_payload(text, label))
+        return "classify", label
+
+    if "Fields:" in text:
+        metadata = {}
+        for line in text.splitlines():
+            match = FIELD_LINE.match(line.strip())
+            if match:
+                metadata[match["name"]] = _field_value(
+                    match["name"], match["type"], match["enum"]
+                )
+        if "`metadata`" in text:
+            payload = {
+                "metadata": metadata,
+                "confidence": {name: 0.9 for name in metadata},
+            }
+        else:
+            payload = metadata
+        return "extract", json.dumps(payload)
+
+    if "Extract all text." in text:
+        return (
+            "ocr",
+            "MOCK DOCUMENT\nInvoice number: 42\nDate: 2024-01-31\nTotal: 100.00",
+        )
+
+    return "other", "{}"
+
+
+def completion_body(model: str, messages: list[dict[str, Any]]) -> tuple[str, dict]:
+    kind, content = canned_response(messages)
+    text, images = _request_text(messages)
+    prompt_tokens = len(text) // 4 + images * IMAGE_TOKENS
+    completion_tokens = len(content) // 4 + 1
+    return kind, {
+        "id": f"chatcmpl-mock-{uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": 0},
+        },
+    }
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    server_version = "ExtractlyMock"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug("%s %s", self.address_string(), format % args)
+
+    def _send_json(
+        self,
+        status: HTTPStatus,
+        payload: dict[str, Any],
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/") == "/stats":
+            with self.server.stats_lock:
+                stats = asdict(self.server.stats)
+            self._send_json(HTTPStatus.OK, stats)
+            return
+        self._send_json(HTTPStatus.NOT_FOUND, {"error": {"message": "Not found"}})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": {"message": "Not found"}})
+            return
+        server: MockOpenAIServer = self.server
+        with server.stats_lock:
+            server.stats.requests += 1
+            server.stats.bytes_received += len(body)
+            draw = server.rng.random()
+            delay = max(server.latency(server.rng), 0.0)
+        time.sleep(delay)
+
+        settings = server.settings
+        if draw < settings.rate_limit_rate:
+            with server.stats_lock:
+                server.stats.rate_limited += 1
+            self._send_json(
+                HTTPStatus.TOO_MANY_REQUESTS,
+                {"error": {"message": "Rate limit reached", "type": "rate_limit"}},
+                {"Retry-After": "1"},
+            )
+            return
+        if draw < settings.rate_limit_rate + settings.error_rate:
+            with server.stats_lock:
+                server.stats.errors += 1
+            self._send_json(
+                HTTPStatus.INTERNAL_SERVER_ERROR,
+                {"error": {"message": "Injected failure", "type": "server_error"}},
+            )
+            return
+
+        try:
+            request = json.loads(body)
+        except json.JSONDecodeError:
+            self._send_json(
+                HTTPStatus.BAD_REQUEST, {"error": {"message": "Invalid JSON"}}
+            )
+            return
+        kind, payload = completion_body(
+            request.get("model", "mock"), request.get("messages") or []
+        )
+        with server.stats_lock:
+            server.stats.by_kind[kind] = server.stats.by_kind.get(kind, 0) + 1
+        self._send_json(HTTPStatus.OK, payload)
+
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], settings: MockSettings):
+        super().__init__(address, MockOpenAIHandler)
+        self.settings = settings
+        self.latency = parse_latency(settings.latency)
+        self.rng = random.Random(settings.seed)
+        self.stats = MockStats()
+        self.stats_lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+def start_mock_server(
+    settings: MockSettings | None = None, host: str = "127.0.0.1", port: int = 0
+) -> MockOpenAIServer:
+    """Start the mock server on a background thread; ``port=0`` picks a free port."""
+    server = MockOpenAIServer((host, port), settings or MockSettings())
+    threading.Thread(
+        target=server.serve_forever, name="extractly-mock-openai", daemon=True
+    ).start()
+    return server
@@ -7,6 +7,7 @@ from PIL import Image
 
 from src.config import load_config
 from src.integrations.openai_client import get_chat_completion
+from src.pipeline.budget import PAGE_BREAK
 
 
 DEFAULT_OCR_PROMPT = """
@@ -42,4 +43,5 @@ def run_ocr(images: list[Image.Image]) -> str:
         ]
         chunks.append(get_chat_completion(messages, model=config.ocr_model))
 
-    return "\n".join(chunk.strip() for chunk in chunks if chunk)
+    # Form feeds between pages let compact_text spot running headers/footers.
+    return f"\n{PAGE_BREAK}\n".join(chunk.strip() for chunk in chunks if chunk)
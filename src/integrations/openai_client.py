@@ -1,22 +1,93 @@
 from __future__ import annotations
 
+import threading
 import time
+from dataclasses import asdict, dataclass
 from typing import Any
 
 from openai import OpenAI
+from openai.types.chat import ChatCompletion
 
-from src.config import load_config
+from src.config import AppConfig, load_config
+from src.integrations.cassette import CassetteMissError, get_cassette
 from src.logging import get_logger
+from src.metrics import (
+    LLM_ERRORS,
+    LLM_IN_FLIGHT,
+    LLM_REQUEST_SECONDS,
+    LLM_REQUESTS,
+    LLM_RETRIES,
+    LLM_TOKENS,
+)
+from src.tracing import current_span, message_payload_bytes, record_llm_call
 
 
 logger = get_logger(__name__)
 
 
+@dataclass
+class ModelUsage:
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+
+
+_usage_lock = threading.Lock()
+_usage_by_model: dict[str, ModelUsage] = {}
+
+
+def _record_usage(model: str, usage: Any) -> None:
+    with _usage_lock:
+        totals = _usage_by_model.setdefault(model, ModelUsage())
+        totals.calls += 1
+        if usage is not None:
+            totals.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+            totals.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+            details = getattr(usage, "prompt_tokens_details", None)
+            totals.cached_tokens += getattr(details, "cached_tokens", 0) or 0
+
+
+def _record_metrics(model: str, usage: Any) -> None:
+    LLM_REQUESTS.inc(model=model, outcome="success")
+    if usage is None:
+        return
+    LLM_TOKENS.inc(getattr(usage, "prompt_tokens", 0) or 0, model=model, kind="prompt")
+    LLM_TOKENS.inc(
+        getattr(usage, "completion_tokens", 0) or 0, model=model, kind="completion"
+    )
+    details = getattr(usage, "prompt_tokens_details", None)
+    LLM_TOKENS.inc(
+        getattr(details, "cached_tokens", 0) or 0, model=model, kind="cached"
+    )
+
+
+def usage_snapshot() -> dict[str, dict[str, int]]:
+    with _usage_lock:
+        return {model: asdict(totals) for model, totals in _usage_by_model.items()}
+
+
 def _is_reasoning_model(model: str) -> bool:
     name = model.lower().strip()
     return name.startswith(("o1", "o3", "o4", "gpt-5"))
 
 
+LLM_BACKENDS = {"live", "record", "replay"}
+
+
+def _create_completion(
+    client: OpenAI | None, config: AppConfig, request: dict[str, Any]
+) -> ChatCompletion:
+    if config.llm_backend == "replay":
+        body = get_cassette(config.cassette_path).replay(request)
+        return ChatCompletion.model_validate_json(body)
+    if config.llm_backend == "record":
+        raw = client.chat.completions.with_raw_response.create(**request)
+        get_cassette(config.cassette_path).record(request, raw.text)
+        return raw.parse()
+    return client.chat.completions.create(**request)
+
+
 def get_chat_completion(
     messages: list[dict[str, Any]],
     *,
@@ -24,32 +95,59 @@ def get_chat_completion(
     temperature: float = 0.0,
 ) -> str:
     config = load_config()
-    if not config.openai_api_key:
-        raise RuntimeError("OPENAI_API_KEY is missing.")
-
-    client = OpenAI(api_key=config.openai_api_key)
+    if config.llm_backend not in LLM_BACKENDS:
+        raise RuntimeError(
+            f"Unknown EXTRACTLY_LLM_BACKEND '{config.llm_backend}'. "
+            f"Use one of {sorted(LLM_BACKENDS)}."
+        )
+    client = None
+    if config.llm_backend != "replay":
+        if not config.openai_api_key:
+            raise RuntimeError("OPENAI_API_KEY is missing.")
+        client = OpenAI(api_key=config.openai_api_key, base_url=config.openai_base_url)
     attempts = config.max_retries + 1
     if not _is_reasoning_model(model):
         temperature = 0.0
+    payload_bytes = message_payload_bytes(messages) if current_span() else 0
 
-    for attempt in range(attempts):
-        try:
-            response = client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=temperature,
-                timeout=config.request_timeout_s,
-            )
-            return response.choices[0].message.content or ""
-        except Exception as exc:
-            logger.warning(
-                "OpenAI request failed (attempt %s/%s): %s",
-                attempt + 1,
-                attempts,
-                exc,
-            )
-            if attempt >= config.max_retries:
-                raise
-            time.sleep(config.retry_backoff_s * (attempt + 1))
+    started = time.perf_counter()
+    LLM_IN_FLIGHT.inc(model=model)
+    try:
+        for attempt in range(attempts):
+            try:
+                response = _create_completion(
+                    client,
+                    config,
+                    {
+                        "model": model,
+                        "messages": messages,
+                        "temperature": temperature,
+                        "timeout": config.request_timeout_s,
+                    },
+                )
+                usage = getattr(response, "usage", None)
+                _record_usage(model, usage)
+                _record_metrics(model, usage)
+                record_llm_call(
+                    attempts=attempt + 1, usage=usage, payload_bytes=payload_bytes
+                )
+                return response.choices[0].message.content or ""
+            except Exception as exc:
+                logger.warning(
+                    "OpenAI request failed (attempt %s/%s): %s",
+                    attempt + 1,
+                    attempts,
+                    exc,
+                )
+                LLM_ERRORS.inc(model=model, error_type=type(exc).__name__)
+                if attempt >= config.max_retries or isinstance(exc, CassetteMissError):
+                    LLM_REQUESTS.inc(model=model, outcome="error")
+                    record_llm_call(attempts=attempt + 1, payload_bytes=payload_bytes)
+                    raise
+                LLM_RETRIES.inc(model=model)
+                time.sleep(config.retry_backoff_s * (attempt + 1))
+    finally:
+        LLM_IN_FLIGHT.dec(model=model)
+        LLM_REQUEST_SECONDS.observe(time.perf_counter() - started, model=model)
 
     return ""
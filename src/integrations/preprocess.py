@@ -1,9 +1,60 @@
 from __future__ import annotations
 
+import email
+import html
 import io
+import re
+import time
+from email import policy
+from pathlib import Path
+from typing import Any
+
 from pdf2image import convert_from_bytes
 from PIL import Image
 
+from src.metrics import PREPROCESS_PAGES, PREPROCESS_SECONDS
+
+
+TEXT_EXTENSIONS = {".txt", ".md", ".csv", ".eml"}
+SUPPORTED_EXTENSIONS = {".pdf", ".png", ".jpg", ".jpeg"} | TEXT_EXTENSIONS
+EMAIL_HEADERS = ("From", "To", "Cc", "Date", "Subject")
+HTML_TAG = re.compile(r"<(script|style)\b.*?</\1>|<[^>]+>", re.S | re.I)
+
+
+def is_text_document(filename: str) -> bool:
+    return Path(filename).suffix.lower() in TEXT_EXTENSIONS
+
+
+def _html_to_text(markup: str) -> str:
+    text = HTML_TAG.sub(" ", markup)
+    return re.sub(r"[ \t]+", " ", html.unescape(text))
+
+
+def _email_text(data: bytes) -> str:
+    message = email.message_from_bytes(data, policy=policy.default)
+    lines = [f"{name}: {message[name]}" for name in EMAIL_HEADERS if message[name]]
+    body = message.get_body(preferencelist=("plain", "html"))
+    if body is not None:
+        content = body.get_content()
+        if body.get_content_subtype() == "html":
+            content = _html_to_text(content)
+        lines.extend(("", content.strip()))
+    attachments = [
+        part.get_filename()
+        for part in message.iter_attachments()
+        if part.get_filename()
+    ]
+    if attachments:
+        lines.extend(("", f"Attachments: {', '.join(attachments)}"))
+    return "\n".join(lines)
+
+
+def read_text_document(data: bytes, filename: str) -> str:
+    """Decode a text-native upload; ``.eml`` keeps key headers and the body."""
+    if filename.lower().endswith(".eml"):
+        return _email_text(data)
+    return data.decode("utf-8-sig", errors="ignore")
+
 
 def preprocess(uploaded, filename: str) -> list[Image.Image]:
     data = uploaded.read()
@@ -12,3 +63,29 @@ def preprocess(uploaded, filename: str) -> list[Image.Image]:
     if filename.lower().endswith(".pdf"):
         return convert_from_bytes(data)
     return [Image.open(io.BytesIO(data))]
+
+
+def load_document(uploaded, filename: str) -> dict[str, Any]:
+    started = time.perf_counter()
+    if is_text_document(filename):
+        content = read_text_document(uploaded.read(), filename)
+        uploaded.seek(0)
+        # Text-native documents carry no page images, so no image content is
+        # sent to the model for them.
+        document = {"name": filename, "images": [], "ocr_text": content}
+    else:
+        document = {"name": filename, "images": preprocess(uploaded, filename)}
+    duration_s = time.perf_counter() - started
+    payload_bytes = uploaded.seek(0, io.SEEK_END)
+    uploaded.seek(0)
+    document["preprocess"] = {
+        "duration_s": duration_s,
+        "payload_bytes": payload_bytes,
+    }
+    if "ocr_text" in document:
+        kind = "text"
+    else:
+        kind = "pdf" if filename.lower().endswith(".pdf") else "image"
+    PREPROCESS_SECONDS.observe(duration_s, kind=kind)
+    PREPROCESS_PAGES.inc(len(document["images"]), kind=kind)
+    return document
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import shutil
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Callable
+from uuid import uuid4
+
+from src.jobs.queue import DEFAULT_QUEUE, JobQueue, spool_path
+from src.jobs.worker import build_job_payload
+from src.logging import get_logger
+from src.pipeline.runner import PipelineOptions
+
+
+logger = get_logger(__name__)
+
+PROCESSED_DIRNAME = "processed"
+
+
+def _move_to_processed(path: Path, processed_dir: Path) -> Path:
+    processed_dir.mkdir(parents=True, exist_ok=True)
+    target = processed_dir / path.name
+    if target.exists():
+        target = processed_dir / f"{path.stem}_{uuid4().hex[:6]}{path.suffix}"
+    shutil.move(str(path), target)
+    return target
+
+
+def watch_inbox(
+    inbox_dir: Path,
+    queue: JobQueue,
+    spool_dir: Path,
+    *,
+    queue_name: str = DEFAULT_QUEUE,
+    extensions: set[str],
+    options: PipelineOptions | None = None,
+    doc_type_override: str | None = None,
+    max_attempts: int = 3,
+    settle_s: float = 2.0,
+    poll_interval_s: float = 2.0,
+    should_stop: Callable[[], bool] | None = None,
+) -> None:
+    processed_dir = inbox_dir / PROCESSED_DIRNAME
+    seen_sizes: dict[Path, tuple[int, float]] = {}
+    while should_stop is None or not should_stop():
+        now = time.time()
+        for path in sorted(inbox_dir.iterdir()):
+            if not path.is_file() or path.suffix.lower() not in extensions:
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                # Removed between listing and stat.
+                seen_sizes.pop(path, None)
+                continue
+            previous = seen_sizes.get(path)
+            if previous is None or previous[0] != stat.st_size:
+                seen_sizes[path] = (stat.st_size, now)
+                continue
+            if now - previous[1] < settle_s:
+                continue
+
+            seen_sizes.pop(path, None)
+            try:
+                spooled, sha256 = spool_path(spool_dir, path)
+                # A file dropped again while its job is pending joins that job;
+                # once the job has finished, dropping it again reprocesses it.
+                job = enqueue_document(
+                    queue,
+                    spooled,
+                    path.name,
+                    queue_name=queue_name,
+                    options=options,
+                    doc_type_override=doc_type_override,
+                    max_attempts=max_attempts,
+                    idempotency_key=f"inbox:{queue_name}:{sha256}",
+                    sha256=sha256,
+                    active_only=True,
+                )
+                if not queue.path_in_use(spooled):
+                    spooled.unlink(missing_ok=True)
+                _move_to_processed(path, processed_dir)
+            except (OSError, sqlite3.Error) as exc:
+                # Left in place and retried on a later scan if it still exists.
+                logger.warning("Could not queue %s from inbox: %s", path.name, exc)
+                continue
+            logger.info("Queued %s from inbox as job %s", path.name, job.id)
+        time.sleep(poll_interval_s)
+
+
+def enqueue_document(
+    queue: JobQueue,
+    spooled: Path,
+    filename: str,
+    *,
+    queue_name: str = DEFAULT_QUEUE,
+    options: PipelineOptions | None = None,
+    doc_type_override: str | None = None,
+    schema_name: str | None = None,
+    max_attempts: int = 3,
+    idempotency_key: str | None = None,
+    sha256: str | None = None,
+    active_only: bool = False,
+) -> Any:
+    payload = build_job_payload(
+        spooled,
+        filename,
+        doc_type_override=doc_type_override,
+        options=options,
+        schema_name=schema_name,
+        sha256=sha256,
+    )
+    return queue.enqueue(
+        payload,
+        queue=queue_name,
+        max_attempts=max_attempts,
+        idempotency_key=idempotency_key,
+        active_only=active_only,
+    )
@@ -0,0 +1,423 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator
+from uuid import uuid4
+
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    queue TEXT NOT NULL,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_expires_at REAL,
+    leased_by TEXT,
+    idempotency_key TEXT UNIQUE,
+    result TEXT,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs (status, available_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs (queue, status);
+CREATE TABLE IF NOT EXISTS queues (
+    name TEXT PRIMARY KEY,
+    max_concurrency INTEGER
+);
+"""
+
+STATUS_QUEUED = "queued"
+STATUS_LEASED = "leased"
+STATUS_DONE = "done"
+STATUS_DEAD = "dead"
+STATUS_CANCELLED = "cancelled"
+
+DEFAULT_QUEUE = "default"
+SPOOL_CHUNK_BYTES = 1024 * 1024
+
+
+@dataclass
+class Job:
+    id: str
+    queue: str
+    status: str
+    payload: dict[str, Any]
+    attempts: int
+    max_attempts: int
+    available_at: float
+    lease_expires_at: float | None
+    leased_by: str | None
+    idempotency_key: str | None
+    result: dict[str, Any] | None
+    last_error: str | None
+    created_at: float
+    updated_at: float
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> Job:
+        return cls(
+            id=row["id"],
+            queue=row["queue"],
+            status=row["status"],
+            payload=json.loads(row["payload"]),
+            attempts=row["attempts"],
+            max_attempts=row["max_attempts"],
+            available_at=row["available_at"],
+            lease_expires_at=row["lease_expires_at"],
+            leased_by=row["leased_by"],
+            idempotency_key=row["idempotency_key"],
+            result=json.loads(row["result"]) if row["result"] else None,
+            last_error=row["last_error"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+        )
+
+
+def spool_file(
+    spool_dir: Path,
+    source: BinaryIO,
+    filename: str,
+    *,
+    max_bytes: int | None = None,
+) -> tuple[Path, str]:
+    spool_dir.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_name = tempfile.mkstemp(dir=spool_dir, prefix=".upload.")
+    try:
+        with os.fdopen(fd, "wb") as fp:
+            while chunk := source.read(SPOOL_CHUNK_BYTES):
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise ValueError(f"File exceeds the {max_bytes} byte limit.")
+                digest.update(chunk)
+                fp.write(chunk)
+        sha256 = digest.hexdigest()
+        target = spool_dir / f"{sha256}{Path(filename).suffix.lower()}"
+        if target.exists():
+            Path(tmp_name).unlink(missing_ok=True)
+        else:
+            os.replace(tmp_name, target)
+        return target, sha256
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def spool_path(spool_dir: Path, path: Path) -> tuple[Path, str]:
+    with path.open("rb") as fp:
+        return spool_file(spool_dir, fp, path.name)
+
+
+class JobQueue:
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(sqlite3.connect(self.db_path, timeout=30)) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA_SQL)
+
+    @contextmanager
+    def _connect(self, *, immediate: bool = False) -> Iterator[sqlite3.Connection]:
+        with closing(
+            sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        ) as conn:
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def enqueue(
+        self,
+        payload: dict[str, Any],
+        *,
+        queue: str = DEFAULT_QUEUE,
+        max_attempts: int = 3,
+        idempotency_key: str | None = None,
+        delay_s: float = 0.0,
+        active_only: bool = False,
+    ) -> Job:
+        """Add a job, or return the job that already holds ``idempotency_key``.
+
+        With ``active_only`` only a queued or leased job deduplicates; a
+        finished one gives up the key and a new job is created.
+        """
+        now = time.time()
+        job_id = uuid4().hex
+        with self._connect(immediate=True) as conn:
+            if idempotency_key is not None:
+                existing = conn.execute(
+                    "SELECT * FROM jobs WHERE idempotency_key = ?", (idempotency_key,)
+                ).fetchone()
+                if existing is not None:
+                    if not active_only or existing["status"] in (
+                        STATUS_QUEUED,
+                        STATUS_LEASED,
+                    ):
+                        return Job.from_row(existing)
+                    conn.execute(
+                        "UPDATE jobs SET idempotency_key = NULL WHERE id = ?",
+                        (existing["id"],),
+                    )
+            conn.execute(
+                """
+                INSERT INTO jobs (
+                    id, queue, status, payload, attempts, max_attempts,
+                    available_at, idempotency_key, created_at, updated_at
+                )
+                VALUES (?, ?, ?, ?, 0, ?, ?, ?, ?, ?)
+                """,
+                (
+                    job_id,
+                    queue,
+                    STATUS_QUEUED,
+                    json.dumps(payload, ensure_ascii=False),
+                    max(1, max_attempts),
+                    now + delay_s,
+                    idempotency_key,
+                    now,
+                    now,
+                ),
+            )
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.from_row(row)
+
+    def lease(
+        self,
+        worker_id: str,
+        *,
+        queues: list[str] | None = None,
+        visibility_timeout_s: float = 300.0,
+    ) -> Job | None:
+        now = time.time()
+        queue_filter = ""
+        params: list[Any] = [STATUS_QUEUED, now, STATUS_LEASED, now]
+        if queues:
+            queue_filter = f"AND j.queue IN ({', '.join('?' for _ in queues)})"
+            params.extend(queues)
+        params.extend([STATUS_LEASED, now])
+        with self._connect(immediate=True) as conn:
+            while True:
+                row = conn.execute(
+                    f"""
+                    SELECT j.* FROM jobs j
+                    LEFT JOIN queues q ON q.name = j.queue
+                    WHERE (
+                        (j.status = ? AND j.available_at <= ?)
+                        OR (j.status = ? AND j.lease_expires_at <= ?)
+                    )
+                    {queue_filter}
+                    AND (
+                        q.max_concurrency IS NULL
+                        OR (
+                            SELECT COUNT(*) FROM jobs x
+                            WHERE x.queue = j.queue AND x.status = ?
+                            AND x.lease_expires_at > ?
+                        ) < q.max_concurrency
+                    )
+                    ORDER BY j.available_at
+                    LIMIT 1
+                    """,
+                    params,
+                ).fetchone()
+                if row is None:
+                    return None
+                if row["attempts"] >= row["max_attempts"]:
+                    conn.execute(
+                        """
+                        UPDATE jobs SET status = ?, leased_by = NULL,
+                            lease_expires_at = NULL,
+                            last_error = COALESCE(last_error, 'Lease expired'),
+                            updated_at = ?
+                        WHERE id = ?
+                        """,
+                        (STATUS_DEAD, now, row["id"]),
+                    )
+                    continue
+                conn.execute(
+                    """
+                    UPDATE jobs SET status = ?, attempts = attempts + 1,
+                        leased_by = ?, lease_expires_at = ?, updated_at = ?
+                    WHERE id = ?
+                    """,
+                    (
+                        STATUS_LEASED,
+                        worker_id,
+                        now + visibility_timeout_s,
+                        now,
+                        row["id"],
+                    ),
+                )
+                leased = conn.execute(
+                    "SELECT * FROM jobs WHERE id = ?", (row["id"],)
+                ).fetchone()
+                return Job.from_row(leased)
+
+    def heartbeat(
+        self, job_id: str, worker_id: str, *, visibility_timeout_s: float = 300.0
+    ) -> bool:
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE jobs SET lease_expires_at = ?, updated_at = ?
+                WHERE id = ? AND status = ? AND leased_by = ?
+                """,
+                (now + visibility_timeout_s, now, job_id, STATUS_LEASED, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, result: dict[str, Any]) -> bool:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE jobs SET status = ?, result = ?, leased_by = NULL,
+                    lease_expires_at = NULL, last_error = NULL, updated_at = ?
+                WHERE id = ? AND status = ? AND leased_by = ?
+                """,
+                (
+                    STATUS_DONE,
+                    json.dumps(result, ensure_ascii=False),
+                    time.time(),
+                    job_id,
+                    STATUS_LEASED,
+                    worker_id,
+                ),
+            )
+            return cursor.rowcount == 1
+
+    def fail(
+        self,
+        job_id: str,
+        worker_id: str,
+        error: str,
+        *,
+        retry_backoff_s: float = 10.0,
+    ) -> str | None:
+        now = time.time()
+        with self._connect(immediate=True) as conn:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE id = ? AND status = ? AND leased_by = ?",
+                (job_id, STATUS_LEASED, worker_id),
+            ).fetchone()
+            if row is None:
+                return None
+            if row["attempts"] >= row["max_attempts"]:
+                status, available_at = STATUS_DEAD, row["available_at"]
+            else:
+                status = STATUS_QUEUED
+                available_at = now + retry_backoff_s * 2 ** (row["attempts"] - 1)
+            conn.execute(
+                """
+                UPDATE jobs SET status = ?, available_at = ?, leased_by = NULL,
+                    lease_expires_at = NULL, last_error = ?, updated_at = ?
+                WHERE id = ?
+                """,
+                (status, available_at, error, now, job_id),
+            )
+        return status
+
+    def cancel(self, job_id: str) -> bool:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (STATUS_CANCELLED, time.time(), job_id, STATUS_QUEUED),
+            )
+            return cursor.rowcount == 1
+
+    def requeue_dead(self, job_id: str) -> bool:
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE jobs SET status = ?, attempts = 0, available_at = ?,
+                    updated_at = ?
+                WHERE id = ? AND status = ?
+                """,
+                (STATUS_QUEUED, now, now, job_id, STATUS_DEAD),
+            )
+            return cursor.rowcount == 1
+
+    def path_in_use(self, path: Path, *, exclude: str | None = None) -> bool:
+        """Whether a queued or leased job, other than ``exclude``, reads ``path``."""
+        with self._connect() as conn:
+            row = conn.execute(
+                """
+                SELECT 1 FROM jobs
+                WHERE json_extract(payload, '$.path') = ? AND status IN (?, ?)
+                    AND id != ?
+                LIMIT 1
+                """,
+                (str(path), STATUS_QUEUED, STATUS_LEASED, exclude or ""),
+            ).fetchone()
+        return row is not None
+
+    def get(self, job_id: str) -> Job | None:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.from_row(row) if row else None
+
+    def list_jobs(
+        self,
+        *,
+        queue: str | None = None,
+        status: str | None = None,
+        limit: int = 100,
+    ) -> list[Job]:
+        clauses: list[str] = []
+        params: list[Any] = []
+        if queue is not None:
+            clauses.append("queue = ?")
+            params.append(queue)
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(limit)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM jobs {where} ORDER BY created_at DESC LIMIT ?", params
+            ).fetchall()
+        return [Job.from_row(row) for row in rows]
+
+    def counts(self) -> dict[str, dict[str, int]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT queue, status, COUNT(*) AS total FROM jobs GROUP BY queue, status"
+            ).fetchall()
+        counts: dict[str, dict[str, int]] = {}
+        for row in rows:
+            counts.setdefault(row["queue"], {})[row["status"]] = row["total"]
+        return counts
+
+    def set_queue_limit(self, queue: str, max_concurrency: int | None) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO queues (name, max_concurrency) VALUES (?, ?)
+                ON CONFLICT (name) DO UPDATE SET max_concurrency = excluded.max_concurrency
+                """,
+                (queue, max_concurrency),
+            )
+
+    def queue_limits(self) -> dict[str, int | None]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT name, max_concurrency FROM queues").fetchall()
+        return {row["name"]: row["max_concurrency"] for row in rows}
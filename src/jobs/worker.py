@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+from dataclasses import fields
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from src.config import load_config
+from src.domain.run_store import RUN_TIMESTAMP_FORMAT, RunStore
+from src.domain.schema_store import SchemaStore
+from src.integrations.preprocess import load_document
+from src.jobs.queue import STATUS_DEAD, Job, JobQueue
+from src.logging import get_logger, setup_logging
+from src.metrics import start_textfile_exporter
+from src.pipeline.runner import PipelineOptions, run_pipeline
+from src.profiling import profiled, start_profiler
+
+
+logger = get_logger(__name__)
+
+OPTION_FIELDS = {option.name for option in fields(PipelineOptions)}
+
+
+def build_job_payload(
+    path: Path,
+    filename: str,
+    *,
+    doc_type_override: str | None = None,
+    options: PipelineOptions | None = None,
+    schema_name: str | None = None,
+    sha256: str | None = None,
+) -> dict[str, Any]:
+    options = options or PipelineOptions()
+    return {
+        "path": str(path),
+        "filename": filename,
+        "sha256": sha256,
+        "doc_type_override": doc_type_override,
+        "schema_name": schema_name,
+        "options": {
+            name: getattr(options, name)
+            for name in OPTION_FIELDS
+            if name != "max_workers"
+        },
+    }
+
+
+def job_run_id(job: Job) -> str:
+    """Run id shared by every attempt of a job, so retries overwrite one run."""
+    created = datetime.fromtimestamp(job.created_at, timezone.utc)
+    return f"run_{created.strftime(RUN_TIMESTAMP_FORMAT)}_{job.id[:6]}"
+
+
+def release_spool(queue: JobQueue, job: Job) -> None:
+    """Delete a finished job's spooled upload unless a pending job shares it."""
+    path = Path(job.payload["path"])
+    if not queue.path_in_use(path, exclude=job.id):
+        path.unlink(missing_ok=True)
+
+
+def process_job(job: Job) -> dict[str, Any]:
+    config = load_config()
+    schema_store = SchemaStore(config.prebuilt_schemas_path, config.custom_schemas_path)
+    run_store = RunStore(config.run_store_dir, run_format=config.run_format)
+
+    payload = job.payload
+    path = Path(payload["path"])
+    profiler = start_profiler(config)
+    try:
+        with path.open("rb") as fp, profiled(profiler):
+            document = load_document(fp, payload.get("filename") or path.name)
+    except Exception:
+        if profiler is not None:
+            profiler.stop()
+        raise
+    doc_type_override = payload.get("doc_type_override")
+    if doc_type_override:
+        document["doc_type_override"] = doc_type_override
+
+    schema_map = {schema.name: schema for schema in schema_store.list_schemas()}
+    options = PipelineOptions(
+        **{
+            name: value
+            for name, value in (payload.get("options") or {}).items()
+            if name in OPTION_FIELDS
+        }
+    )
+    run = run_pipeline(
+        files=[document],
+        default_schema=schema_map.get(doc_type_override) if doc_type_override else None,
+        schema_map=schema_map,
+        candidates=list(schema_map) + ["Unknown", "Other"],
+        run_store=run_store,
+        options=options,
+        schema_name=payload.get("schema_name") or f"Queue: {job.queue}",
+        run_id=job_run_id(job),
+        profiler=profiler,
+    )
+    errors = [error for doc in run.documents for error in doc.errors]
+    if errors:
+        raise RuntimeError("; ".join(errors))
+    return {"run_id": run.run_id}
+
+
+def _heartbeat(
+    queue: JobQueue,
+    job: Job,
+    worker_id: str,
+    visibility_timeout_s: float,
+    done: threading.Event,
+) -> None:
+    interval = max(visibility_timeout_s / 3, 1.0)
+    while not done.wait(interval):
+        if not queue.heartbeat(
+            job.id, worker_id, visibility_timeout_s=visibility_timeout_s
+        ):
+            logger.warning("Lost lease on job %s", job.id)
+            return
+
+
+def worker_loop(
+    db_path: Path,
+    *,
+    queues: list[str] | None = None,
+    worker_id: str | None = None,
+    visibility_timeout_s: float = 300.0,
+    retry_backoff_s: float = 10.0,
+    poll_interval_s: float = 1.0,
+    stop_event: Any = None,
+    max_jobs: int | None = None,
+) -> int:
+    queue = JobQueue(db_path)
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    processed = 0
+    while stop_event is None or not stop_event.is_set():
+        job = queue.lease(
+            worker_id, queues=queues, visibility_timeout_s=visibility_timeout_s
+        )
+        if job is None:
+            time.sleep(poll_interval_s)
+            continue
+
+        logger.info(
+            "Worker %s leased job %s (attempt %s)", worker_id, job.id, job.attempts
+        )
+        done = threading.Event()
+        heartbeat = threading.Thread(
+            target=_heartbeat,
+            args=(queue, job, worker_id, visibility_timeout_s, done),
+            daemon=True,
+        )
+        heartbeat.start()
+        try:
+            result = process_job(job)
+        except Exception as exc:
+            status = queue.fail(
+                job.id, worker_id, str(exc), retry_backoff_s=retry_backoff_s
+            )
+            logger.error("Job %s failed (%s): %s", job.id, status, exc)
+            if status == STATUS_DEAD:
+                release_spool(queue, job)
+        else:
+            if queue.complete(job.id, worker_id, result):
+                release_spool(queue, job)
+            logger.info("Job %s completed: %s", job.id, result)
+        finally:
+            done.set()
+            heartbeat.join()
+
+        processed += 1
+        if max_jobs is not None and processed >= max_jobs:
+            break
+    return processed
+
+
+def _worker_process(db_path: str, queues: list[str] | None, stop_event: Any) -> None:
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    setup_logging()
+    config = load_config()
+    start_textfile_exporter(config.metrics_dir)
+    worker_loop(
+        Path(db_path),
+        queues=queues,
+        visibility_timeout_s=config.job_visibility_timeout_s,
+        retry_backoff_s=config.job_retry_backoff_s,
+        stop_event=stop_event,
+    )
+
+
+def run_workers(
+    db_path: Path, *, processes: int, queues: list[str] | None = None
+) -> None:
+    context = multiprocessing.get_context("spawn")
+    stop_event = context.Event()
+    workers = [
+        context.Process(
+            target=_worker_process,
+            args=(str(db_path), queues, stop_event),
+            name=f"extractly-worker-{idx}",
+        )
+        for idx in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+
+    def _request_stop(*_: Any) -> None:
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, _request_stop)
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        logger.info("Stopping workers after their current job...")
+        stop_event.set()
+        for worker in workers:
+            worker.join()
@@ -0,0 +1,402 @@
+from __future__ import annotations
+
+import multiprocessing.util
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator
+
+from src.domain.storage import write_bytes_atomic
+from src.logging import get_logger
+
+
+logger = get_logger(__name__)
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+IO_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return f"{{{pairs}}}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric(ABC):
+    kind = "untyped"
+    family_suffix = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    @abstractmethod
+    def samples(
+        self,
+    ) -> Iterator[tuple[str, tuple[str, ...], tuple[str, ...], float]]: ...
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name}{self.family_suffix} {self.documentation}",
+            f"# TYPE {self.name}{self.family_suffix} {self.kind}",
+        ]
+        for suffix, names, values, value in self.samples():
+            labels = _format_labels(names, values)
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+    family_suffix = "_total"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield "_total", self.labelnames, key, value
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    @contextmanager
+    def track_inprogress(self, **labels: str) -> Iterator[None]:
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield "", self.labelnames, key, value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            state[0][index] += 1
+            state[1][0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return sum(state[0]) if state else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted(
+                (key, (list(counts), total[0]))
+                for key, (counts, total) in self._values.items()
+            )
+        bucket_names = (*self.labelnames, "le")
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                yield "_bucket", bucket_names, (*key, _format_value(bound)), cumulative
+            yield "_sum", self.labelnames, key, total
+            yield "_count", self.labelnames, key, cumulative
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+        self._collectors: list[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Metric) -> Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = ()
+    ) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = ()
+    ) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Register a callback that refreshes gauges right before rendering."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            collectors = list(self._collectors)
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        for collector in collectors:
+            try:
+                collector()
+            except Exception as exc:
+                logger.warning("Metrics collector failed: %s", exc)
+        lines: list[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+LLM_REQUEST_SECONDS = REGISTRY.histogram(
+    "extractly_llm_request_seconds",
+    "Latency of chat completion calls, including retries.",
+    ("model",),
+)
+LLM_REQUESTS = REGISTRY.counter(
+    "extractly_llm_requests", "Chat completion calls by outcome.", ("model", "outcome")
+)
+LLM_ERRORS = REGISTRY.counter(
+    "extractly_llm_errors",
+    "Failed chat completion attempts by exception type.",
+    ("model", "error_type"),
+)
+LLM_RETRIES = REGISTRY.counter(
+    "extractly_llm_retries", "Chat completion attempts that were retried.", ("model",)
+)
+LLM_TOKENS = REGISTRY.counter(
+    "extractly_llm_tokens", "Tokens reported by the API.", ("model", "kind")
+)
+LLM_IN_FLIGHT = REGISTRY.gauge(
+    "extractly_llm_requests_in_flight", "Chat completion calls in progress.", ("model",)
+)
+PREPROCESS_SECONDS = REGISTRY.histogram(
+    "extractly_preprocess_seconds",
+    "Time spent rendering uploads into page images.",
+    ("kind",),
+)
+PREPROCESS_PAGES = REGISTRY.counter(
+    "extractly_preprocess_pages", "Pages rendered by preprocessing.", ("kind",)
+)
+PIPELINE_DOCS_IN_FLIGHT = REGISTRY.gauge(
+    "extractly_pipeline_documents_in_flight", "Documents currently being processed."
+)
+PIPELINE_DOCS_PENDING = REGISTRY.gauge(
+    "extractly_pipeline_documents_pending",
+    "Documents of running pipelines waiting for a worker.",
+)
+PIPELINE_DOCUMENTS = REGISTRY.counter(
+    "extractly_pipeline_documents", "Processed documents by outcome.", ("outcome",)
+)
+PIPELINE_DOCUMENT_SECONDS = REGISTRY.histogram(
+    "extractly_pipeline_document_seconds", "End-to-end time per document."
+)
+PRECLASSIFIER_DECISIONS = REGISTRY.counter(
+    "extractly_preclassifier_decisions",
+    "Pre-classifier outcomes; 'accepted' documents skipped LLM classification.",
+    ("outcome",),
+)
+FINGERPRINT_LOOKUPS = REGISTRY.counter(
+    "extractly_fingerprint_lookups",
+    "Layout-fingerprint lookups by outcome (hit, miss, ambiguous).",
+    ("outcome",),
+)
+SPECULATIVE_EXTRACTIONS = REGISTRY.counter(
+    "extractly_speculative_extractions",
+    "Speculative extractions by source and outcome (hit, miss, error).",
+    ("source", "outcome"),
+)
+SPECULATIVE_WASTED_CALLS = REGISTRY.counter(
+    "extractly_speculative_wasted_calls",
+    "LLM calls made by speculative extractions that were discarded.",
+)
+PIPELINE_RUNS = REGISTRY.counter(
+    "extractly_pipeline_runs", "Pipeline runs by final status.", ("status",)
+)
+RUN_STORE_SECONDS = REGISTRY.histogram(
+    "extractly_run_store_seconds",
+    "RunStore I/O latency by operation.",
+    ("operation",),
+    buckets=IO_BUCKETS,
+)
+RUN_STORE_BYTES = REGISTRY.counter(
+    "extractly_run_store_bytes", "Bytes written or read by RunStore.", ("operation",)
+)
+JOB_QUEUE_DEPTH = REGISTRY.gauge(
+    "extractly_job_queue_depth", "Jobs in the SQLite queue.", ("queue", "status")
+)
+
+
+def register_queue_depth(db_path: Path) -> None:
+    # Imported here so the pipeline modules that record metrics do not pull
+    # in the job queue.
+    from src.jobs.queue import JobQueue
+
+    queue = JobQueue(db_path)
+
+    def _collect() -> None:
+        JOB_QUEUE_DEPTH.clear()
+        for queue_name, statuses in queue.counts().items():
+            for status, total in statuses.items():
+                JOB_QUEUE_DEPTH.set(total, queue=queue_name, status=status)
+
+    REGISTRY.add_collector(_collect)
+
+
+def write_textfile(path: Path) -> None:
+    write_bytes_atomic(path, REGISTRY.render().encode("utf-8"))
+
+
+_exporter_started = False
+_exporter_lock = threading.Lock()
+
+
+def _remove_stale_textfiles(directory: Path) -> None:
+    """Delete textfiles left by processes that died without cleaning up."""
+    for path in directory.glob("extractly_*.prom"):
+        pid = path.stem.removeprefix("extractly_")
+        if not pid.isdigit() or int(pid) == os.getpid():
+            continue
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            path.unlink(missing_ok=True)
+        except OSError:
+            # Alive but owned by another user.
+            continue
+
+
+def start_textfile_exporter(directory: Path | None, interval_s: float = 15.0) -> None:
+    """Periodically write this process' metrics as ``<directory>/extractly_<pid>.prom``.
+
+    The files follow the Prometheus textfile-collector convention. A process
+    removes its file when it exits, and files of dead processes are removed on
+    start, so restarts leave no stale counters. Calling this more than once per
+    process is a no-op.
+    """
+    global _exporter_started
+    if directory is None:
+        return
+    with _exporter_lock:
+        if _exporter_started:
+            return
+        _exporter_started = True
+    directory.mkdir(parents=True, exist_ok=True)
+    _remove_stale_textfiles(directory)
+    path = directory / f"extractly_{os.getpid()}.prom"
+    stopped = threading.Event()
+    write_lock = threading.Lock()
+
+    def _remove() -> None:
+        with write_lock:
+            stopped.set()
+            path.unlink(missing_ok=True)
+
+    # Runs at interpreter exit in the main process and in multiprocessing
+    # children, where atexit handlers are skipped.
+    multiprocessing.util.Finalize(None, _remove, exitpriority=10)
+
+    def _loop() -> None:
+        while not stopped.is_set():
+            try:
+                with write_lock:
+                    if not stopped.is_set():
+                        write_textfile(path)
+            except OSError as exc:
+                logger.warning("Could not write metrics to %s: %s", path, exc)
+            time.sleep(interval_s)
+
+    threading.Thread(target=_loop, name="extractly-metrics", daemon=True).start()
@@ -0,0 +1,211 @@
+"""
+Fit document text into per-stage token budgets.
+
+Text is first compacted (whitespace, repeated headers/footers and other
+boilerplate lines) and, if it still does not fit, split into chunks that are
+ranked by overlap with the stage keywords (schema field names for extraction,
+candidate labels for classification). The best chunks are kept in document
+order until the budget is spent.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+CHARS_PER_TOKEN = 4
+PAGE_BREAK = "\f"
+CHUNK_TOKENS = 200
+OMISSION_MARKER = "[…]"
+MIN_REPEATS = 3
+REPEATED_LINE_MAX_CHARS = 120
+WORD = re.compile(r"[a-z0-9]+")
+DIGITS = re.compile(r"\d+")
+STOPWORDS = {"the", "and", "of", "to", "in", "for", "a", "an", "on", "or", "no"}
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    return tiktoken.get_encoding("o200k_base") if tiktoken is not None else None
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count with tiktoken when installed, else a 4-chars-per-token guess."""
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def keywords_from(names: Iterable[str]) -> set[str]:
+    """Split labels like ``invoice_number`` or ``InvoiceDate`` into search words."""
+    words: set[str] = set()
+    for name in names:
+        spaced = re.sub(r"(?<=[a-z])(?=[A-Z])", " ", name or "")
+        words.update(
+            word
+            for word in WORD.findall(spaced.lower())
+            if len(word) > 1 and word not in STOPWORDS
+        )
+    return words
+
+
+def _line_key(line: str, mask_digits: bool) -> str:
+    key = " ".join(line.split()).lower()
+    # Page numbers and dates change between otherwise identical headers.
+    return DIGITS.sub("#", key) if mask_digits else key
+
+
+def compact_text(text: str) -> str:
+    """Normalize whitespace and drop headers, footers and boilerplate repeats.
+
+    Pages are separated by form feeds (as produced by ``run_ocr``). A short line
+    that recurs on at least half of the pages (digits ignored, so page numbers
+    still match) is kept only at its first occurrence. Unpaged text only drops
+    exact short lines repeated ``MIN_REPEATS`` or more times.
+    """
+    pages = [page.splitlines() for page in text.split(PAGE_BREAK)]
+    paged = len(pages) > 1
+    counts: dict[str, int] = {}
+    for lines in pages:
+        keys = [_line_key(line, paged) for line in lines if line.strip()]
+        for key in set(keys) if paged else keys:
+            counts[key] = counts.get(key, 0) + 1
+    threshold = max(2, math.ceil(len(pages) / 2)) if paged else MIN_REPEATS
+    repeated = {
+        key
+        for key, count in counts.items()
+        if count >= threshold and len(key) <= REPEATED_LINE_MAX_CHARS
+    }
+
+    seen: set[str] = set()
+    output: list[str] = []
+    for lines in pages:
+        blank = True
+        for line in lines:
+            line = " ".join(line.split())
+            if not line:
+                if not blank:
+                    output.append("")
+                blank = True
+                continue
+            key = _line_key(line, paged)
+            if key in repeated:
+                if key in seen:
+                    continue
+                seen.add(key)
+            output.append(line)
+            blank = False
+        if output and output[-1]:
+            output.append("")
+    return "\n".join(output).strip()
+
+
+def _chunks(text: str, chunk_tokens: int) -> list[str]:
+    chunks: list[str] = []
+    current: list[str] = []
+    size = 0
+    for paragraph in re.split(r"\n\s*\n", text):
+        for line in paragraph.splitlines() or [""]:
+            tokens = estimate_tokens(line) + 1
+            if current and size + tokens > chunk_tokens:
+                chunks.append("\n".join(current))
+                current, size = [], 0
+            current.append(line)
+            size += tokens
+        if current and size >= chunk_tokens // 2:
+            chunks.append("\n".join(current))
+            current, size = [], 0
+    if current:
+        chunks.append("\n".join(current))
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+def _score(chunk: str, keywords: set[str]) -> int:
+    if not keywords:
+        return 0
+    return sum(1 for word in WORD.findall(chunk.lower()) if word in keywords)
+
+
+@dataclass
+class BudgetedText:
+    text: str
+    original_tokens: int
+    tokens: int
+    chunks_kept: int = 0
+    chunks_total: int = 0
+
+    @property
+    def saved_tokens(self) -> int:
+        return max(self.original_tokens - self.tokens, 0)
+
+
+def fit_text(
+    text: str | None,
+    max_tokens: int | None,
+    *,
+    keywords: set[str] | None = None,
+    compact: bool = True,
+    chunk_tokens: int = CHUNK_TOKENS,
+) -> BudgetedText:
+    """Compact ``text`` and keep its most relevant chunks within ``max_tokens``.
+
+    The first chunk is always kept when it fits, since document titles and
+    issuer details usually live there; the rest are ranked by keyword hits.
+    """
+    text = text or ""
+    original_tokens = estimate_tokens(text)
+    if compact:
+        text = compact_text(text)
+    tokens = estimate_tokens(text)
+    if max_tokens is None or tokens <= max_tokens:
+        return BudgetedText(text, original_tokens, tokens)
+
+    chunks = _chunks(text, chunk_tokens)
+    sizes = [estimate_tokens(chunk) for chunk in chunks]
+    marker_tokens = estimate_tokens(OMISSION_MARKER) + 1
+    ranked = sorted(
+        range(1, len(chunks)),
+        key=lambda idx: (-_score(chunks[idx], keywords or set()), idx),
+    )
+    selected: list[int] = []
+    used = 0
+    for idx in [0, *ranked] if chunks else []:
+        cost = sizes[idx] + marker_tokens
+        if used + cost <= max_tokens:
+            selected.append(idx)
+            used += cost
+    if not selected and chunks:
+        # A single oversized chunk: hard-truncate it rather than send nothing.
+        head = chunks[0][: max_tokens * CHARS_PER_TOKEN]
+        # Dense text (digits, non-Latin scripts) can run over 1 token per 4 chars.
+        while head and estimate_tokens(head) > max_tokens:
+            head = head[: len(head) * max_tokens // estimate_tokens(head)]
+        return BudgetedText(
+            head, original_tokens, estimate_tokens(head), 1, len(chunks)
+        )
+
+    parts: list[str] = []
+    previous = -1
+    for idx in sorted(selected):
+        if idx != previous + 1:
+            parts.append(OMISSION_MARKER)
+        parts.append(chunks[idx])
+        previous = idx
+    if previous != len(chunks) - 1:
+        parts.append(OMISSION_MARKER)
+    fitted = "\n\n".join(parts)
+    return BudgetedText(
+        fitted, original_tokens, estimate_tokens(fitted), len(selected), len(chunks)
+    )
@@ -3,13 +3,14 @@ from __future__ import annotations
 import base64
 import io
 from statistics import StatisticsError, mode
-from typing import Any
+from typing import Any, Callable
 
 from PIL import Image
 
 from src.config import load_config
 from src.integrations.openai_client import get_chat_completion
 from src.logging import get_logger
+from src.pipeline.budget import fit_text, keywords_from
 
 
 logger = get_logger(__name__)
@@ -20,6 +21,7 @@ Choose exactly one label from the provided list based on layout, visual cues, an
 If nothing fits, return "Unknown".
 Return only the label string with no extra words or punctuation.
 """
+CLASSIFY_TEXT_TOKENS = 1000
 
 
 def _image_to_data_uri(image: Image.Image) -> str:
@@ -36,9 +38,16 @@ def classify_document(
     n_votes: int = 3,
     system_prompt: str | None = None,
     text: str | None = None,
+    max_text_tokens: int | None = CLASSIFY_TEXT_TOKENS,
+    on_vote: Callable[[str], None] | None = None,
 ) -> dict[str, Any]:
     config = load_config()
     prompt = system_prompt or DEFAULT_CLASSIFIER_PROMPT
+    text_snippet = text or ""
+    if text_snippet and max_text_tokens is not None:
+        text_snippet = fit_text(
+            text_snippet, max_text_tokens, keywords=keywords_from(candidates)
+        ).text
 
     def _single_vote() -> str:
         content = [
@@ -47,10 +56,7 @@ def classify_document(
                 "text": f"Choose one type from: {candidates}.",
             }
         ]
-        if text:
-            text_snippet = text.strip()
-            if len(text_snippet) > 4000:
-                text_snippet = text_snippet[:4000]
+        if text_snippet:
             content.append({"type": "text", "text": f"Document text:\n{text_snippet}"})
         for image in images or []:
             content.append(
@@ -64,7 +70,11 @@ def classify_document(
             {"role": "system", "content": prompt},
             {"role": "user", "content": content},
         ]
-        return get_chat_completion(messages, model=config.classify_model).strip()
+        vote = get_chat_completion(messages, model=config.classify_model).strip()
+        if on_vote is not None:
+            # Lets callers act on early votes while the remaining ones run.
+            on_vote(vote)
+        return vote
 
     vote_count = max(1, n_votes)
     if vote_count == 1:
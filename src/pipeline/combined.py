@@ -0,0 +1,130 @@
+"""
+Classify a document and extract its fields in a single request.
+
+The request lists every candidate label with a compact version of its schema
+(field names, types, required markers and enum values; no descriptions). The
+model answers with the label, its confidence in that label and the metadata
+for that label's fields, which are validated against the chosen schema. The
+caller decides what to do with an uncertain label or invalid metadata.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from PIL import Image
+
+from src.config import load_config
+from src.domain.models import DocumentSchema, SchemaField
+from src.domain.validation import ValidationResult, validate_metadata
+from src.integrations.openai_client import get_chat_completion
+from src.pipeline.budget import fit_text, keywords_from
+from src.pipeline.extraction import (
+    EXTRACT_TEXT_TOKENS,
+    _image_to_data_uri,
+    _safe_json,
+    field_keywords,
+)
+
+
+DEFAULT_COMBINED_PROMPT = """You classify documents and extract their metadata in one step.
+Choose exactly one label from the provided list based on layout, visual cues, and text.
+Then extract the fields listed for that label only.
+Return JSON only (no markdown, no commentary) with the keys:
+- "doc_type": the chosen label, or "Unknown" if nothing fits.
+- "confidence": your confidence in the label, from 0 to 1.
+- "metadata": an object whose keys exactly match the chosen label's field names.
+Use empty string when a value is missing or unreadable.
+Preserve the document's wording, casing, punctuation, and units.
+Do not infer or fabricate values not present in the document.
+"""
+COMBINED_CONFIDENCE = 0.8
+COMBINED_MAX_FIELDS = 150
+
+
+def _compact_field(field: SchemaField) -> str:
+    required = "*" if field.required else ""
+    enum_hint = f": {'|'.join(field.enum_values)}" if field.enum_values else ""
+    return f"{field.name}{required} ({field.field_type}{enum_hint})"
+
+
+def render_label_fields(schemas: dict[str, DocumentSchema]) -> str:
+    """One line per label, e.g. ``Invoice: number* (string), total (number)``."""
+    return "\n".join(
+        f"{label}: {', '.join(_compact_field(field) for field in schema.fields)}"
+        for label, schema in schemas.items()
+    )
+
+
+def _match_label(label: Any, candidates: list[str]) -> str:
+    normalized = str(label or "").strip().strip("\"'").lower()
+    return next(
+        (candidate for candidate in candidates if candidate.lower() == normalized),
+        "Unknown",
+    )
+
+
+def _as_confidence(value: Any) -> float:
+    try:
+        return min(max(float(value), 0.0), 1.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def classify_and_extract(
+    images: list[Image.Image],
+    schemas: dict[str, DocumentSchema],
+    candidates: list[str],
+    *,
+    text: str | None = None,
+    system_prompt: str | None = None,
+    max_text_tokens: int | None = EXTRACT_TEXT_TOKENS,
+) -> dict[str, Any]:
+    """Return ``doc_type``, ``confidence``, ``metadata`` and ``validation``.
+
+    ``doc_type`` is one of ``candidates`` (``Unknown`` for anything else) and
+    ``metadata`` holds exactly the chosen schema's fields. ``validation`` is
+    ``None`` when the label has no schema. With ``max_text_tokens=None`` the
+    text is sent as given, already budgeted by the caller.
+    """
+    config = load_config()
+    parts = [
+        f"Choose one type from: {candidates}.",
+        "Fields per label (* = required):",
+        render_label_fields(schemas),
+    ]
+    if text:
+        if max_text_tokens is not None:
+            keywords = keywords_from(candidates).union(
+                *(field_keywords(schema.fields) for schema in schemas.values())
+            )
+            text = fit_text(text, max_text_tokens, keywords=keywords).text
+        parts.extend(("OCR text:" if images else "Document text:", text))
+    content = [{"type": "text", "text": "\n".join(parts)}]
+    for image in images or []:
+        content.append(
+            {"type": "image_url", "image_url": {"url": _image_to_data_uri(image)}}
+        )
+    messages = [
+        {"role": "system", "content": system_prompt or DEFAULT_COMBINED_PROMPT},
+        {"role": "user", "content": content},
+    ]
+    payload = _safe_json(get_chat_completion(messages, model=config.extract_model))
+
+    doc_type = _match_label(payload.get("doc_type"), candidates)
+    raw_metadata = payload.get("metadata")
+    raw_metadata = raw_metadata if isinstance(raw_metadata, dict) else {}
+    schema = schemas.get(doc_type)
+    validation: ValidationResult | None = None
+    metadata: dict[str, Any] = {}
+    if schema is not None:
+        validation = validate_metadata(schema, raw_metadata)
+        metadata = {
+            field.name: raw_metadata.get(field.name, "") for field in schema.fields
+        }
+    return {
+        "doc_type": doc_type,
+        "confidence": _as_confidence(payload.get("confidence")),
+        "metadata": metadata,
+        "validation": validation,
+    }
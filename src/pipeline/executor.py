@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import io
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Collection
+
+from src.domain.run_store import RunStore
+from src.integrations.preprocess import load_document
+from src.logging import get_logger
+from src.pipeline.runner import run_pipeline
+from src.profiling import profiled
+
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class BackgroundRun:
+    run_id: str
+    label: str
+    document_count: int
+    submitted_at: float
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+    future: Future | None = None
+
+    @property
+    def is_active(self) -> bool:
+        return self.future is not None and not self.future.done()
+
+
+class RunExecutor:
+    def __init__(self, max_concurrent_runs: int = 2, history_size: int = 50):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, max_concurrent_runs),
+            thread_name_prefix="extractly-run",
+        )
+        self._runs: dict[str, BackgroundRun] = {}
+        self._lock = threading.Lock()
+        self.history_size = history_size
+
+    def submit(
+        self,
+        run_store: RunStore,
+        uploads: list[dict[str, Any]],
+        *,
+        label: str = "",
+        **pipeline_kwargs: Any,
+    ) -> str:
+        run_id = run_store.create_run_id()
+        background_run = BackgroundRun(
+            run_id=run_id,
+            label=label or run_id,
+            document_count=len(uploads),
+            submitted_at=time.time(),
+        )
+        run_store.write_progress(
+            run_id,
+            {
+                "status": "queued",
+                "message": "Waiting for a free executor slot",
+                "total": len(uploads),
+                "done": 0,
+                "started_at": datetime.now(timezone.utc).isoformat(),
+            },
+        )
+        with self._lock:
+            self._runs[run_id] = background_run
+            self._trim_history()
+            background_run.future = self._executor.submit(
+                self._execute,
+                background_run,
+                run_store,
+                uploads,
+                pipeline_kwargs,
+            )
+        return run_id
+
+    def _execute(
+        self,
+        background_run: BackgroundRun,
+        run_store: RunStore,
+        uploads: list[dict[str, Any]],
+        pipeline_kwargs: dict[str, Any],
+    ) -> None:
+        run_id = background_run.run_id
+        cancel_event = background_run.cancel_event
+        total = len(uploads)
+        profiler = pipeline_kwargs.get("profiler")
+        try:
+            files: list[dict[str, Any]] = []
+            for idx, upload in enumerate(uploads, start=1):
+                if cancel_event.is_set():
+                    run_store.write_progress(
+                        run_id,
+                        {
+                            "status": "cancelled",
+                            "message": "Cancelled while parsing",
+                            "total": total,
+                            "done": 0,
+                        },
+                    )
+                    if profiler is not None:
+                        profiler.stop()
+                    return
+                run_store.write_progress(
+                    run_id,
+                    {
+                        "status": "parsing",
+                        "message": f"Parsing {idx}/{total} • {upload['name']}",
+                        "total": total,
+                        "done": 0,
+                    },
+                )
+                with profiled(profiler):
+                    payload = load_document(io.BytesIO(upload["data"]), upload["name"])
+                if upload.get("doc_type_override"):
+                    payload["doc_type_override"] = upload["doc_type_override"]
+                files.append(payload)
+            uploads.clear()
+
+            run_pipeline(
+                files=files,
+                run_store=run_store,
+                run_id=run_id,
+                cancel_event=cancel_event,
+                **pipeline_kwargs,
+            )
+        except Exception as exc:
+            logger.exception("Background run %s failed", run_id)
+            if profiler is not None:
+                profiler.stop()
+            run_store.write_progress(
+                run_id,
+                {
+                    "status": "failed",
+                    "message": "Run failed",
+                    "error": str(exc),
+                    "total": total,
+                    "done": 0,
+                },
+            )
+
+    def cancel(self, run_id: str) -> bool:
+        with self._lock:
+            background_run = self._runs.get(run_id)
+        if background_run is None or not background_run.is_active:
+            return False
+        background_run.cancel_event.set()
+        return True
+
+    def list_runs(self, run_ids: Collection[str] | None = None) -> list[BackgroundRun]:
+        """Tracked runs, newest first; ``run_ids`` limits them to those ids."""
+        with self._lock:
+            runs = [
+                run
+                for run in self._runs.values()
+                if run_ids is None or run.run_id in run_ids
+            ]
+        return sorted(runs, key=lambda run: run.submitted_at, reverse=True)
+
+    def _trim_history(self) -> None:
+        finished = sorted(
+            (run for run in self._runs.values() if not run.is_active),
+            key=lambda run: run.submitted_at,
+        )
+        while len(self._runs) > self.history_size and finished:
+            self._runs.pop(finished.pop(0).run_id, None)
+
+    def shutdown(self) -> None:
+        for background_run in self.list_runs():
+            background_run.cancel_event.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -11,6 +11,7 @@ from PIL import Image
 from src.config import load_config
 from src.domain.models import SchemaField
 from src.integrations.openai_client import get_chat_completion
+from src.pipeline.budget import fit_text, keywords_from
 
 
 DEFAULT_EXTRACTION_PROMPT = """You extract structured metadata from documents.
@@ -21,6 +22,7 @@ Rules:
 - Preserve the document's wording, casing, punctuation, and units.
 - Do not infer or fabricate values not present in the document.
 """
+EXTRACT_TEXT_TOKENS = 6000
 
 
 def _image_to_data_uri(image: Image.Image) -> str:
@@ -42,6 +44,14 @@ def _safe_json(text: str) -> dict[str, Any]:
     return {}
 
 
+def canonicalize(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True, ensure_ascii=False)
+    return str(value)
+
+
 def _render_field(field: SchemaField) -> str:
     required = "required" if field.required else "optional"
     enum_hint = f" enum: {', '.join(field.enum_values)}" if field.enum_values else ""
@@ -49,6 +59,12 @@ def _render_field(field: SchemaField) -> str:
     return f"- {field.name} ({field.field_type}, {required}){enum_hint}{description}"
 
 
+def field_keywords(fields: list[SchemaField]) -> set[str]:
+    return keywords_from(
+        name for field in fields for name in (field.name, field.description)
+    )
+
+
 def extract_metadata(
     images: list[Image.Image],
     fields: list[SchemaField],
@@ -56,6 +72,7 @@ def extract_metadata(
     ocr_text: str | None = None,
     with_confidence: bool = False,
     system_prompt: str | None = None,
+    max_text_tokens: int | None = EXTRACT_TEXT_TOKENS,
 ) -> dict[str, Any]:
     config = load_config()
     prompt = system_prompt or DEFAULT_EXTRACTION_PROMPT
@@ -74,7 +91,11 @@ def extract_metadata(
         field_lines,
     ]
     if ocr_text:
-        parts.extend(("OCR text:", ocr_text))
+        if max_text_tokens is not None:
+            ocr_text = fit_text(
+                ocr_text, max_text_tokens, keywords=field_keywords(fields)
+            ).text
+        parts.extend(("OCR text:" if images else "Document text:", ocr_text))
     content = [{"type": "text", "text": "\n".join(parts)}]
     for image in images or []:
         content.append(
@@ -0,0 +1,325 @@
+"""
+Layout-fingerprint cache that routes documents from known templates.
+
+A fingerprint is a 256-bit difference hash of the first-page preview: the page
+is reduced to a 17x16 grayscale grid and each bit records whether a cell is
+brighter than its right neighbour. Documents rendered from the same template
+(same supplier invoice, same form) typically agree on 98% or more of the bits.
+Mostly-white pages share many bits even across layouts, so the default
+threshold is strict.
+
+Fingerprints of processed documents wait in ``pending`` until their document
+type is confirmed, by a schema override at run time or by saved feedback; only
+confirmed templates answer lookups. When templates of different types match a
+page, the lookup is treated as a miss so the LLM decides.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Collection, Iterator
+
+from PIL import Image, ImageOps
+
+if TYPE_CHECKING:
+    from src.domain.feedback_store import FeedbackStore
+
+
+FINGERPRINT_THRESHOLD = 0.97
+MERGE_SIMILARITY = 0.985
+HASH_SIZE = 16
+FINGERPRINT_BITS = HASH_SIZE * HASH_SIZE
+UNROUTABLE_TYPES = {"Unknown", "Other"}
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS templates (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    fingerprint TEXT NOT NULL,
+    doc_type TEXT NOT NULL,
+    hint TEXT,
+    examples INTEGER NOT NULL DEFAULT 1,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT,
+    last_used_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_templates_last_used ON templates (last_used_at);
+CREATE TABLE IF NOT EXISTS pending (
+    doc_id TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_pending_created ON pending (created_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def layout_hash(image: Image.Image) -> int:
+    gray = ImageOps.autocontrast(image.convert("L"))
+    grid = gray.resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.BOX)
+    pixels = list(grid.getdata())
+    bits = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            left, right = pixels[offset + col], pixels[offset + col + 1]
+            bits = (bits << 1) | (left > right)
+    return bits
+
+
+def similarity(first: int, second: int) -> float:
+    return 1 - (first ^ second).bit_count() / FINGERPRINT_BITS
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+@dataclass(frozen=True)
+class Template:
+    id: int
+    fingerprint: int
+    doc_type: str
+    hint: str | None
+
+
+@dataclass
+class FingerprintMatch:
+    template_id: int
+    doc_type: str
+    hint: str | None
+    similarity: float
+
+
+class FingerprintIndex:
+    def __init__(
+        self, db_path: Path, *, max_entries: int = 5000, pending_days: int = 30
+    ):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.pending_days = pending_days
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA_SQL)
+        self._lock = threading.Lock()
+        self._templates: list[Template] = []
+        self._generation: int | None = None
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        with closing(sqlite3.connect(self.db_path, timeout=30)) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+
+    @staticmethod
+    def _bump(conn: sqlite3.Connection, key: str, amount: int = 1) -> None:
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = value + excluded.value",
+            (key, amount),
+        )
+
+    def _cached_templates(self) -> list[Template]:
+        """Confirmed templates, reloaded when another process changed them."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value FROM meta WHERE key = 'generation'"
+            ).fetchone()
+            generation = row[0] if row else 0
+            with self._lock:
+                if generation == self._generation:
+                    return self._templates
+            rows = conn.execute(
+                "SELECT id, fingerprint, doc_type, hint FROM templates"
+            ).fetchall()
+        templates = [
+            Template(template_id, int(fingerprint, 16), doc_type, hint)
+            for template_id, fingerprint, doc_type, hint in rows
+        ]
+        with self._lock:
+            self._templates, self._generation = templates, generation
+        return templates
+
+    def lookup(
+        self,
+        fingerprint: int,
+        threshold: float = FINGERPRINT_THRESHOLD,
+        *,
+        candidates: Collection[str] | None = None,
+    ) -> tuple[str, FingerprintMatch | None]:
+        """Return ``(outcome, match)``; outcome is hit, miss or ambiguous.
+
+        Templates whose type is not in ``candidates`` are ignored, so only
+        hits the caller can use are counted and refresh ``last_used_at``.
+        """
+        scored = [
+            (similarity(fingerprint, template.fingerprint), template)
+            for template in self._cached_templates()
+            if candidates is None or template.doc_type in candidates
+        ]
+        matches = [
+            (score, template) for score, template in scored if score >= threshold
+        ]
+        if not matches:
+            outcome, match = "miss", None
+        elif len({template.doc_type for _, template in matches}) > 1:
+            outcome, match = "ambiguous", None
+        else:
+            score, template = max(matches, key=lambda item: item[0])
+            outcome = "hit"
+            match = FingerprintMatch(
+                template.id, template.doc_type, template.hint, score
+            )
+        with self._connect() as conn:
+            self._bump(conn, "lookups")
+            if match is not None:
+                self._bump(conn, "hits")
+                conn.execute(
+                    "UPDATE templates SET hits = hits + 1, last_used_at = ? "
+                    "WHERE id = ?",
+                    (_now(), match.template_id),
+                )
+        return outcome, match
+
+    def _add_template(
+        self, conn: sqlite3.Connection, fingerprint: int, doc_type: str
+    ) -> None:
+        if doc_type in UNROUTABLE_TYPES:
+            return
+        nearest = max(
+            (
+                (similarity(fingerprint, int(stored, 16)), template_id)
+                for template_id, stored in conn.execute(
+                    "SELECT id, fingerprint FROM templates WHERE doc_type = ?",
+                    (doc_type,),
+                )
+            ),
+            default=None,
+        )
+        now = _now()
+        if nearest is not None and nearest[0] >= MERGE_SIMILARITY:
+            conn.execute(
+                "UPDATE templates SET examples = examples + 1, last_used_at = ? "
+                "WHERE id = ?",
+                (now, nearest[1]),
+            )
+            return
+        conn.execute(
+            "INSERT INTO templates (fingerprint, doc_type, created_at, last_used_at) "
+            "VALUES (?, ?, ?, ?)",
+            (f"{fingerprint:064x}", doc_type, now, now),
+        )
+        # Least recently used templates go first once the index is full.
+        evicted = conn.execute(
+            "DELETE FROM templates WHERE id IN ("
+            "SELECT id FROM templates ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        ).rowcount
+        if evicted:
+            self._bump(conn, "evicted", evicted)
+        self._bump(conn, "generation")
+
+    def record(
+        self, doc_id: str, fingerprint: int, *, doc_type: str | None = None
+    ) -> None:
+        """Add a confirmed template, or park the fingerprint until confirmation."""
+        with self._connect() as conn:
+            if doc_type is not None:
+                self._add_template(conn, fingerprint, doc_type)
+                return
+            conn.execute(
+                "INSERT OR REPLACE INTO pending (doc_id, fingerprint, created_at) "
+                "VALUES (?, ?, ?)",
+                (doc_id, f"{fingerprint:064x}", _now()),
+            )
+            cutoff = datetime.now(timezone.utc) - timedelta(days=self.pending_days)
+            conn.execute(
+                "DELETE FROM pending WHERE created_at < ?", (cutoff.isoformat(),)
+            )
+
+    def confirm(self, doc_id: str, doc_type: str | None) -> bool:
+        """Promote a pending fingerprint once its document type is confirmed."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT fingerprint FROM pending WHERE doc_id = ?", (doc_id,)
+            ).fetchone()
+            if row is None:
+                return False
+            conn.execute("DELETE FROM pending WHERE doc_id = ?", (doc_id,))
+            if doc_type:
+                self._add_template(conn, int(row[0], 16), doc_type)
+        return True
+
+    def sync_feedback(self, feedback_store: FeedbackStore) -> int:
+        labels = feedback_store.document_types()
+        with self._connect() as conn:
+            pending = [row[0] for row in conn.execute("SELECT doc_id FROM pending")]
+        return sum(
+            1
+            for doc_id in pending
+            if doc_id in labels and self.confirm(doc_id, labels[doc_id])
+        )
+
+    def set_hint(self, template_id: int, hint: str | None) -> bool:
+        """Attach an extraction prompt hint to a template; ``None`` clears it."""
+        with self._connect() as conn:
+            updated = conn.execute(
+                "UPDATE templates SET hint = ? WHERE id = ?",
+                (hint.strip() if hint and hint.strip() else None, template_id),
+            ).rowcount
+            if updated:
+                self._bump(conn, "generation")
+        return bool(updated)
+
+    def list_templates(self) -> list[dict[str, Any]]:
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            return [
+                dict(row)
+                for row in conn.execute(
+                    "SELECT id, doc_type, hint, examples, hits, created_at, "
+                    "last_used_at FROM templates ORDER BY hits DESC, id"
+                )
+            ]
+
+    def stats(self) -> dict[str, Any]:
+        with self._connect() as conn:
+            counters = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+            templates = conn.execute("SELECT COUNT(*) FROM templates").fetchone()[0]
+            pending = conn.execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+        lookups = counters.get("lookups", 0)
+        return {
+            "templates": templates,
+            "pending": pending,
+            "lookups": lookups,
+            "hits": counters.get("hits", 0),
+            "hit_rate": counters.get("hits", 0) / lookups if lookups else None,
+            "evicted": counters.get("evicted", 0),
+        }
+
+
+_indexes: dict[Path, FingerprintIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_fingerprint_index(
+    db_path: Path, *, max_entries: int = 5000, pending_days: int = 30
+) -> FingerprintIndex:
+    """Process-wide index per database, so the template cache is shared."""
+    with _indexes_lock:
+        index = _indexes.get(db_path)
+        if index is None:
+            index = FingerprintIndex(
+                db_path, max_entries=max_entries, pending_days=pending_days
+            )
+            _indexes[db_path] = index
+        index.max_entries, index.pending_days = max_entries, pending_days
+        return index
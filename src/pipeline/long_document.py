@@ -0,0 +1,234 @@
+"""
+Map-reduce extraction for documents with many pages.
+
+Pages are split into fixed-size windows, each window is extracted concurrently
+with its own page images (and page text when available), and candidate values
+are reduced per field. Every call carries at most ``window_size`` pages, so
+token usage per call stays bounded and latency tracks the slowest window rather
+than the page count.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from dataclasses import dataclass, field
+from typing import Any
+
+from PIL import Image
+
+from src.domain.models import SchemaField
+from src.logging import get_logger
+from src.pipeline.budget import PAGE_BREAK
+from src.pipeline.extraction import (
+    EXTRACT_TEXT_TOKENS,
+    canonicalize,
+    extract_metadata,
+)
+from src.pipeline.sharding import extract_sharded
+
+
+logger = get_logger(__name__)
+
+REDUCE_STRATEGIES = {"first", "majority", "confidence"}
+
+
+@dataclass
+class WindowResult:
+    start: int
+    end: int
+    metadata: dict[str, Any] = field(default_factory=dict)
+    confidence: dict[str, float] = field(default_factory=dict)
+    error: str | None = None
+    page_texts: list[str] | None = None
+
+    def source_pages(self, value: Any) -> list[int]:
+        """1-based page ``value`` was found on.
+
+        That is the window's first page whose text contains the value. Values
+        that cannot be located (no page text, structured or reformatted values)
+        report every page of the window.
+        """
+        if self.page_texts and isinstance(value, (str, int, float)):
+            needle = _normalize(str(value))
+            for offset, text in enumerate(self.page_texts):
+                if needle and needle in _normalize(text):
+                    return [self.start + offset + 1]
+        return list(range(self.start + 1, self.end + 1))
+
+
+def page_windows(page_count: int, window_size: int) -> list[tuple[int, int]]:
+    size = max(1, window_size)
+    return [
+        (start, min(start + size, page_count)) for start in range(0, page_count, size)
+    ]
+
+
+def split_page_text(text: str | None, page_count: int) -> list[str] | None:
+    """Per-page text when ``text`` has one form-feed separated block per page."""
+    if not text:
+        return None
+    pages = text.split(PAGE_BREAK)
+    return [page.strip() for page in pages] if len(pages) == page_count else None
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or (isinstance(value, (str, list, dict)) and not value)
+
+
+def reduce_windows(
+    windows: list[WindowResult], field_names: list[str], strategy: str
+) -> tuple[dict[str, Any], dict[str, float], dict[str, list[int]]]:
+    """Pick one value per field; returns values, confidences and source pages.
+
+    ``first`` keeps the earliest window with a value, ``majority`` the most
+    frequent value (earliest on ties) and ``confidence`` the value the model
+    was most confident about. Confidence for ``first`` and ``majority`` is the
+    share of value-bearing windows that agree with the winner.
+    """
+    if strategy not in REDUCE_STRATEGIES:
+        raise ValueError(
+            f"Unknown reduce strategy '{strategy}'. "
+            f"Use one of {sorted(REDUCE_STRATEGIES)}."
+        )
+    merged: dict[str, Any] = {}
+    confidences: dict[str, float] = {}
+    sources: dict[str, list[int]] = {}
+    ordered = sorted(windows, key=lambda window: window.start)
+    for name in field_names:
+        found = [
+            (window, window.metadata.get(name))
+            for window in ordered
+            if not _is_empty(window.metadata.get(name))
+        ]
+        if not found:
+            merged[name] = ""
+            confidences[name] = 0.0
+            continue
+        counts: dict[str, int] = {}
+        for _, value in found:
+            key = canonicalize(value)
+            counts[key] = counts.get(key, 0) + 1
+        if strategy == "first":
+            window, value = found[0]
+        elif strategy == "majority":
+            best = max(counts.values())
+            window, value = next(
+                item for item in found if counts[canonicalize(item[1])] == best
+            )
+        else:
+            window, value = max(
+                found,
+                key=lambda item: (
+                    _as_float(item[0].confidence.get(name)),
+                    -item[0].start,
+                ),
+            )
+        merged[name] = value
+        sources[name] = window.source_pages(value)
+        if strategy == "confidence":
+            confidences[name] = _as_float(window.confidence.get(name))
+        else:
+            confidences[name] = counts[canonicalize(value)] / len(found)
+    return merged, confidences, sources
+
+
+def _as_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def extract_windows(
+    images: list[Image.Image],
+    fields: list[SchemaField],
+    *,
+    window_size: int,
+    ocr_text: str | None = None,
+    strategy: str = "first",
+    max_workers: int = 4,
+    system_prompt: str | None = None,
+    max_text_tokens: int | None = EXTRACT_TEXT_TOKENS,
+    field_shards: list[list[SchemaField]] | None = None,
+    shard_workers: int = 4,
+) -> dict[str, Any]:
+    """Extract every page window concurrently and reduce the candidates.
+
+    ``ocr_text`` is split per window when it has one form-feed block per page;
+    otherwise the whole (budgeted) text accompanies every window. With
+    ``field_shards`` each window is itself extracted shard by shard.
+    """
+    if strategy not in REDUCE_STRATEGIES:
+        raise ValueError(
+            f"Unknown reduce strategy '{strategy}'. "
+            f"Use one of {sorted(REDUCE_STRATEGIES)}."
+        )
+    windows = page_windows(len(images), window_size)
+    page_texts = split_page_text(ocr_text, len(images))
+    with_confidence = strategy == "confidence"
+
+    def _extract(start: int, end: int) -> WindowResult:
+        window_text = PAGE_BREAK.join(page_texts[start:end]) if page_texts else ocr_text
+        result = WindowResult(
+            start=start,
+            end=end,
+            page_texts=page_texts[start:end] if page_texts else None,
+        )
+        try:
+            if field_shards:
+                extraction = extract_sharded(
+                    images[start:end],
+                    field_shards,
+                    ocr_text=window_text,
+                    with_confidence=with_confidence,
+                    system_prompt=system_prompt,
+                    max_text_tokens=max_text_tokens,
+                    max_workers=shard_workers,
+                )
+            else:
+                extraction = extract_metadata(
+                    images[start:end],
+                    fields,
+                    ocr_text=window_text,
+                    with_confidence=with_confidence,
+                    system_prompt=system_prompt,
+                    max_text_tokens=max_text_tokens,
+                )
+        except Exception as exc:
+            logger.warning("Window pages %s-%s failed: %s", start + 1, end, exc)
+            result.error = str(exc)
+            return result
+        result.metadata = extraction.get("metadata") or {}
+        result.confidence = extraction.get("confidence") or {}
+        return result
+
+    worker_count = max(1, min(max_workers, len(windows)))
+    with ThreadPoolExecutor(
+        max_workers=worker_count, thread_name_prefix="extractly-window"
+    ) as executor:
+        # Each task runs in a copy of the caller's context so LLM calls are
+        # still attributed to the caller's tracing span.
+        futures = [
+            executor.submit(copy_context().run, _extract, start, end)
+            for start, end in windows
+        ]
+        results = [future.result() for future in futures]
+
+    failed = [result for result in results if result.error]
+    if failed and len(failed) == len(results):
+        raise RuntimeError(f"All {len(results)} page windows failed: {failed[0].error}")
+    metadata, confidence, field_pages = reduce_windows(
+        results, [field.name for field in fields], strategy
+    )
+    return {
+        "metadata": metadata,
+        "confidence": confidence,
+        "field_pages": field_pages,
+        "windows": len(results),
+        "failed_windows": len(failed),
+    }
@@ -0,0 +1,88 @@
+"""
+Choose which page images each pipeline stage sends to the model.
+
+Policies are written ``kind`` or ``kind:N``:
+
+- ``all``: every page.
+- ``first:N``: the first N pages.
+- ``density:N``: the N pages with the most text, measured on the page text when
+  OCR text is available and on the share of dark pixels otherwise.
+- ``keywords:N``: the N pages whose text mentions the stage keywords most
+  (schema field names or candidate labels); without page text it behaves like
+  ``density:N``.
+
+Selected pages are always returned in document order.
+"""
+
+from __future__ import annotations
+
+from PIL import Image
+
+from src.pipeline.budget import WORD
+
+
+PAGE_POLICIES = {"all", "first", "density", "keywords"}
+DENSITY_THUMBNAIL = (200, 200)
+DARK_PIXEL_THRESHOLD = 160
+
+
+def parse_page_policy(spec: str) -> tuple[str, int | None]:
+    kind, _, raw = (spec or "all").strip().lower().partition(":")
+    if kind not in PAGE_POLICIES:
+        raise ValueError(
+            f"Invalid page policy '{spec}'. Use all, first:N, density:N or keywords:N."
+        )
+    if kind == "all":
+        return kind, None
+    try:
+        count = int(raw) if raw else 1
+    except ValueError as exc:
+        raise ValueError(f"Invalid page count in page policy '{spec}'.") from exc
+    if count < 1:
+        raise ValueError(f"Page policy '{spec}' must select at least one page.")
+    return kind, count
+
+
+def ink_density(image: Image.Image) -> float:
+    """Share of dark pixels on a small grayscale thumbnail of the page."""
+    thumbnail = image.copy()
+    thumbnail.draft("L", DENSITY_THUMBNAIL)
+    thumbnail = thumbnail.convert("L")
+    thumbnail.thumbnail(DENSITY_THUMBNAIL)
+    histogram = thumbnail.histogram()
+    total = sum(histogram)
+    return sum(histogram[:DARK_PIXEL_THRESHOLD]) / total if total else 0.0
+
+
+def _top(scores: list[float], count: int) -> list[int]:
+    ranked = sorted(range(len(scores)), key=lambda idx: (-scores[idx], idx))
+    return sorted(ranked[:count])
+
+
+def select_pages(
+    images: list[Image.Image],
+    spec: str,
+    *,
+    page_texts: list[str] | None = None,
+    keywords: set[str] | None = None,
+) -> list[int]:
+    """Return the 0-based indices of the pages ``spec`` selects."""
+    kind, count = parse_page_policy(spec)
+    page_count = len(images)
+    if count is None or count >= page_count:
+        return list(range(page_count))
+    if kind == "first":
+        return list(range(count))
+    if page_texts is not None and len(page_texts) != page_count:
+        page_texts = None
+    if kind == "keywords" and page_texts and keywords:
+        return _top(
+            [
+                sum(1 for word in WORD.findall(text.lower()) if word in keywords)
+                for text in page_texts
+            ],
+            count,
+        )
+    if page_texts:
+        return _top([len("".join(text.split())) for text in page_texts], count)
+    return _top([ink_density(image) for image in images], count)
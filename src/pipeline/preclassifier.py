@@ -0,0 +1,421 @@
+"""
+Local text pre-classifier that routes familiar documents without LLM calls.
+
+Document text is turned into hashed unigram/bigram TF-IDF features and scored
+by a softmax (multinomial logistic regression) model trained on confirmed
+labels: schema overrides given at run time and ``document_type_corrected``
+from saved feedback. Everything is pure Python and CPU-only.
+
+Feature vectors of classified documents are kept in ``examples.sqlite3`` so the
+model can be retrained without the original files. Each training run writes a
+new ``models/vNNNN.json`` and points ``CURRENT`` at it; running pipelines pick
+up the new version on their next prediction, and ``activate`` rolls back.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import random
+import re
+import sqlite3
+import threading
+import zlib
+from contextlib import closing, contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterator
+
+from src.domain.storage import write_bytes_atomic, write_json_atomic
+from src.pipeline.budget import WORD
+
+if TYPE_CHECKING:
+    from src.domain.feedback_store import FeedbackStore
+
+
+PRECLASSIFY_THRESHOLD = 0.9
+FEATURE_BUCKETS = 2**18
+MAX_FEATURE_CHARS = 20_000
+EPOCHS = 8
+LEARNING_RATE = 0.5
+L2 = 1e-5
+CURRENT_FILENAME = "CURRENT"
+MODELS_DIRNAME = "models"
+EXAMPLES_FILENAME = "examples.sqlite3"
+DIGITS = re.compile(r"\d+")
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS examples (
+    doc_id TEXT PRIMARY KEY,
+    features TEXT NOT NULL,
+    label TEXT,
+    label_source TEXT,
+    routed_by TEXT,
+    trained_label TEXT,
+    created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_examples_label ON examples (label);
+"""
+
+
+def text_features(text: str) -> dict[int, int]:
+    """Hashed unigram and bigram counts; digit runs are masked as ``#``."""
+    words = WORD.findall(DIGITS.sub("#", text[:MAX_FEATURE_CHARS].lower()))
+    terms = [word for word in words if len(word) > 1 or word == "#"]
+    counts: dict[int, int] = {}
+    for term in [*terms, *(f"{a} {b}" for a, b in zip(terms, terms[1:]))]:
+        bucket = zlib.crc32(term.encode("utf-8")) % FEATURE_BUCKETS
+        counts[bucket] = counts.get(bucket, 0) + 1
+    return counts
+
+
+@dataclass
+class Prediction:
+    label: str
+    confidence: float
+    version: int
+    supported: bool
+
+
+@dataclass
+class TextClassifier:
+    version: int = 0
+    labels: list[str] = field(default_factory=list)
+    weights: dict[str, dict[int, float]] = field(default_factory=dict)
+    bias: dict[str, float] = field(default_factory=dict)
+    doc_freq: dict[int, int] = field(default_factory=dict)
+    doc_count: int = 0
+    label_counts: dict[str, int] = field(default_factory=dict)
+    trained_at: str | None = None
+    new_examples: int = 0
+    new_example_accuracy: float | None = None
+
+    def vectorize(self, counts: dict[int, int]) -> dict[int, float]:
+        vector = {
+            bucket: (1 + math.log(count))
+            * (math.log((1 + self.doc_count) / (1 + self.doc_freq.get(bucket, 0))) + 1)
+            for bucket, count in counts.items()
+        }
+        norm = math.sqrt(sum(value * value for value in vector.values())) or 1.0
+        return {bucket: value / norm for bucket, value in vector.items()}
+
+    def _probabilities(self, vector: dict[int, float]) -> dict[str, float]:
+        scores = {
+            label: self.bias.get(label, 0.0)
+            + sum(
+                self.weights[label].get(bucket, 0.0) * value
+                for bucket, value in vector.items()
+            )
+            for label in self.labels
+        }
+        top = max(scores.values())
+        exps = {label: math.exp(score - top) for label, score in scores.items()}
+        total = sum(exps.values())
+        return {label: value / total for label, value in exps.items()}
+
+    def predict(
+        self, counts: dict[int, int], min_examples: int = 1
+    ) -> Prediction | None:
+        if len(self.labels) < 2 or not counts:
+            return None
+        probabilities = self._probabilities(self.vectorize(counts))
+        label = max(probabilities, key=probabilities.__getitem__)
+        return Prediction(
+            label=label,
+            confidence=probabilities[label],
+            version=self.version,
+            supported=self.label_counts.get(label, 0) >= min_examples,
+        )
+
+    def fit(self, examples: list[tuple[dict[int, int], str]], seed: int = 0) -> None:
+        """Warm-started SGD over ``examples``; new labels start at zero weight."""
+        self.doc_count = len(examples)
+        self.doc_freq = {}
+        self.label_counts = {}
+        for counts, label in examples:
+            for bucket in counts:
+                self.doc_freq[bucket] = self.doc_freq.get(bucket, 0) + 1
+            self.label_counts[label] = self.label_counts.get(label, 0) + 1
+        for label in sorted(self.label_counts):
+            if label not in self.weights:
+                self.labels.append(label)
+                self.weights[label] = {}
+                self.bias[label] = 0.0
+
+        vectors = [(self.vectorize(counts), label) for counts, label in examples]
+        rng = random.Random(seed)
+        for epoch in range(EPOCHS):
+            rng.shuffle(vectors)
+            rate = LEARNING_RATE / (1 + epoch)
+            for vector, target in vectors:
+                probabilities = self._probabilities(vector)
+                for label in self.labels:
+                    gradient = probabilities[label] - (1.0 if label == target else 0.0)
+                    weights = self.weights[label]
+                    for bucket, value in vector.items():
+                        weight = weights.get(bucket, 0.0)
+                        weights[bucket] = weight - rate * (
+                            gradient * value + L2 * weight
+                        )
+                    self.bias[label] -= rate * gradient
+        for label in self.labels:
+            self.weights[label] = {
+                bucket: weight
+                for bucket, weight in self.weights[label].items()
+                if abs(weight) > 1e-6
+            }
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "version": self.version,
+            "labels": self.labels,
+            "weights": {
+                label: {
+                    str(bucket): round(weight, 6) for bucket, weight in items.items()
+                }
+                for label, items in self.weights.items()
+            },
+            "bias": self.bias,
+            "doc_freq": {str(bucket): count for bucket, count in self.doc_freq.items()},
+            "doc_count": self.doc_count,
+            "label_counts": self.label_counts,
+            "trained_at": self.trained_at,
+            "new_examples": self.new_examples,
+            "new_example_accuracy": self.new_example_accuracy,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> TextClassifier:
+        return cls(
+            version=int(data.get("version", 0)),
+            labels=list(data.get("labels", [])),
+            weights={
+                label: {int(bucket): weight for bucket, weight in items.items()}
+                for label, items in (data.get("weights") or {}).items()
+            },
+            bias=dict(data.get("bias") or {}),
+            doc_freq={
+                int(bucket): count
+                for bucket, count in (data.get("doc_freq") or {}).items()
+            },
+            doc_count=int(data.get("doc_count", 0)),
+            label_counts=dict(data.get("label_counts") or {}),
+            trained_at=data.get("trained_at"),
+            new_examples=int(data.get("new_examples", 0)),
+            new_example_accuracy=data.get("new_example_accuracy"),
+        )
+
+
+class PreClassifier:
+    def __init__(self, base_dir: Path, min_examples: int = 5):
+        self.base_dir = base_dir
+        self.min_examples = min_examples
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA_SQL)
+        self._lock = threading.Lock()
+        self._model: TextClassifier | None = None
+        self._model_key: tuple[float, int] | None = None
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        with closing(
+            sqlite3.connect(self.base_dir / EXAMPLES_FILENAME, timeout=30)
+        ) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+
+    def _model_path(self, version: int) -> Path:
+        return self.base_dir / MODELS_DIRNAME / f"v{version:04d}.json"
+
+    def current_version(self) -> int | None:
+        try:
+            return int((self.base_dir / CURRENT_FILENAME).read_text().strip())
+        except (OSError, ValueError):
+            return None
+
+    def list_versions(self) -> list[int]:
+        return sorted(
+            int(path.stem[1:])
+            for path in (self.base_dir / MODELS_DIRNAME).glob("v*.json")
+            if path.stem[1:].isdigit()
+        )
+
+    def model(self) -> TextClassifier | None:
+        """The active model, reloaded when ``CURRENT`` changes."""
+        current = self.base_dir / CURRENT_FILENAME
+        try:
+            key = (current.stat().st_mtime, self.current_version() or 0)
+        except OSError:
+            return None
+        with self._lock:
+            if key != self._model_key:
+                try:
+                    data = json.loads(self._model_path(key[1]).read_text("utf-8"))
+                except (OSError, ValueError):
+                    return None
+                self._model = TextClassifier.from_dict(data)
+                self._model_key = key
+            return self._model
+
+    def activate(self, version: int) -> None:
+        if not self._model_path(version).exists():
+            raise ValueError(f"Unknown pre-classifier version {version}.")
+        write_bytes_atomic(self.base_dir / CURRENT_FILENAME, f"{version}\n".encode())
+
+    def predict(self, features: dict[int, int]) -> Prediction | None:
+        model = self.model()
+        return model.predict(features, self.min_examples) if model else None
+
+    def record(
+        self,
+        doc_id: str,
+        features: dict[int, int],
+        *,
+        routed_by: str,
+        label: str | None = None,
+    ) -> None:
+        """Store a document's features; ``label`` marks it as confirmed."""
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO examples (
+                    doc_id, features, label, label_source, routed_by, created_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (doc_id) DO UPDATE SET
+                    features = excluded.features,
+                    label = COALESCE(excluded.label, examples.label),
+                    label_source = COALESCE(excluded.label_source, examples.label_source),
+                    routed_by = excluded.routed_by
+                """,
+                (
+                    doc_id,
+                    json.dumps(features, separators=(",", ":")),
+                    label,
+                    "override" if label else None,
+                    routed_by,
+                    datetime.now(timezone.utc).isoformat(),
+                ),
+            )
+
+    def sync_feedback(self, feedback_store: FeedbackStore) -> int:
+        """Copy ``document_type_corrected`` from feedback onto stored examples."""
+        labels = feedback_store.document_types()
+        with self._connect() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "UPDATE examples SET label = ?, label_source = 'feedback' "
+                "WHERE doc_id = ? AND label IS NOT ?",
+                [(label, doc_id, label) for doc_id, label in labels.items()],
+            )
+            return conn.total_changes - before
+
+    def _labelled(self) -> list[tuple[str, dict[int, int], str, str | None]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT doc_id, features, label, trained_label FROM examples "
+                "WHERE label IS NOT NULL AND label NOT IN ('Unknown', 'Other') "
+                "ORDER BY created_at, doc_id"
+            ).fetchall()
+        return [
+            (
+                doc_id,
+                {int(k): v for k, v in json.loads(features).items()},
+                label,
+                trained_label,
+            )
+            for doc_id, features, label, trained_label in rows
+        ]
+
+    def train(
+        self, feedback_store: FeedbackStore | None = None, *, full: bool = False
+    ) -> TextClassifier | None:
+        """Train a new version from confirmed examples and activate it.
+
+        Warm-starts from the active model unless ``full``. Returns ``None`` when
+        there are fewer than two labels or nothing changed since the last
+        version.
+        """
+        if feedback_store is not None:
+            self.sync_feedback(feedback_store)
+        examples = self._labelled()
+        if len({label for _, _, label, _ in examples}) < 2:
+            return None
+        previous = None if full else self.model()
+        changed = [example for example in examples if example[3] != example[2]]
+        if previous is not None and not changed:
+            return None
+
+        model = (
+            TextClassifier.from_dict(previous.to_dict())
+            if previous
+            else TextClassifier()
+        )
+        fresh = [example for example in changed if example[3] is None]
+        model.new_examples = len(fresh)
+        model.new_example_accuracy = None
+        if previous is not None and fresh:
+            # Prequential check: how the active model did on examples it never saw.
+            hits = sum(
+                1
+                for _, features, label, _ in fresh
+                if (prediction := previous.predict(features))
+                and prediction.label == label
+            )
+            model.new_example_accuracy = round(hits / len(fresh), 4)
+        model.version = max(self.list_versions(), default=0) + 1
+        model.fit(
+            [(features, label) for _, features, label, _ in examples],
+            seed=model.version,
+        )
+        model.trained_at = datetime.now(timezone.utc).isoformat()
+        write_json_atomic(self._model_path(model.version), model.to_dict())
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE examples SET trained_label = ? WHERE doc_id = ?",
+                [(label, doc_id) for doc_id, _, label, _ in examples],
+            )
+        self.activate(model.version)
+        return model
+
+    def stats(self) -> dict[str, Any]:
+        """Example counts and the share of documents routed without the LLM."""
+        with self._connect() as conn:
+            routed = dict(
+                conn.execute(
+                    "SELECT routed_by, COUNT(*) FROM examples GROUP BY routed_by"
+                ).fetchall()
+            )
+            labelled = conn.execute(
+                "SELECT COUNT(*) FROM examples WHERE label IS NOT NULL"
+            ).fetchone()[0]
+        classified = routed.get("preclassifier", 0) + routed.get("llm", 0)
+        model = self.model()
+        return {
+            "examples": sum(routed.values()),
+            "labelled": labelled,
+            "routed": routed,
+            "avoidance_rate": (
+                routed.get("preclassifier", 0) / classified if classified else None
+            ),
+            "version": model.version if model else None,
+            "labels": model.label_counts if model else {},
+            "new_example_accuracy": model.new_example_accuracy if model else None,
+        }
+
+
+_instances: dict[Path, PreClassifier] = {}
+_instances_lock = threading.Lock()
+
+
+def get_preclassifier(base_dir: Path, min_examples: int = 5) -> PreClassifier:
+    """Process-wide instance per directory, so the loaded model is shared."""
+    with _instances_lock:
+        instance = _instances.get(base_dir)
+        if instance is None or instance.min_examples != min_examples:
+            instance = PreClassifier(base_dir, min_examples=min_examples)
+            _instances[base_dir] = instance
+        return instance
@@ -1,24 +1,126 @@
 from __future__ import annotations
 
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import copy_context
 from dataclasses import dataclass
 from datetime import datetime, timezone
-import base64
 import io
-import json
+import sqlite3
+import threading
+import time
 from typing import Any, Callable
 
-from PIL import Image
+from PIL import Image, features
 
+from src.config import config_snapshot, load_config
 from src.domain.models import DocumentSchema
 from src.domain.run_store import ExtractionRun, RunDocument, RunStore
 from src.integrations.ocr import run_ocr
-from src.pipeline.classification import classify_document
-from src.pipeline.extraction import extract_metadata
+from src.pipeline.budget import PAGE_BREAK, fit_text, keywords_from
+from src.pipeline.classification import CLASSIFY_TEXT_TOKENS, classify_document
+from src.pipeline.combined import (
+    COMBINED_CONFIDENCE,
+    COMBINED_MAX_FIELDS,
+    classify_and_extract,
+)
+from src.pipeline.extraction import (
+    DEFAULT_EXTRACTION_PROMPT,
+    EXTRACT_TEXT_TOKENS,
+    canonicalize,
+    extract_metadata,
+    field_keywords,
+)
+from src.pipeline.fingerprint import (
+    FINGERPRINT_THRESHOLD,
+    get_fingerprint_index,
+    layout_hash,
+)
+from src.pipeline.long_document import extract_windows, split_page_text
+from src.pipeline.page_selection import parse_page_policy, select_pages
+from src.pipeline.preclassifier import (
+    PRECLASSIFY_THRESHOLD,
+    get_preclassifier,
+    text_features,
+)
+from src.pipeline.sharding import extract_sharded, shard_fields
 from src.logging import get_logger
+from src.metrics import (
+    PIPELINE_DOCS_IN_FLIGHT,
+    PIPELINE_DOCS_PENDING,
+    PIPELINE_DOCUMENT_SECONDS,
+    FINGERPRINT_LOOKUPS,
+    PIPELINE_DOCUMENTS,
+    PIPELINE_RUNS,
+    PRECLASSIFIER_DECISIONS,
+    SPECULATIVE_EXTRACTIONS,
+    SPECULATIVE_WASTED_CALLS,
+)
+from src.profiling import RunProfiler, profiled
+from src.tracing import SpanRecorder
 
 
 logger = get_logger(__name__)
 
+PREVIEW_MAX_SIZE = (720, 720)
+PREVIEW_QUALITY = 80
+# Pre-classifier confidence that starts a speculative extraction.
+SPECULATE_THRESHOLD = 0.6
+# Agreeing classification votes that start a speculative extraction.
+SPECULATE_VOTES = 2
+
+
+def make_preview(images: list[Image.Image]) -> Image.Image | None:
+    if not images:
+        return None
+    preview = images[0].copy()
+    preview.thumbnail(PREVIEW_MAX_SIZE)
+    return preview
+
+
+def encode_preview(images: list[Image.Image]) -> tuple[bytes, str] | None:
+    preview = make_preview(images)
+    return encode_preview_image(preview) if preview is not None else None
+
+
+def encode_preview_image(preview: Image.Image) -> tuple[bytes, str]:
+    buf = io.BytesIO()
+    if features.check("webp"):
+        if preview.mode not in {"RGB", "RGBA"}:
+            preview = preview.convert("RGB")
+        preview.save(buf, format="WEBP", quality=PREVIEW_QUALITY, method=4)
+        return buf.getvalue(), "webp"
+    if preview.mode != "RGB":
+        preview = preview.convert("RGB")
+    preview.save(buf, format="JPEG", quality=PREVIEW_QUALITY, optimize=True)
+    return buf.getvalue(), "jpg"
+
+
+def aggregate_votes(
+    votes: list[dict[str, Any]], field_names: list[str]
+) -> tuple[dict[str, Any], dict[str, float]]:
+    merged: dict[str, Any] = {}
+    confidences: dict[str, float] = {}
+    for field_name in field_names:
+        counts: dict[str, int] = {}
+        samples: dict[str, Any] = {}
+        for vote in votes:
+            value = vote.get(field_name, "")
+            key = canonicalize(value)
+            counts[key] = counts.get(key, 0) + 1
+            if key not in samples:
+                samples[key] = value
+        if not counts:
+            merged[field_name] = ""
+            confidences[field_name] = 0.0
+            continue
+        best = max(
+            counts,
+            key=lambda k: (counts[k], 1 if str(k).strip() else 0),
+        )
+        merged[field_name] = samples.get(best, "")
+        confidences[field_name] = counts[best] / max(len(votes), 1)
+    return merged, confidences
+
 
 @dataclass
 class PipelineOptions:
@@ -26,6 +128,27 @@ class PipelineOptions:
     compute_confidence: bool = False
     classifier_prompt: str | None = None
     extraction_prompt: str | None = None
+    classification_votes: int = 5
+    extraction_votes: int | None = None
+    max_workers: int = 1
+    classify_text_tokens: int | None = CLASSIFY_TEXT_TOKENS
+    classify_pages: str = "first:2"
+    extract_pages: str = "all"
+    extract_text_tokens: int | None = EXTRACT_TEXT_TOKENS
+    page_window: int | None = None
+    window_reduce: str = "first"
+    window_workers: int = 4
+    field_shard_size: int | None = None
+    shard_workers: int = 4
+    preclassify: bool = False
+    preclassify_threshold: float = PRECLASSIFY_THRESHOLD
+    fingerprint: bool = False
+    fingerprint_threshold: float = FINGERPRINT_THRESHOLD
+    combined: bool = False
+    combined_threshold: float = COMBINED_CONFIDENCE
+    speculate: bool = False
+    speculate_threshold: float = SPECULATE_THRESHOLD
+    speculate_votes: int = SPECULATE_VOTES
 
 
 def run_pipeline(
@@ -38,106 +161,556 @@ def run_pipeline(
     options: PipelineOptions,
     schema_name: str | None = None,
     progress_callback: Callable[[str, float], None] | None = None,
+    run_id: str | None = None,
+    cancel_event: threading.Event | None = None,
+    profiler: RunProfiler | None = None,
 ) -> ExtractionRun:  # sourcery skip: low-code-quality
-    run_id = run_store.create_run_id()
-    logs: list[str] = []
-    documents: list[RunDocument] = []
+    run_id = run_id or run_store.create_run_id()
+    app_config = load_config()
+    config = config_snapshot(app_config)
+    preclassifier = (
+        get_preclassifier(
+            app_config.preclassifier_dir, app_config.preclassifier_min_examples
+        )
+        if options.preclassify
+        else None
+    )
+    fingerprint_index = (
+        get_fingerprint_index(
+            app_config.fingerprint_db_path,
+            max_entries=app_config.fingerprint_max_entries,
+            pending_days=app_config.fingerprint_pending_days,
+        )
+        if options.fingerprint
+        else None
+    )
+    started_at = datetime.now(timezone.utc).isoformat()
+    started_clock = time.perf_counter()
 
-    max_pages = None
-    vote_runs = 5 if options.compute_confidence else 3
-    class_votes = 5
+    parse_page_policy(options.classify_pages)
+    parse_page_policy(options.extract_pages)
+    combined_schemas = {
+        name: schema_map[name] for name in candidates if name in schema_map
+    }
+    combined_fields = sum(len(schema.fields) for schema in combined_schemas.values())
+    use_combined = options.combined and 0 < combined_fields <= COMBINED_MAX_FIELDS
+    vote_runs = options.extraction_votes or (5 if options.compute_confidence else 3)
+    class_votes = options.classification_votes
 
     total_docs = len(files)
     total_steps = max(total_docs * 2, 1)
     current_step = 0
+    completed_docs = 0
+    worker_count = max(1, min(options.max_workers, total_docs))
+    progress_lock = threading.Lock()
+
+    def write_progress(status: str, message: str) -> None:
+        elapsed = time.perf_counter() - started_clock
+        eta_s = None
+        if completed_docs and status == "running":
+            remaining = total_docs - completed_docs
+            eta_s = round(elapsed / completed_docs * remaining, 1)
+        run_store.write_progress(
+            run_id,
+            {
+                "status": status,
+                "message": message,
+                "total": total_docs,
+                "done": completed_docs,
+                "started_at": started_at,
+                "elapsed_s": round(elapsed, 1),
+                "eta_s": eta_s,
+                "workers": worker_count,
+            },
+        )
 
     def report_progress(message: str) -> None:
         nonlocal current_step
-        current_step += 1
-        if progress_callback:
-            progress = min(current_step / total_steps, 1.0)
-            progress_callback(message, progress)
-
-    def canonicalize(value: Any) -> str:
-        if value is None:
-            return ""
-        if isinstance(value, (dict, list)):
-            return json.dumps(value, sort_keys=True, ensure_ascii=False)
-        return str(value)
-
-    def aggregate_votes(
-        votes: list[dict[str, Any]], field_names: list[str]
-    ) -> tuple[dict[str, Any], dict[str, float]]:
-        merged: dict[str, Any] = {}
-        confidences: dict[str, float] = {}
-        for field_name in field_names:
-            counts: dict[str, int] = {}
-            samples: dict[str, Any] = {}
-            for vote in votes:
-                value = vote.get(field_name, "")
-                key = canonicalize(value)
-                counts[key] = counts.get(key, 0) + 1
-                if key not in samples:
-                    samples[key] = value
-            if not counts:
-                merged[field_name] = ""
-                confidences[field_name] = 0.0
-                continue
-            best = max(
-                counts,
-                key=lambda k: (counts[k], 1 if str(k).strip() else 0),
+        with progress_lock:
+            current_step += 1
+            if progress_callback:
+                progress = min(current_step / total_steps, 1.0)
+                progress_callback(message, progress)
+
+    def report_document_done(filename: str) -> None:
+        nonlocal completed_docs
+        with progress_lock:
+            completed_docs += 1
+            write_progress(
+                "running", f"Processed {completed_docs}/{total_docs} • {filename}"
             )
-            merged[field_name] = samples.get(best, "")
-            confidences[field_name] = counts[best] / max(len(votes), 1)
-        return merged, confidences
 
-    def encode_preview(images: list[Image.Image]) -> str | None:
-        if not images:
+    def process_document(
+        idx: int, payload: dict[str, Any]
+    ) -> tuple[RunDocument, list[str]] | None:
+        if cancel_event is not None and cancel_event.is_set():
             return None
-        preview = images[0].copy()
-        preview.thumbnail((720, 720))
-        buf = io.BytesIO()
-        preview.save(buf, format="PNG")
-        return base64.b64encode(buf.getvalue()).decode()
-
-    for idx, payload in enumerate(files, start=1):
+        doc_started = time.perf_counter()
+        recorder = SpanRecorder()
+        logs: list[str] = []
         filename = payload["name"]
         images: list[Image.Image] = payload["images"]
-        images_for_llm = images if max_pages is None else images[:max_pages]
+
+        warnings: list[str] = []
+        errors: list[str] = []
+        extracted: dict[str, Any] = {}
+        field_confidence: dict[str, float] = {}
+        field_pages: dict[str, list[int]] = {}
+        pages_used: dict[str, list[int]] = {}
 
         logs.append(f"Parsing {filename}")
+        preprocess_stats = payload.get("preprocess")
+        if preprocess_stats:
+            recorder.add("preprocess", **preprocess_stats)
         ocr_text = payload.get("ocr_text")
         if ocr_text is None and options.enable_ocr:
-            ocr_text = run_ocr(images)
+            with recorder.span("ocr"):
+                ocr_text = run_ocr(images)
+
+        page_texts = split_page_text(ocr_text, len(images))
+        features = (
+            text_features(ocr_text) if preclassifier is not None and ocr_text else None
+        )
+        preview = make_preview(images)
+        fingerprint = None
+        if fingerprint_index is not None and preview is not None:
+            with recorder.span("fingerprint"):
+                fingerprint = layout_hash(preview)
+        text_tokens: dict[str, int] = {}
+
+        def select_stage_pages(
+            stage: str,
+            spec: str,
+            keywords: set[str],
+            *,
+            trace: SpanRecorder = recorder,
+            used: dict[str, list[int]] = pages_used,
+        ) -> tuple[list[int], str | None]:
+            """Selected page indices and the OCR text of those pages."""
+            with trace.span("select_pages"):
+                selected = select_pages(
+                    images, spec, page_texts=page_texts, keywords=keywords
+                )
+            if images:
+                used[stage] = [page + 1 for page in selected]
+            if page_texts and len(selected) < len(images):
+                return selected, PAGE_BREAK.join(page_texts[i] for i in selected)
+            return selected, ocr_text
+
+        def budget_text(
+            stage: str,
+            text: str | None,
+            max_tokens: int | None,
+            keywords: set[str],
+            calls: int,
+            *,
+            trace: SpanRecorder = recorder,
+            tokens: dict[str, int] = text_tokens,
+        ) -> str | None:
+            """Fit ``text`` once for all ``calls``; they get ``max_text_tokens=None``."""
+            if not text:
+                return text
+            with trace.span("budget"):
+                budgeted = fit_text(text, max_tokens, keywords=keywords)
+            tokens["original"] = budgeted.original_tokens
+            tokens[stage] = budgeted.tokens
+            tokens["saved"] = tokens.get("saved", 0) + budgeted.saved_tokens * calls
+            return budgeted.text
+
+        def extract_schema(
+            schema_for_doc: DocumentSchema, span_name: str = "extract"
+        ) -> dict[str, Any]:
+            """Extract one schema's fields.
+
+            Spans, pages, token counts, warnings, errors and log lines are
+            returned rather than recorded; ``keep_extraction`` adds them to the
+            document, so a discarded speculative run leaves no trace on it.
+            """
+            trace = SpanRecorder()
+            trace.origin = recorder.origin
+            used: dict[str, list[int]] = {}
+            tokens: dict[str, int] = {}
+            extracted: dict[str, Any] = {}
+            field_confidence: dict[str, float] = {}
+            field_pages: dict[str, list[int]] = {}
+            warnings: list[str] = []
+            errors: list[str] = []
+            logs: list[str] = []
+            extract_keywords = field_keywords(schema_for_doc.fields)
+            extract_idx, extract_text = select_stage_pages(
+                "extract",
+                options.extract_pages,
+                extract_keywords,
+                trace=trace,
+                used=used,
+            )
+            images_for_llm = [images[page] for page in extract_idx]
+            windowed = bool(
+                options.page_window and len(images_for_llm) > options.page_window
+            )
+            doc_text = extract_text
+            if not windowed:
+                doc_text = budget_text(
+                    "extract",
+                    extract_text,
+                    options.extract_text_tokens,
+                    extract_keywords,
+                    vote_runs,
+                    trace=trace,
+                    tokens=tokens,
+                )
+            shards = shard_fields(schema_for_doc.fields, options.field_shard_size)
+            field_shards = shards if len(shards) > 1 else None
+            if field_shards:
+                logs.append(
+                    f"Extracting {filename} in {len(field_shards)} field groups"
+                )
+            failed_fields: set[str] = set()
+
+            def extract_once() -> dict[str, Any]:
+                if field_shards:
+                    extraction = extract_sharded(
+                        images_for_llm,
+                        field_shards,
+                        ocr_text=doc_text,
+                        system_prompt=extraction_prompt,
+                        max_text_tokens=None,
+                        max_workers=options.shard_workers,
+                    )
+                    failed_fields.update(extraction["failed_fields"])
+                    return extraction
+                return extract_metadata(
+                    images_for_llm,
+                    schema_for_doc.fields,
+                    ocr_text=doc_text,
+                    with_confidence=False,
+                    system_prompt=extraction_prompt,
+                    max_text_tokens=None,
+                )
+
+            try:
+                if windowed:
+                    # One call per page window replaces the extraction votes;
+                    # text is budgeted per window inside extract_metadata.
+                    with trace.span(span_name):
+                        extraction = extract_windows(
+                            images_for_llm,
+                            schema_for_doc.fields,
+                            window_size=options.page_window,
+                            ocr_text=extract_text,
+                            strategy=options.window_reduce,
+                            max_workers=options.window_workers,
+                            system_prompt=extraction_prompt,
+                            max_text_tokens=options.extract_text_tokens,
+                            field_shards=field_shards,
+                            shard_workers=options.shard_workers,
+                        )
+                    extracted = extraction["metadata"]
+                    # Window pages count selected pages; map back to the
+                    # document's page numbers.
+                    field_pages = {
+                        name: [extract_idx[page - 1] + 1 for page in pages]
+                        for name, pages in extraction["field_pages"].items()
+                    }
+                    field_confidence = (
+                        extraction["confidence"] if options.compute_confidence else {}
+                    )
+                    logs.append(
+                        f"Extracted {filename} over {extraction['windows']} "
+                        f"page windows"
+                    )
+                    if extraction["failed_windows"]:
+                        warnings.append(
+                            f"{extraction['failed_windows']} of "
+                            f"{extraction['windows']} page windows failed."
+                        )
+                elif vote_runs > 1:
+                    votes: list[dict[str, Any]] = []
+                    with trace.span(span_name):
+                        for _ in range(vote_runs):
+                            extraction = extract_once()
+                            votes.append(extraction.get("metadata", {}))
+                    field_names = [field.name for field in schema_for_doc.fields]
+                    with trace.span("aggregate"):
+                        extracted, field_confidence = aggregate_votes(
+                            votes, field_names
+                        )
+                    if not options.compute_confidence:
+                        field_confidence = {}
+                else:
+                    with trace.span(span_name):
+                        extraction = extract_once()
+                    extracted = extraction.get("metadata", {})
+            except Exception as exc:
+                logger.error("Extraction failed for %s: %s", filename, exc)
+                errors.append(str(exc))
+            if failed_fields:
+                warnings.append(
+                    "Some field groups failed: " + ", ".join(sorted(failed_fields))
+                )
+            return {
+                "metadata": extracted,
+                "field_confidence": field_confidence,
+                "field_pages": field_pages,
+                "warnings": warnings,
+                "errors": errors,
+                "logs": logs,
+                "spans": trace.spans,
+                "pages_used": used,
+                "text_tokens": tokens,
+            }
+
+        def keep_extraction(extraction: dict[str, Any]) -> None:
+            nonlocal extracted, field_confidence, field_pages
+            extracted = extraction["metadata"]
+            field_confidence = extraction["field_confidence"]
+            field_pages = extraction["field_pages"]
+            warnings.extend(extraction["warnings"])
+            errors.extend(extraction["errors"])
+            logs.extend(extraction["logs"])
+            recorder.spans.extend(extraction["spans"])
+            pages_used.update(extraction["pages_used"])
+            saved = text_tokens.get("saved", 0) + extraction["text_tokens"].pop(
+                "saved", 0
+            )
+            text_tokens.update(extraction["text_tokens"], saved=saved)
+
+        def run_speculation(schema: DocumentSchema) -> dict[str, Any] | None:
+            try:
+                return extract_schema(schema, "speculate")
+            except Exception as exc:
+                logger.warning(
+                    "Speculative extraction failed for %s: %s", filename, exc
+                )
+                return None
+
+        def speculative_calls(future: Future) -> int:
+            result = future.result()
+            return sum(span.llm_calls for span in result["spans"]) if result else 0
+
+        speculation: dict[str, Any] = {}
+        speculator: ThreadPoolExecutor | None = None
+
+        def speculate(label: str, source: str) -> None:
+            """Start extracting ``label``'s schema while classification continues."""
+            nonlocal speculator
+            if speculation or label not in candidates or label not in schema_map:
+                return
+            speculator = ThreadPoolExecutor(max_workers=1)
+            speculation.update(
+                source=source,
+                label=label,
+                future=speculator.submit(
+                    copy_context().run, run_speculation, schema_map[label]
+                ),
+            )
+            logs.append(f"Speculatively extracting {filename} as {label} ({source})")
 
         doc_type_override = payload.get("doc_type_override")
+        combined_extracted: dict[str, Any] | None = None
+        template = None
+        if fingerprint is not None and not doc_type_override:
+            with recorder.span("fingerprint"):
+                lookup_outcome, template = fingerprint_index.lookup(
+                    fingerprint, options.fingerprint_threshold, candidates=candidates
+                )
+            FINGERPRINT_LOOKUPS.inc(outcome=lookup_outcome)
+        extraction_prompt = options.extraction_prompt
+        if template is not None and template.hint:
+            extraction_prompt = (
+                f"{options.extraction_prompt or DEFAULT_EXTRACTION_PROMPT}\n\n"
+                f"Notes for this document layout: {template.hint}"
+            )
+        prediction = None
+        if features and not doc_type_override and template is None:
+            with recorder.span("preclassify"):
+                prediction = preclassifier.predict(features)
+        accepted = (
+            prediction is not None
+            and prediction.supported
+            and prediction.label in candidates
+            and prediction.confidence >= options.preclassify_threshold
+        )
+        if preclassifier is not None and not doc_type_override and template is None:
+            if accepted:
+                outcome = "accepted"
+            elif prediction is not None:
+                outcome = "uncertain"
+            else:
+                outcome = "no_model" if features else "no_text"
+            PRECLASSIFIER_DECISIONS.inc(outcome=outcome)
+
         if doc_type_override:
             doc_type = doc_type_override
             confidence = None
+            routed_by = "override"
             logs.append(f"Using provided document type for {filename}: {doc_type}")
             report_progress(f"Assigning schema {idx}/{total_docs} • {filename}")
+        elif template is not None:
+            doc_type = template.doc_type
+            confidence = round(template.similarity, 4)
+            routed_by = "fingerprint"
+            logs.append(
+                f"Matched {filename} to layout template {template.template_id} "
+                f"({doc_type}, similarity {confidence:.3f})"
+            )
+            report_progress(f"Matched layout {idx}/{total_docs} • {filename}")
+        elif accepted:
+            doc_type = prediction.label
+            confidence = round(prediction.confidence, 4)
+            routed_by = "preclassifier"
+            logs.append(
+                f"Pre-classified {filename} as {doc_type} "
+                f"(model v{prediction.version}, {confidence:.2f})"
+            )
+            report_progress(f"Pre-classified {idx}/{total_docs} • {filename}")
         else:
-            report_progress(f"Classifying {idx}/{total_docs} • {filename}")
-            classification = classify_document(
-                images_for_llm,
-                candidates,
-                use_confidence=options.compute_confidence,
-                n_votes=class_votes,
-                system_prompt=options.classifier_prompt,
-                text=ocr_text,
+            routed_by = "llm"
+            combined_eligible = use_combined and not (
+                options.page_window and len(images) > options.page_window
+            )
+            report_progress(
+                f"Classifying and extracting {idx}/{total_docs} • {filename}"
+                if combined_eligible
+                else f"Classifying {idx}/{total_docs} • {filename}"
+            )
+            if combined_eligible:
+                combined_keywords = keywords_from(candidates).union(
+                    *(
+                        field_keywords(schema.fields)
+                        for schema in combined_schemas.values()
+                    )
+                )
+                combined_idx, combined_text = select_stage_pages(
+                    "combined", options.extract_pages, combined_keywords
+                )
+                combined = None
+                try:
+                    with recorder.span("combined"):
+                        combined = classify_and_extract(
+                            [images[page] for page in combined_idx],
+                            combined_schemas,
+                            candidates,
+                            text=budget_text(
+                                "combined",
+                                combined_text,
+                                options.extract_text_tokens,
+                                combined_keywords,
+                                1,
+                            ),
+                            max_text_tokens=None,
+                        )
+                except Exception as exc:
+                    logger.warning("Combined call failed for %s: %s", filename, exc)
+                if (
+                    combined is not None
+                    and combined["doc_type"] in combined_schemas
+                    and combined["confidence"] >= options.combined_threshold
+                ):
+                    doc_type = combined["doc_type"]
+                    confidence = (
+                        round(combined["confidence"], 4)
+                        if options.compute_confidence
+                        else None
+                    )
+                    routed_by = "combined"
+                    validation = combined["validation"]
+                    if validation.is_valid:
+                        combined_extracted = combined["metadata"]
+                        logs.append(
+                            f"Classified and extracted {filename} as {doc_type} "
+                            "in one call"
+                        )
+                    else:
+                        logs.append(
+                            f"Classified {filename} as {doc_type} in one call; "
+                            f"fields failed validation ({'; '.join(validation.errors)}), "
+                            "running dedicated extraction"
+                        )
+                else:
+                    logs.append(
+                        f"Combined call for {filename} was uncertain; "
+                        "classifying separately"
+                    )
+        if routed_by == "llm":
+            if (
+                options.speculate
+                and prediction is not None
+                and prediction.supported
+                and prediction.confidence >= options.speculate_threshold
+            ):
+                speculate(prediction.label, "preclassifier")
+            vote_counts: dict[str, int] = {}
+
+            def on_vote(vote: str) -> None:
+                vote_counts[vote] = vote_counts.get(vote, 0) + 1
+                if vote_counts[vote] >= options.speculate_votes:
+                    speculate(vote, "vote")
+
+            classify_keywords = keywords_from(candidates)
+            classify_idx, classify_text = select_stage_pages(
+                "classify", options.classify_pages, classify_keywords
             )
+            try:
+                with recorder.span("classify"):
+                    classification = classify_document(
+                        [images[page] for page in classify_idx],
+                        candidates,
+                        use_confidence=options.compute_confidence,
+                        n_votes=class_votes,
+                        system_prompt=options.classifier_prompt,
+                        text=budget_text(
+                            "classify",
+                            classify_text,
+                            options.classify_text_tokens,
+                            classify_keywords,
+                            class_votes,
+                        ),
+                        max_text_tokens=None,
+                        on_vote=(
+                            on_vote
+                            if options.speculate
+                            and class_votes > options.speculate_votes
+                            else None
+                        ),
+                    )
+            except Exception as exc:
+                logger.error("Classification failed for %s: %s", filename, exc)
+                errors.append(str(exc))
+                classification = {"doc_type": "Unknown"}
             doc_type = classification.get("doc_type", "Unknown")
             confidence = classification.get("confidence")
             logs.append(f"Classified {filename} as {doc_type}")
 
-        warnings: list[str] = []
-        errors: list[str] = []
-        extracted: dict[str, Any] = {}
-        field_confidence: dict[str, float] = {}
+        if fingerprint is not None:
+            try:
+                fingerprint_index.record(
+                    f"{run_id}:{filename}",
+                    fingerprint,
+                    doc_type=doc_type if doc_type_override else None,
+                )
+            except sqlite3.Error as exc:
+                logger.warning("Could not record fingerprint of %s: %s", filename, exc)
+
+        if features:
+            try:
+                preclassifier.record(
+                    f"{run_id}:{filename}",
+                    features,
+                    routed_by=routed_by,
+                    label=doc_type if doc_type_override else None,
+                )
+            except sqlite3.Error as exc:
+                logger.warning(
+                    "Could not record %s for pre-classifier: %s", filename, exc
+                )
 
         if doc_type in {"Unknown", "Other"}:
             warnings.append("Document type is unknown. Extraction skipped.")
             report_progress(f"Skipping extraction {idx}/{total_docs} • {filename}")
+        elif combined_extracted is not None:
+            extracted = combined_extracted
+            report_progress(f"Extracted {idx}/{total_docs} • {filename}")
         else:
             schema_for_doc = None
             if doc_type_override:
@@ -149,57 +722,159 @@ def run_pipeline(
                 report_progress(f"No schema match {idx}/{total_docs} • {filename}")
             else:
                 report_progress(f"Extracting {idx}/{total_docs} • {filename}")
-                try:
-                    if vote_runs > 1:
-                        votes: list[dict[str, Any]] = []
-                        for _ in range(vote_runs):
-                            extraction = extract_metadata(
-                                images_for_llm,
-                                schema_for_doc.fields,
-                                ocr_text=ocr_text,
-                                with_confidence=False,
-                                system_prompt=options.extraction_prompt,
-                            )
-                            votes.append(extraction.get("metadata", {}))
-                        field_names = [field.name for field in schema_for_doc.fields]
-                        extracted, field_confidence = aggregate_votes(
-                            votes, field_names
-                        )
-                        if not options.compute_confidence:
-                            field_confidence = {}
+                extraction = None
+                if speculation.get("label") == doc_type:
+                    future = speculation.pop("future")
+                    extraction = future.result()
+                    speculation["llm_calls"] = speculative_calls(future)
+                    if extraction and not extraction["errors"]:
+                        speculation["outcome"] = "hit"
                     else:
-                        extraction = extract_metadata(
-                            images_for_llm,
-                            schema_for_doc.fields,
-                            ocr_text=ocr_text,
-                            with_confidence=False,
-                            system_prompt=options.extraction_prompt,
-                        )
-                        extracted = extraction.get("metadata", {})
-                except Exception as exc:
-                    logger.error("Extraction failed for %s: %s", filename, exc)
-                    errors.append(str(exc))
-
-        preview_image = encode_preview(images)
-        documents.append(
-            RunDocument(
-                filename=filename,
-                document_type=doc_type,
-                document_type_original=doc_type,
-                document_type_corrected=doc_type,
-                confidence=confidence,
-                extracted=extracted,
-                corrected=extracted.copy(),
-                preview_image=preview_image,
-                field_confidence=field_confidence,
-                warnings=warnings,
-                errors=errors,
+                        speculation["outcome"] = "error"
+                        SPECULATIVE_WASTED_CALLS.inc(speculation["llm_calls"])
+                        extraction = None
+                if extraction is None:
+                    extraction = extract_schema(schema_for_doc)
+                keep_extraction(extraction)
+
+        if speculation:
+            future = speculation.pop("future", None)
+            if future is not None:
+                # The discarded run is not waited for; its calls are counted
+                # once it finishes, and are unknown here if it is still running.
+                speculation["outcome"] = "miss"
+                speculation["llm_calls"] = (
+                    speculative_calls(future) if future.done() else None
+                )
+                future.add_done_callback(
+                    lambda done: SPECULATIVE_WASTED_CALLS.inc(speculative_calls(done))
+                )
+            SPECULATIVE_EXTRACTIONS.inc(
+                source=speculation["source"], outcome=speculation["outcome"]
+            )
+            logs.append(
+                f"Speculative extraction of {filename} as {speculation['label']}: "
+                f"{speculation['outcome']}"
+            )
+        if speculator is not None:
+            speculator.shutdown(wait=False)
+
+        preview_path = None
+        with recorder.span("persist") as persist_span:
+            encoded_preview = (
+                encode_preview_image(preview) if preview is not None else None
             )
+            if encoded_preview:
+                persist_span.payload_bytes = len(encoded_preview[0])
+                preview_path = run_store.save_preview(run_id, idx, *encoded_preview)
+        document = RunDocument(
+            filename=filename,
+            document_type=doc_type,
+            document_type_original=doc_type,
+            document_type_corrected=doc_type,
+            routed_by=routed_by,
+            confidence=confidence,
+            extracted=extracted,
+            corrected=extracted.copy(),
+            preview_path=preview_path,
+            field_confidence=field_confidence,
+            field_pages=field_pages,
+            pages_used=pages_used,
+            speculation=speculation,
+            warnings=warnings,
+            errors=errors,
+            duration_s=round(time.perf_counter() - doc_started, 3),
+            spans=recorder.to_list(),
+            text_tokens=text_tokens,
+        )
+        report_document_done(filename)
+        return document, logs
+
+    pending_docs = total_docs
+
+    def run_document(
+        item: tuple[int, dict[str, Any]],
+    ) -> tuple[RunDocument, list[str]] | None:
+        nonlocal pending_docs
+        with progress_lock:
+            pending_docs -= 1
+        PIPELINE_DOCS_PENDING.dec()
+        with PIPELINE_DOCS_IN_FLIGHT.track_inprogress(), profiled(profiler):
+            result = process_document(*item)
+        if result is not None:
+            document = result[0]
+            PIPELINE_DOCUMENT_SECONDS.observe(document.duration_s or 0.0)
+            if document.errors:
+                outcome = "error"
+            elif document.warnings:
+                outcome = "warning"
+            else:
+                outcome = "ok"
+            PIPELINE_DOCUMENTS.inc(outcome=outcome)
+        return result
+
+    write_progress("running", "Starting pipeline")
+    indexed_files = list(enumerate(files, start=1))
+    PIPELINE_DOCS_PENDING.inc(total_docs)
+    try:
+        if options.max_workers > 1 and total_docs > 1:
+            with ThreadPoolExecutor(
+                max_workers=min(options.max_workers, total_docs)
+            ) as executor:
+                results = list(executor.map(run_document, indexed_files))
+        else:
+            results = [run_document(item) for item in indexed_files]
+    except BaseException:
+        if profiler is not None:
+            profiler.finish(run_store.profile_dir(run_id))
+        raise
+    finally:
+        PIPELINE_DOCS_PENDING.dec(pending_docs)
+
+    finished = [result for result in results if result is not None]
+    documents = [document for document, _ in finished]
+    logs = [line for _, doc_logs in finished for line in doc_logs]
+    status = "cancelled" if len(finished) < total_docs else "completed"
+    if status == "cancelled":
+        logs.append(f"Run cancelled after {len(finished)}/{total_docs} documents")
+    routed = [doc.routed_by for doc in documents]
+    local = routed.count("fingerprint") + routed.count("preclassifier")
+    classified = local + routed.count("llm") + routed.count("combined")
+    if (preclassifier or fingerprint_index) is not None and classified:
+        logs.append(
+            f"Routed {local}/{classified} classified documents without LLM calls "
+            f"({routed.count('fingerprint')} by layout fingerprint, "
+            f"{routed.count('preclassifier')} by pre-classifier)"
+        )
+    if use_combined and routed.count("combined"):
+        logs.append(
+            f"Classified {routed.count('combined')}/{classified} documents "
+            "in a combined classify-and-extract call"
+        )
+    speculated = [doc.speculation for doc in documents if doc.speculation]
+    if speculated:
+        hits = sum(1 for item in speculated if item["outcome"] == "hit")
+        wasted = sum(
+            item["llm_calls"] or 0 for item in speculated if item["outcome"] != "hit"
+        )
+        unsettled = sum(1 for item in speculated if item["llm_calls"] is None)
+        logs.append(
+            f"Speculative extraction: {hits}/{len(speculated)} hits, "
+            f"{wasted} LLM calls discarded"
+            + (f" ({unsettled} discarded runs still finishing)" if unsettled else "")
+        )
+    if options.combined and not use_combined:
+        logs.append(
+            f"Combined classify-and-extract skipped: {combined_fields} candidate "
+            f"fields (max {COMBINED_MAX_FIELDS})"
         )
+    if profiler is not None:
+        artifacts = profiler.finish(run_store.profile_dir(run_id))
+        logs.append(f"Profile artifacts written: {', '.join(artifacts) or 'none'}")
 
     run = ExtractionRun(
         run_id=run_id,
-        started_at=datetime.now(timezone.utc).isoformat(),
+        started_at=started_at,
         schema_name=(
             schema_name
             if schema_name is not None
@@ -207,7 +882,11 @@ def run_pipeline(
         ),
         mode="Accurate",
         documents=documents,
+        status=status,
         logs=logs,
+        config=config,
     )
     run_store.save(run)
+    PIPELINE_RUNS.inc(status=status)
+    write_progress(status, f"Run {status}")
     return run
@@ -0,0 +1,135 @@
+"""
+Split wide schemas into field groups extracted by concurrent requests.
+
+Fields with a declared ``group`` are always extracted together. The remaining
+fields are packed in schema order into shards of at most ``max_weight``, where
+nested ``object``/``array`` fields weigh more because their completions are
+longer. Shorter completions per call cut latency and truncation failures.
+"""
+
+from __future__ import annotations
+
+import math
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Any
+
+from PIL import Image
+
+from src.domain.models import SchemaField
+from src.logging import get_logger
+from src.pipeline.extraction import EXTRACT_TEXT_TOKENS, extract_metadata
+
+
+logger = get_logger(__name__)
+
+NESTED_FIELD_WEIGHT = 3
+NESTED_FIELD_TYPES = {"object", "array"}
+
+
+def field_weight(field: SchemaField) -> int:
+    return NESTED_FIELD_WEIGHT if field.field_type in NESTED_FIELD_TYPES else 1
+
+
+def shard_fields(
+    fields: list[SchemaField], max_weight: int | None
+) -> list[list[SchemaField]]:
+    """Group ``fields`` into shards; declared groups first, in schema order.
+
+    Without ``max_weight`` only declared groups are split out and all other
+    fields stay together. Auto shards are balanced so that e.g. 61 fields at a
+    limit of 30 become 21/20/20 rather than 30/30/1.
+    """
+    declared: dict[str, list[SchemaField]] = {}
+    ungrouped: list[SchemaField] = []
+    for field in fields:
+        if field.group:
+            declared.setdefault(field.group, []).append(field)
+        else:
+            ungrouped.append(field)
+
+    shards = list(declared.values())
+    if not ungrouped:
+        return shards
+    total = sum(field_weight(field) for field in ungrouped)
+    if not max_weight or total <= max_weight:
+        return [*shards, ungrouped]
+
+    target = math.ceil(total / math.ceil(total / max_weight))
+    current: list[SchemaField] = []
+    weight = 0
+    for field in ungrouped:
+        if current and weight + field_weight(field) > target:
+            shards.append(current)
+            current, weight = [], 0
+        current.append(field)
+        weight += field_weight(field)
+    if current:
+        shards.append(current)
+    return shards
+
+
+def extract_sharded(
+    images: list[Image.Image],
+    shards: list[list[SchemaField]],
+    *,
+    ocr_text: str | None = None,
+    with_confidence: bool = False,
+    system_prompt: str | None = None,
+    max_text_tokens: int | None = EXTRACT_TEXT_TOKENS,
+    max_workers: int = 4,
+) -> dict[str, Any]:
+    """Run one ``extract_metadata`` call per shard and merge the results.
+
+    Keys a shard returns for fields outside it are dropped. Fields of a failed
+    shard are left empty and reported in ``failed_fields``; the call only
+    raises when every shard fails.
+    """
+
+    def _extract(shard: list[SchemaField]) -> dict[str, Any]:
+        return extract_metadata(
+            images,
+            shard,
+            ocr_text=ocr_text,
+            with_confidence=with_confidence,
+            system_prompt=system_prompt,
+            max_text_tokens=max_text_tokens,
+        )
+
+    worker_count = max(1, min(max_workers, len(shards)))
+    with ThreadPoolExecutor(
+        max_workers=worker_count, thread_name_prefix="extractly-shard"
+    ) as executor:
+        # Copied contexts keep the calls inside the caller's tracing span.
+        futures = [
+            executor.submit(copy_context().run, _extract, shard) for shard in shards
+        ]
+
+    metadata: dict[str, Any] = {}
+    confidence: dict[str, float] = {}
+    failed_fields: list[str] = []
+    errors: list[str] = []
+    for shard, future in zip(shards, futures):
+        names = [field.name for field in shard]
+        try:
+            result = future.result()
+        except Exception as exc:
+            logger.warning("Field shard %s failed: %s", names, exc)
+            errors.append(str(exc))
+            failed_fields.extend(names)
+            metadata.update({name: "" for name in names})
+            continue
+        shard_metadata = result.get("metadata") or {}
+        shard_confidence = result.get("confidence") or {}
+        for name in names:
+            metadata[name] = shard_metadata.get(name, "")
+            if name in shard_confidence:
+                confidence[name] = shard_confidence[name]
+    if errors and len(errors) == len(shards):
+        raise RuntimeError(f"All {len(shards)} field shards failed: {errors[0]}")
+    return {
+        "metadata": metadata,
+        "confidence": confidence,
+        "shards": len(shards),
+        "failed_fields": failed_fields,
+    }
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import marshal
+import pstats
+import random
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import TYPE_CHECKING, ContextManager, Iterator
+
+from src.domain.storage import write_bytes_atomic
+from src.logging import get_logger
+
+if TYPE_CHECKING:
+    from src.config import AppConfig
+
+
+logger = get_logger(__name__)
+
+PROFILE_MODES = {"off", "cpu", "memory", "all"}
+CPU_STATS_FILENAME = "cpu.pstats"
+CPU_REPORT_FILENAME = "cpu.txt"
+MEMORY_REPORT_FILENAME = "memory.txt"
+
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+
+
+def _start_tracemalloc(frames: int) -> None:
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        _tracemalloc_users += 1
+
+
+def _stop_tracemalloc() -> None:
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0:
+            tracemalloc.stop()
+
+
+class RunProfiler:
+    """cProfile and tracemalloc capture for one run.
+
+    cProfile only observes the thread that enabled it, so every thread doing work
+    for the run enters ``profile()`` and the per-thread profiles are merged when
+    the report is written. tracemalloc is process-wide; concurrent profiled runs
+    share one trace and each report covers everything allocated meanwhile.
+
+    On Python 3.12+ only one cProfile profiler can be active per interpreter; a
+    thread that cannot enable its own is counted, logged and noted in the report.
+    """
+
+    def __init__(self, *, cpu: bool, memory: bool, top_n: int = 40, frames: int = 1):
+        self.cpu = cpu
+        self.memory = memory
+        self.top_n = top_n
+        self.frames = frames
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._profiles: list[cProfile.Profile] = []
+        self._skipped_threads = 0
+        self._memory_started = False
+        self._finished = False
+
+    def _ensure_memory(self) -> None:
+        with self._lock:
+            if self.memory and not self._memory_started and not self._finished:
+                _start_tracemalloc(self.frames)
+                self._memory_started = True
+
+    @contextmanager
+    def profile(self) -> Iterator[None]:
+        self._ensure_memory()
+        if not self.cpu or getattr(self._local, "active", False):
+            yield
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as exc:
+            # Another profiler already owns this interpreter's profiling slot;
+            # this thread's work is only in that profiler's report, if any.
+            with self._lock:
+                self._skipped_threads += 1
+            logger.warning(
+                "CPU profiling skipped for thread %s: %s",
+                threading.current_thread().name,
+                exc,
+            )
+            yield
+            return
+        self._local.active = True
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._local.active = False
+            with self._lock:
+                self._profiles.append(profile)
+
+    def _cpu_report(self) -> tuple[bytes, str] | None:
+        with self._lock:
+            profiles = list(self._profiles)
+            skipped = self._skipped_threads
+        if not profiles:
+            return None
+        text = io.StringIO()
+        text.write(f"Merged from {len(profiles)} thread profile(s)\n")
+        if skipped:
+            text.write(
+                f"{skipped} thread(s) were not profiled: another cProfile "
+                "profiler was already active\n"
+            )
+        stats = pstats.Stats(profiles[0], stream=text)
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top_n)
+        # Same payload as Stats.dump_stats, so pstats/snakeviz can load the file.
+        return marshal.dumps(stats.stats), text.getvalue()
+
+    def _memory_report(self) -> str | None:
+        if not self._memory_started:
+            return None
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            ]
+        )
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [
+            f"Traced memory: current {current / 1024**2:.1f} MB, "
+            f"peak {peak / 1024**2:.1f} MB",
+            f"Top {self.top_n} allocation sites by size:",
+        ]
+        key_type = "traceback" if self.frames > 1 else "lineno"
+        for stat in snapshot.statistics(key_type)[: self.top_n]:
+            frame = stat.traceback[-1]
+            lines.append(
+                f"{stat.size / 1024:10.1f} KiB {stat.count:8d} blocks  "
+                f"{frame.filename}:{frame.lineno}"
+            )
+            if self.frames > 1:
+                lines.extend(f"    {line}" for line in stat.traceback.format())
+        return "\n".join(lines) + "\n"
+
+    def stop(self) -> None:
+        """Release tracemalloc without writing reports; safe to call repeatedly."""
+        with self._lock:
+            if self._memory_started and not self._finished:
+                _stop_tracemalloc()
+            self._finished = True
+
+    def finish(self, out_dir: Path) -> list[str]:
+        """Write the reports into ``out_dir`` and return the written filenames."""
+        written: list[str] = []
+        # Snapshot memory first so building the CPU report is not attributed.
+        memory_report = self._memory_report()
+        cpu_report = self._cpu_report() if self.cpu else None
+        self.stop()
+        if cpu_report is not None:
+            write_bytes_atomic(out_dir / CPU_STATS_FILENAME, cpu_report[0])
+            write_bytes_atomic(
+                out_dir / CPU_REPORT_FILENAME, cpu_report[1].encode("utf-8")
+            )
+            written.extend([CPU_STATS_FILENAME, CPU_REPORT_FILENAME])
+        if memory_report is not None:
+            write_bytes_atomic(
+                out_dir / MEMORY_REPORT_FILENAME, memory_report.encode("utf-8")
+            )
+            written.append(MEMORY_REPORT_FILENAME)
+        return written
+
+
+def start_profiler(config: AppConfig) -> RunProfiler | None:
+    """Return a profiler for this run, or ``None`` when profiling is off or the
+    run is not sampled."""
+    mode = config.profile_mode
+    if mode not in PROFILE_MODES:
+        raise ValueError(
+            f"Unsupported EXTRACTLY_PROFILE '{mode}'. "
+            f"Use one of: {', '.join(sorted(PROFILE_MODES))}."
+        )
+    if mode == "off" or random.random() >= config.profile_sample_rate:
+        return None
+    return RunProfiler(
+        cpu=mode in {"cpu", "all"},
+        memory=mode in {"memory", "all"},
+        top_n=config.profile_top_n,
+        frames=config.profile_memory_frames,
+    )
+
+
+def profiled(profiler: RunProfiler | None) -> ContextManager[None]:
+    return profiler.profile() if profiler is not None else nullcontext()
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Any, Iterator
+
+
+@dataclass
+class Span:
+    name: str
+    start_s: float = 0.0
+    duration_s: float = 0.0
+    llm_calls: int = 0
+    attempts: int = 0
+    retries: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    payload_bytes: int = 0
+    error: str | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class SpanRecorder:
+    """Collects the stage spans of one document; offsets are relative to creation."""
+
+    def __init__(self) -> None:
+        self.origin = time.perf_counter()
+        self.spans: list[Span] = []
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[Span]:
+        current = Span(name=name, start_s=round(time.perf_counter() - self.origin, 4))
+        token = _current_span.set(current)
+        started = time.perf_counter()
+        try:
+            yield current
+        except Exception as exc:
+            current.error = str(exc)
+            raise
+        finally:
+            current.duration_s = round(time.perf_counter() - started, 4)
+            _current_span.reset(token)
+            self.spans.append(current)
+
+    def add(self, name: str, duration_s: float, **values: Any) -> Span:
+        current = Span(name=name, duration_s=round(duration_s, 4), **values)
+        self.spans.append(current)
+        return current
+
+    def to_list(self) -> list[dict[str, Any]]:
+        return [span.to_dict() for span in self.spans]
+
+
+_current_span: ContextVar[Span | None] = ContextVar("extractly_span", default=None)
+# Calls fanned out to worker threads (see long_document) share the caller's span.
+_span_lock = threading.Lock()
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+def message_payload_bytes(messages: list[dict[str, Any]]) -> int:
+    total = 0
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            total += len(content)
+            continue
+        for part in content or []:
+            if part.get("type") == "image_url":
+                total += len(part.get("image_url", {}).get("url", ""))
+            else:
+                total += len(part.get("text", ""))
+    return total
+
+
+def record_llm_call(
+    *, attempts: int, usage: Any = None, payload_bytes: int = 0
+) -> None:
+    span = _current_span.get()
+    if span is None:
+        return
+    with _span_lock:
+        span.llm_calls += 1
+        span.attempts += attempts
+        span.retries += max(attempts - 1, 0)
+        span.payload_bytes += payload_bytes
+        if usage is None:
+            return
+        span.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+        span.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        span.cached_tokens += getattr(details, "cached_tokens", 0) or 0
+
+
+def summarize_spans(documents: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    totals: dict[str, dict[str, Any]] = {}
+    for document in documents:
+        for span in document.get("spans") or []:
+            row = totals.setdefault(
+                span["name"],
+                {
+                    "stage": span["name"],
+                    "count": 0,
+                    "total_s": 0.0,
+                    "max_s": 0.0,
+                    "llm_calls": 0,
+                    "retries": 0,
+                    "prompt_tokens": 0,
+                    "completion_tokens": 0,
+                    "cached_tokens": 0,
+                    "payload_mb": 0.0,
+                    "errors": 0,
+                },
+            )
+            row["count"] += 1
+            row["total_s"] += span.get("duration_s", 0.0)
+            row["max_s"] = max(row["max_s"], span.get("duration_s", 0.0))
+            row["llm_calls"] += span.get("llm_calls", 0)
+            row["retries"] += span.get("retries", 0)
+            row["prompt_tokens"] += span.get("prompt_tokens", 0)
+            row["completion_tokens"] += span.get("completion_tokens", 0)
+            row["cached_tokens"] += span.get("cached_tokens", 0)
+            row["payload_mb"] += span.get("payload_bytes", 0) / 1024**2
+            row["errors"] += 1 if span.get("error") else 0
+    for row in totals.values():
+        row["total_s"] = round(row["total_s"], 3)
+        row["max_s"] = round(row["max_s"], 3)
+        row["payload_mb"] = round(row["payload_mb"], 2)
+    return sorted(totals.values(), key=lambda row: row["total_s"], reverse=True)
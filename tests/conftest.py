@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import io
+import threading
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+import src.config
+from src.api.server import IngestionApi, IngestionServer, bind_socket
+from src.config import AppConfig, reload_config
+from src.integrations.mock_openai import MockOpenAIServer, start_mock_server
+
+
+@dataclass
+class ApiHarness:
+    config: AppConfig
+    api: IngestionApi
+    server: IngestionServer
+    llm: MockOpenAIServer
+
+    @property
+    def address(self) -> tuple[str, int]:
+        return self.server.server_address[:2]
+
+
+def png_bytes(color: str = "white") -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def api_harness(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> Iterator[ApiHarness]:
+    """Ingestion API on a free port, backed by the mock OpenAI server."""
+    llm = start_mock_server()
+    monkeypatch.setattr(src.config, "DOTENV_PATH", tmp_path / "missing.env")
+    for name, value in {
+        "OPENAI_API_KEY": "test-key",
+        "OPENAI_BASE_URL": llm.base_url,
+        "EXTRACTLY_LLM_BACKEND": "live",
+        "EXTRACTLY_MAX_RETRIES": "0",
+        "EXTRACTLY_RUNS_DIR": str(tmp_path / "runs"),
+        "EXTRACTLY_QUEUE_DB": str(tmp_path / "queue.sqlite3"),
+        "EXTRACTLY_SPOOL_DIR": str(tmp_path / "spool"),
+        "EXTRACTLY_API_MAX_UPLOAD_MB": "1",
+        "EXTRACTLY_PROFILE": "off",
+    }.items():
+        monkeypatch.setenv(name, value)
+    config = reload_config()
+    api = IngestionApi(config)
+    server = IngestionServer(api, bind_socket("127.0.0.1", 0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield ApiHarness(config=config, api=api, server=server, llm=llm)
+    finally:
+        server.shutdown()
+        server.server_close()
+        llm.shutdown()
+        llm.server_close()
+        monkeypatch.undo()
+        reload_config()
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import http.client
+import json
+import socket
+from typing import Any
+
+from src.jobs.queue import STATUS_DONE
+from src.jobs.worker import worker_loop
+from tests.conftest import ApiHarness, png_bytes
+
+
+def request(
+    harness: ApiHarness,
+    method: str,
+    path: str,
+    body: bytes | None = None,
+    headers: dict[str, str] | None = None,
+) -> tuple[int, dict[str, str], bytes]:
+    conn = http.client.HTTPConnection(*harness.address, timeout=10)
+    try:
+        conn.request(method, path, body=body, headers=headers or {})
+        response = conn.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        conn.close()
+
+
+def post_job(
+    harness: ApiHarness, body: bytes, query: str = "filename=scan.png", **headers: str
+) -> tuple[int, dict[str, Any]]:
+    status, _, data = request(
+        harness,
+        "POST",
+        f"/v1/jobs?{query}",
+        body,
+        {"Content-Type": "application/octet-stream", **headers},
+    )
+    return status, json.loads(data)
+
+
+def raw_request(harness: ApiHarness, head: str, body: bytes = b"") -> tuple[int, dict]:
+    """Send a hand-written request so headers like Content-Length can be omitted."""
+    with socket.create_connection(harness.address, timeout=10) as sock:
+        sock.sendall(head.encode("latin-1") + b"\r\n" + body)
+        response = http.client.HTTPResponse(sock)
+        response.begin()
+        return response.status, json.loads(response.read())
+
+
+def test_accepted_job_runs_to_a_result(api_harness: ApiHarness) -> None:
+    status, job = post_job(api_harness, png_bytes())
+    assert status == 202
+    assert job["status"] == "queued"
+    assert job["replayed"] is False
+
+    status, _, data = request(api_harness, "GET", job["links"]["result"])
+    assert status == 409
+    assert json.loads(data)["status"] == "queued"
+
+    assert worker_loop(api_harness.config.queue_db_path, max_jobs=1) == 1
+
+    status, _, data = request(api_harness, "GET", job["links"]["self"])
+    assert status == 200
+    assert json.loads(data)["status"] == STATUS_DONE
+
+    status, _, data = request(api_harness, "GET", job["links"]["result"])
+    assert status == 200
+    result = json.loads(data)
+    assert result["job_id"] == job["job_id"]
+    assert [doc["filename"] for doc in result["documents"]] == ["scan.png"]
+    assert api_harness.llm.stats.requests > 0
+
+
+def test_missing_content_length_is_rejected(api_harness: ApiHarness) -> None:
+    status, body = raw_request(
+        api_harness,
+        "POST /v1/jobs?filename=scan.png HTTP/1.1\r\nHost: test\r\n"
+        "Connection: close\r\n",
+    )
+    assert status == 411
+    assert "Content-Length" in body["error"]
+
+
+def test_oversized_upload_is_rejected(api_harness: ApiHarness) -> None:
+    too_large = api_harness.api.max_upload_bytes + 1
+    status, body = raw_request(
+        api_harness,
+        "POST /v1/jobs?filename=scan.png HTTP/1.1\r\nHost: test\r\n"
+        f"Content-Length: {too_large}\r\nConnection: close\r\n",
+    )
+    assert status == 413
+    assert "limit" in body["error"]
+    assert api_harness.api.queue.counts() == {}
+
+
+def test_chunked_upload_is_rejected(api_harness: ApiHarness) -> None:
+    data = png_bytes()
+    chunked = f"{len(data):x}\r\n".encode() + data + b"\r\n0\r\n\r\n"
+    status, body = raw_request(
+        api_harness,
+        "POST /v1/jobs?filename=scan.png HTTP/1.1\r\nHost: test\r\n"
+        "Transfer-Encoding: chunked\r\nConnection: close\r\n",
+        chunked,
+    )
+    assert status == 411
+    assert "Chunked" in body["error"]
+
+
+def test_same_content_replays_the_job(api_harness: ApiHarness) -> None:
+    data = png_bytes()
+    first_status, first = post_job(api_harness, data)
+    second_status, second = post_job(api_harness, data)
+    assert (first_status, second_status) == (202, 200)
+    assert second["job_id"] == first["job_id"]
+    assert second["replayed"] is True
+
+
+def test_replay_of_a_finished_job_keeps_no_spool_file(api_harness: ApiHarness) -> None:
+    data = png_bytes()
+    _, first = post_job(api_harness, data)
+    assert worker_loop(api_harness.config.queue_db_path, max_jobs=1) == 1
+    assert list(api_harness.config.spool_dir.iterdir()) == []
+
+    status, replay = post_job(api_harness, data)
+    assert status == 200
+    assert replay["job_id"] == first["job_id"]
+    assert replay["status"] == STATUS_DONE
+    assert list(api_harness.config.spool_dir.iterdir()) == []
+
+
+def test_idempotency_key_replays_and_rejects_other_content(
+    api_harness: ApiHarness,
+) -> None:
+    status, first = post_job(api_harness, png_bytes(), **{"Idempotency-Key": "abc"})
+    assert status == 202
+    status, replay = post_job(api_harness, png_bytes(), **{"Idempotency-Key": "abc"})
+    assert status == 200
+    assert replay["job_id"] == first["job_id"]
+
+    status, body = post_job(
+        api_harness, png_bytes("black"), **{"Idempotency-Key": "abc"}
+    )
+    assert status == 422
+    assert "Idempotency-Key" in body["error"]
+    spooled = sorted(api_harness.config.spool_dir.iterdir())
+    assert [path.stem for path in spooled] == [first["sha256"]]
+
+
+def test_metrics_endpoint(api_harness: ApiHarness) -> None:
+    post_job(api_harness, png_bytes())
+    status, headers, data = request(api_harness, "GET", "/metrics")
+    assert status == 200
+    assert headers["Content-Type"].startswith("text/plain")
+    assert b"extractly_job_queue_depth" in data
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import pytest
+
+import src.pipeline.budget as budget_module
+from src.pipeline.budget import (
+    OMISSION_MARKER,
+    PAGE_BREAK,
+    compact_text,
+    estimate_tokens,
+    fit_text,
+    keywords_from,
+)
+
+
+def make_document() -> str:
+    paragraphs = ["ACME Corp Invoice\nIssued by ACME Corp, 1 Main Street"]
+    for idx in range(40):
+        paragraphs.append(f"Section {idx}\n" + "lorem ipsum dolor sit amet " * 20)
+    paragraphs.insert(25, "Invoice number INV-42\nTotal amount due 1,200.00")
+    return "\n\n".join(paragraphs)
+
+
+@pytest.mark.parametrize("max_tokens", [60, 150, 400, 1000])
+def test_fit_text_stays_within_budget(max_tokens: int) -> None:
+    budgeted = fit_text(make_document(), max_tokens, chunk_tokens=50)
+    assert budgeted.tokens <= max_tokens
+    assert budgeted.tokens == estimate_tokens(budgeted.text)
+    assert budgeted.saved_tokens > 0
+
+
+def test_fit_text_keeps_the_first_chunk_and_keyword_hits() -> None:
+    keywords = keywords_from(["invoice_number", "TotalAmount"])
+    budgeted = fit_text(make_document(), 150, keywords=keywords, chunk_tokens=50)
+
+    assert budgeted.text.startswith("ACME Corp Invoice")
+    assert "INV-42" in budgeted.text
+    assert OMISSION_MARKER in budgeted.text
+    assert budgeted.chunks_kept < budgeted.chunks_total
+
+
+def test_oversized_single_chunk_is_truncated_to_budget() -> None:
+    text = "".join(str(idx % 10) for idx in range(5000))
+    budgeted = fit_text(text, 100)
+    assert 0 < budgeted.tokens <= 100
+    assert text.startswith(budgeted.text)
+
+
+def test_truncation_respects_a_denser_tokenizer(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # tiktoken often spends a token on every one or two digits.
+    monkeypatch.setattr(budget_module, "estimate_tokens", lambda text: len(text) // 2)
+    budgeted = fit_text("7" * 5000, 100)
+    assert 0 < budgeted.tokens <= 100
+
+
+def test_no_budget_only_compacts() -> None:
+    budgeted = fit_text("a   b\n\n\n\nc", None)
+    assert budgeted.text == "a b\n\nc"
+    assert budgeted.chunks_total == 0
+
+
+def test_compact_text_keeps_running_headers_once() -> None:
+    bodies = ["Bill to Globex", "Ship to Initech", "Line items", "Totals"]
+    pages = [f"ACME Corp - Page {idx}\n{body}" for idx, body in enumerate(bodies)]
+    compacted = compact_text(PAGE_BREAK.join(pages))
+
+    assert compacted.count("ACME Corp") == 1
+    assert all(body in compacted for body in bodies)
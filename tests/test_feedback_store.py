@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from src.domain.feedback_store import FeedbackStore
+
+
+def correction(doc_id: str, run_id: str, *fields: str) -> str:
+    return json.dumps(
+        {
+            "doc_id": doc_id,
+            "run_id": run_id,
+            "timestamp": f"2026-01-01T00:00:0{doc_id[-1]}",
+            "changed_fields": list(fields),
+        }
+    )
+
+
+def test_import_counts_corrections_runs_and_fields(tmp_path: Path) -> None:
+    store = FeedbackStore(tmp_path / "feedback.sqlite3")
+    lines = [correction("doc1", "run_a", "total"), "", correction("doc2", "run_a")]
+    assert store.import_jsonl(lines) == 2
+    assert store.stats() == {"corrections": 2, "runs": 1, "changed_fields": 1}
+
+
+@pytest.mark.parametrize("bad_line", ["{not json", "[1, 2]"])
+def test_import_writes_nothing_when_a_line_is_invalid(
+    tmp_path: Path, bad_line: str
+) -> None:
+    store = FeedbackStore(tmp_path / "feedback.sqlite3")
+    with pytest.raises(ValueError, match="Line 2"):
+        store.import_jsonl([correction("doc1", "run_a"), bad_line])
+    assert store.stats()["corrections"] == 0
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+import src.jobs.inbox as inbox_module
+from src.jobs.inbox import PROCESSED_DIRNAME, watch_inbox
+from src.jobs.queue import STATUS_DEAD, STATUS_QUEUED, JobQueue
+from tests.conftest import png_bytes
+
+
+def scan_inbox(inbox: Path, queue: JobQueue, spool_dir: Path) -> None:
+    """Run the watcher for the two passes a settled file needs, then stop."""
+    passes = iter(range(2))
+    watch_inbox(
+        inbox,
+        queue,
+        spool_dir,
+        extensions={".png", ".jpg"},
+        max_attempts=1,
+        settle_s=0.0,
+        poll_interval_s=0.0,
+        should_stop=lambda: next(passes, None) is None,
+    )
+
+
+def drop(inbox: Path, name: str, data: bytes) -> None:
+    inbox.mkdir(exist_ok=True)
+    (inbox / name).write_bytes(data)
+
+
+def finish(queue: JobQueue, job_id: str, status: str) -> None:
+    leased = queue.lease("test-worker")
+    assert leased is not None and leased.id == job_id
+    if status == STATUS_DEAD:
+        assert queue.fail(job_id, "test-worker", "boom") == STATUS_DEAD
+    else:
+        assert queue.complete(job_id, "test-worker", {"run_id": None})
+    Path(leased.payload["path"]).unlink()
+
+
+@pytest.fixture
+def queue(tmp_path: Path) -> JobQueue:
+    return JobQueue(tmp_path / "queue.sqlite3")
+
+
+@pytest.mark.parametrize("status", ["done", STATUS_DEAD])
+def test_redropped_file_is_reprocessed_after_its_job_finished(
+    tmp_path: Path, queue: JobQueue, status: str
+) -> None:
+    inbox, spool_dir = tmp_path / "inbox", tmp_path / "spool"
+    drop(inbox, "scan.png", png_bytes())
+    scan_inbox(inbox, queue, spool_dir)
+    (first,) = queue.list_jobs()
+    finish(queue, first.id, status)
+
+    drop(inbox, "scan.png", png_bytes())
+    scan_inbox(inbox, queue, spool_dir)
+
+    jobs = {job.id: job for job in queue.list_jobs()}
+    assert len(jobs) == 2
+    (second,) = [job for job in jobs.values() if job.id != first.id]
+    assert second.status == STATUS_QUEUED
+    assert Path(second.payload["path"]).exists()
+    assert len(list((inbox / PROCESSED_DIRNAME).iterdir())) == 2
+
+
+def test_redropped_file_joins_its_pending_job(tmp_path: Path, queue: JobQueue) -> None:
+    inbox, spool_dir = tmp_path / "inbox", tmp_path / "spool"
+    drop(inbox, "scan.png", png_bytes())
+    scan_inbox(inbox, queue, spool_dir)
+    # Same content under another extension spools to a second file.
+    drop(inbox, "scan_copy.jpg", png_bytes())
+    scan_inbox(inbox, queue, spool_dir)
+
+    (job,) = queue.list_jobs()
+    assert job.status == STATUS_QUEUED
+    assert [path.name for path in spool_dir.iterdir()] == [
+        Path(job.payload["path"]).name
+    ]
+
+
+def test_file_vanishing_mid_scan_does_not_stop_the_watcher(
+    tmp_path: Path, queue: JobQueue, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    inbox, spool_dir = tmp_path / "inbox", tmp_path / "spool"
+    drop(inbox, "gone.png", png_bytes("black"))
+    drop(inbox, "kept.png", png_bytes())
+    real_spool_path = inbox_module.spool_path
+
+    def flaky_spool_path(directory: Path, path: Path) -> tuple[Path, str]:
+        if path.name == "gone.png":
+            path.unlink()
+        return real_spool_path(directory, path)
+
+    monkeypatch.setattr(inbox_module, "spool_path", flaky_spool_path)
+    scan_inbox(inbox, queue, spool_dir)
+
+    (job,) = queue.list_jobs()
+    assert job.payload["filename"] == "kept.png"
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from src.pipeline.long_document import WindowResult, page_windows, reduce_windows
+
+
+def test_page_windows_cover_every_page() -> None:
+    assert page_windows(7, 3) == [(0, 3), (3, 6), (6, 7)]
+
+
+def test_source_page_is_the_page_containing_the_value() -> None:
+    window = WindowResult(
+        start=4,
+        end=8,
+        metadata={"total": "1 200,00"},
+        page_texts=["cover", "terms", "Total due:\n1  200,00 EUR", "notes"],
+    )
+    _, _, pages = reduce_windows([window], ["total"], "first")
+    assert pages == {"total": [7]}
+
+
+def test_unlocated_value_reports_every_window_page() -> None:
+    window = WindowResult(start=0, end=3, metadata={"parties": ["A", "B"]})
+    _, _, pages = reduce_windows([window], ["parties"], "first")
+    assert pages == {"parties": [1, 2, 3]}
+
+
+def test_majority_picks_the_most_frequent_value() -> None:
+    windows = [
+        WindowResult(start=0, end=2, metadata={"id": "X-1"}),
+        WindowResult(start=2, end=4, metadata={"id": "X-2"}),
+        WindowResult(start=4, end=6, metadata={"id": "X-2"}),
+    ]
+    merged, confidence, _ = reduce_windows(windows, ["id"], "majority")
+    assert merged == {"id": "X-2"}
+    assert confidence["id"] == 2 / 3
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from src.pipeline.preclassifier import PreClassifier, text_features
+
+TEXTS = {
+    "Invoice": "Invoice number {n} amount due payment terms net 30 bill to",
+    "Receipt": "Receipt thank you for shopping cashier change given card {n}",
+}
+
+
+def record_examples(
+    preclassifier: PreClassifier, label: str, count: int, offset: int = 0
+) -> None:
+    for n in range(offset, offset + count):
+        preclassifier.record(
+            f"{label}-{n}",
+            text_features(TEXTS[label].format(n=n)),
+            routed_by="llm",
+            label=label,
+        )
+
+
+@pytest.fixture
+def preclassifier(tmp_path: Path) -> PreClassifier:
+    return PreClassifier(tmp_path / "preclassifier", min_examples=3)
+
+
+def test_train_needs_two_labels(preclassifier: PreClassifier) -> None:
+    record_examples(preclassifier, "Invoice", 5)
+    assert preclassifier.train() is None
+    assert preclassifier.current_version() is None
+    assert preclassifier.predict(text_features("Invoice number 1")) is None
+
+
+def test_trained_model_is_activated_and_predicts(preclassifier: PreClassifier) -> None:
+    record_examples(preclassifier, "Invoice", 5)
+    record_examples(preclassifier, "Receipt", 5)
+
+    model = preclassifier.train()
+
+    assert model is not None and model.version == 1
+    assert preclassifier.current_version() == 1
+    prediction = preclassifier.predict(text_features(TEXTS["Receipt"].format(n=99)))
+    assert prediction is not None
+    assert prediction.label == "Receipt"
+    assert prediction.supported
+    assert prediction.confidence > 0.5
+    # Nothing new to learn from.
+    assert preclassifier.train() is None
+
+
+def test_retrain_scores_new_examples_and_activate_rolls_back(
+    preclassifier: PreClassifier,
+) -> None:
+    record_examples(preclassifier, "Invoice", 5)
+    record_examples(preclassifier, "Receipt", 5)
+    preclassifier.train()
+    record_examples(preclassifier, "Invoice", 2, offset=100)
+
+    model = preclassifier.train()
+
+    assert model is not None and model.version == 2
+    assert model.new_examples == 2
+    assert model.new_example_accuracy == 1.0
+    assert preclassifier.list_versions() == [1, 2]
+
+    preclassifier.activate(1)
+    assert preclassifier.current_version() == 1
+    assert preclassifier.model().version == 1
+    with pytest.raises(ValueError, match="Unknown pre-classifier version"):
+        preclassifier.activate(7)
+
+
+def test_unsupported_label_is_flagged(tmp_path: Path) -> None:
+    preclassifier = PreClassifier(tmp_path / "preclassifier", min_examples=10)
+    record_examples(preclassifier, "Invoice", 5)
+    record_examples(preclassifier, "Receipt", 5)
+    preclassifier.train()
+
+    prediction = preclassifier.predict(text_features(TEXTS["Invoice"].format(n=1)))
+    assert prediction is not None and not prediction.supported
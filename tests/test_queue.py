@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from src.jobs.queue import (
+    STATUS_DEAD,
+    STATUS_DONE,
+    STATUS_LEASED,
+    STATUS_QUEUED,
+    JobQueue,
+)
+
+
+@pytest.fixture
+def queue(tmp_path: Path) -> JobQueue:
+    return JobQueue(tmp_path / "queue.sqlite3")
+
+
+def test_expired_lease_is_redelivered(queue: JobQueue) -> None:
+    job = queue.enqueue({"path": "a.pdf"})
+    first = queue.lease("worker-1", visibility_timeout_s=0.0)
+    assert first is not None and first.id == job.id
+
+    second = queue.lease("worker-2")
+    assert second is not None and second.id == job.id
+    assert second.attempts == 2
+    # The worker whose lease lapsed can no longer settle the job.
+    assert not queue.complete(job.id, "worker-1", {})
+    assert queue.complete(job.id, "worker-2", {"run_id": "run_x"})
+    assert queue.get(job.id).status == STATUS_DONE
+
+
+def test_live_lease_is_not_redelivered(queue: JobQueue) -> None:
+    queue.enqueue({"path": "a.pdf"})
+    assert queue.lease("worker-1") is not None
+    assert queue.lease("worker-2") is None
+
+
+def test_failed_job_is_retried_with_backoff(queue: JobQueue) -> None:
+    job = queue.enqueue({"path": "a.pdf"})
+    queue.lease("worker-1")
+
+    assert queue.fail(job.id, "worker-1", "boom", retry_backoff_s=60.0) == (
+        STATUS_QUEUED
+    )
+    retried = queue.get(job.id)
+    assert retried.last_error == "boom"
+    assert retried.available_at >= retried.updated_at + 60.0
+    assert queue.lease("worker-1") is None
+
+
+def test_job_is_dead_lettered_after_max_attempts(queue: JobQueue) -> None:
+    job = queue.enqueue({"path": "a.pdf"}, max_attempts=2)
+    statuses = []
+    for _ in range(2):
+        leased = queue.lease("worker-1")
+        assert leased is not None
+        statuses.append(queue.fail(job.id, "worker-1", "boom", retry_backoff_s=0.0))
+
+    assert statuses == [STATUS_QUEUED, STATUS_DEAD]
+    assert queue.lease("worker-1") is None
+    assert queue.requeue_dead(job.id)
+    assert queue.get(job.id).status == STATUS_QUEUED
+
+
+def test_expired_lease_on_last_attempt_is_dead_lettered(queue: JobQueue) -> None:
+    job = queue.enqueue({"path": "a.pdf"}, max_attempts=1)
+    queue.lease("worker-1", visibility_timeout_s=0.0)
+
+    assert queue.lease("worker-2") is None
+    dead = queue.get(job.id)
+    assert dead.status == STATUS_DEAD
+    assert dead.last_error == "Lease expired"
+
+
+def test_idempotency_key_deduplicates(queue: JobQueue) -> None:
+    job = queue.enqueue({"path": "a.pdf"}, idempotency_key="sha")
+    assert queue.enqueue({"path": "b.pdf"}, idempotency_key="sha").id == job.id
+
+    queue.lease("worker-1")
+    queue.complete(job.id, "worker-1", {})
+    assert queue.enqueue({"path": "b.pdf"}, idempotency_key="sha").id == job.id
+
+    fresh = queue.enqueue({"path": "b.pdf"}, idempotency_key="sha", active_only=True)
+    assert fresh.id != job.id
+    assert fresh.status == STATUS_QUEUED
+
+
+def test_queue_limit_caps_concurrent_leases(queue: JobQueue) -> None:
+    queue.set_queue_limit("ocr", 1)
+    queue.enqueue({"path": "a.pdf"}, queue="ocr")
+    queue.enqueue({"path": "b.pdf"}, queue="ocr")
+
+    assert queue.lease("worker-1").status == STATUS_LEASED
+    assert queue.lease("worker-2") is None
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from src.domain.retention import (
+    RetentionPolicy,
+    apply_retention,
+    find_archived_run,
+    restore_archived_run,
+)
+from src.domain.run_store import ExtractionRun, RunStore
+
+NOW = datetime(2026, 3, 1, tzinfo=timezone.utc)
+OLD_RUN = "run_20260101T000000Z_aaaaaa"
+RECENT_RUN = "run_20260228T000000Z_bbbbbb"
+
+
+def save_run(store: RunStore, run_id: str, status: str | None = None) -> Path:
+    store.save(
+        ExtractionRun(
+            run_id=run_id,
+            started_at="2026-01-01T00:00:00+00:00",
+            schema_name="Invoice",
+            mode="batch",
+            documents=[],
+        )
+    )
+    if status is not None:
+        store.write_progress(run_id, {"status": status})
+    return store.run_dir(run_id)
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> RunStore:
+    return RunStore(tmp_path / "runs")
+
+
+def test_only_finished_runs_past_the_cutoff_are_archived(
+    tmp_path: Path, store: RunStore
+) -> None:
+    save_run(store, OLD_RUN, "completed")
+    save_run(store, "run_20260102T000000Z_cccccc", "running")
+    save_run(store, "run_20260103T000000Z_dddddd", "queued")
+    save_run(store, RECENT_RUN)
+
+    report = apply_retention(
+        store, tmp_path / "archive", RetentionPolicy(archive_after_days=30), now=NOW
+    )
+
+    assert report.archived_runs == [OLD_RUN]
+    assert sorted(store.list_run_ids()) == [
+        "run_20260102T000000Z_cccccc",
+        "run_20260103T000000Z_dddddd",
+        RECENT_RUN,
+    ]
+    assert not (store.base_dir / "2026" / "01" / "01").exists()
+
+
+def test_size_cap_archives_oldest_runs_first(tmp_path: Path, store: RunStore) -> None:
+    save_run(store, OLD_RUN)
+    save_run(store, RECENT_RUN)
+    one_run = sum(path.stat().st_size for path in store.run_dir(RECENT_RUN).rglob("*"))
+
+    report = apply_retention(
+        store, tmp_path / "archive", RetentionPolicy(max_runs_bytes=one_run), now=NOW
+    )
+
+    assert report.archived_runs == [OLD_RUN]
+    assert store.list_run_ids() == [RECENT_RUN]
+
+
+def test_dry_run_leaves_everything_in_place(tmp_path: Path, store: RunStore) -> None:
+    run_dir = save_run(store, OLD_RUN)
+
+    report = apply_retention(
+        store,
+        tmp_path / "archive",
+        RetentionPolicy(archive_after_days=30),
+        now=NOW,
+        dry_run=True,
+    )
+
+    assert report.archived_runs == [OLD_RUN]
+    assert report.archives_written == []
+    assert run_dir.exists()
+    assert not (tmp_path / "archive").exists()
+
+
+def test_archived_run_can_be_restored(tmp_path: Path, store: RunStore) -> None:
+    archive_dir = tmp_path / "archive"
+    save_run(store, OLD_RUN, "completed")
+    apply_retention(store, archive_dir, RetentionPolicy(archive_after_days=30), now=NOW)
+    assert find_archived_run(archive_dir, OLD_RUN) is not None
+
+    assert restore_archived_run(store, archive_dir, OLD_RUN)
+    assert store.load(OLD_RUN)["run_id"] == OLD_RUN
+    assert not restore_archived_run(store, archive_dir, RECENT_RUN)
+
+
+def test_old_archives_are_evicted(tmp_path: Path, store: RunStore) -> None:
+    archive_dir = tmp_path / "archive"
+    save_run(store, OLD_RUN)
+    apply_retention(store, archive_dir, RetentionPolicy(archive_after_days=30), now=NOW)
+
+    report = apply_retention(
+        store,
+        archive_dir,
+        RetentionPolicy(delete_archives_after_days=30),
+        now=NOW,
+    )
+
+    assert len(report.deleted_archives) == 1
+    assert find_archived_run(archive_dir, OLD_RUN) is None
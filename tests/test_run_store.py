@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from src.domain.run_store import ExtractionRun, RunDocument, RunStore
+from src.domain.serialization import SERIALIZERS, get_serializer
+
+OPTIONAL_MODULES = {"json.zst": "zstandard", "msgpack": "msgpack"}
+
+
+def make_run(store: RunStore) -> ExtractionRun:
+    document = RunDocument(
+        filename="invoice.pdf",
+        document_type="Invoice",
+        confidence=0.9,
+        extracted={"total": "12.50", "lines": [{"sku": "A-1", "qty": 2}]},
+        corrected={},
+        field_pages={"total": [2]},
+    )
+    return ExtractionRun(
+        run_id=store.create_run_id(),
+        started_at="2026-01-02T03:04:05+00:00",
+        schema_name="Invoice",
+        mode="batch",
+        documents=[document],
+    )
+
+
+@pytest.mark.parametrize("run_format", sorted(SERIALIZERS))
+def test_serializer_round_trip(run_format: str) -> None:
+    if run_format in OPTIONAL_MODULES:
+        pytest.importorskip(OPTIONAL_MODULES[run_format])
+    serializer = get_serializer(run_format)
+    payload = {"run_id": "run_x", "documents": [{"extracted": {"née": "ü", "n": 1}}]}
+    assert serializer.loads(serializer.dumps(payload)) == payload
+
+
+def test_unknown_run_format_is_rejected() -> None:
+    with pytest.raises(ValueError, match="Unknown run format"):
+        get_serializer("xml")
+
+
+def test_default_format_is_plain_json(tmp_path: Path) -> None:
+    store = RunStore(tmp_path)
+    run = make_run(store)
+    path = store.save(run)
+    assert path.name == "run.json"
+    assert json.loads(path.read_text(encoding="utf-8")) == run.to_dict()
+
+
+def test_reads_old_pretty_printed_flat_run(tmp_path: Path) -> None:
+    run_id = "run_20240102T030405Z_abcdef"
+    legacy_dir = tmp_path / run_id
+    legacy_dir.mkdir()
+    payload = {
+        "run_id": run_id,
+        "started_at": "2024-01-02T03:04:05+00:00",
+        "schema_name": "Invoice",
+        "mode": "batch",
+        "documents": [{"filename": "a.pdf", "extracted": {"total": "1"}}],
+    }
+    (legacy_dir / "run.json").write_text(json.dumps(payload, indent=2))
+
+    store = RunStore(tmp_path, run_format="json.gz")
+    assert store.list_run_ids() == [run_id]
+    assert store.load(run_id)["documents"][0]["extracted"] == {"total": "1"}
+
+    store.update_run(run_id, store.load(run_id))
+    assert sorted(path.name for path in legacy_dir.iterdir()) == ["run.json.gz"]
+    assert store.load(run_id)["run_id"] == run_id
+
+
+def test_runs_are_sharded_by_start_date(tmp_path: Path) -> None:
+    store = RunStore(tmp_path)
+    run = make_run(store)
+    run.run_id = "run_20250607T080910Z_123abc"
+    store.save(run)
+    assert store.run_dir(run.run_id) == tmp_path / "2025" / "06" / "07" / run.run_id
+    assert store.load(run.run_id)["documents"][0]["field_pages"] == {"total": [2]}
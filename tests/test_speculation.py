@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+from PIL import Image
+
+import src.config
+from src.config import reload_config
+from src.domain.models import DocumentSchema, SchemaField
+from src.domain.run_store import ExtractionRun, RunStore
+from src.integrations.mock_openai import start_mock_server
+from src.pipeline import runner
+from src.pipeline.runner import PipelineOptions, run_pipeline
+
+SCHEMAS = {
+    "Invoice": DocumentSchema(
+        name="Invoice",
+        fields=[SchemaField(name="total", description="", field_type="number")],
+    ),
+    "Contract": DocumentSchema(
+        name="Contract", fields=[SchemaField(name="party", description="")]
+    ),
+}
+
+
+@pytest.fixture
+def run_store(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[RunStore]:
+    llm = start_mock_server()
+    monkeypatch.setattr(src.config, "DOTENV_PATH", tmp_path / "missing.env")
+    for name, value in {
+        "OPENAI_API_KEY": "test-key",
+        "OPENAI_BASE_URL": llm.base_url,
+        "EXTRACTLY_LLM_BACKEND": "live",
+        "EXTRACTLY_MAX_RETRIES": "0",
+        "EXTRACTLY_RUNS_DIR": str(tmp_path / "runs"),
+        "EXTRACTLY_PRECLASSIFIER_DIR": str(tmp_path / "preclassifier"),
+        "EXTRACTLY_FINGERPRINT_DB": str(tmp_path / "fingerprints.sqlite3"),
+        "EXTRACTLY_PROFILE": "off",
+    }.items():
+        monkeypatch.setenv(name, value)
+    config = reload_config()
+    try:
+        yield RunStore(config.run_store_dir)
+    finally:
+        llm.shutdown()
+        llm.server_close()
+        monkeypatch.undo()
+        reload_config()
+
+
+def run(run_store: RunStore) -> ExtractionRun:
+    return run_pipeline(
+        files=[
+            {
+                "name": "doc.png",
+                "images": [Image.new("RGB", (200, 300), "white")],
+                "text": "doc",
+            }
+        ],
+        default_schema=None,
+        schema_map=SCHEMAS,
+        candidates=[*SCHEMAS, "Unknown", "Other"],
+        run_store=run_store,
+        options=PipelineOptions(
+            speculate=True, classification_votes=3, extraction_votes=1, max_workers=1
+        ),
+    )
+
+
+def test_agreeing_votes_start_an_extraction_that_is_reused(
+    run_store: RunStore,
+) -> None:
+    (document,) = run(run_store).documents
+
+    assert document.document_type in SCHEMAS
+    assert document.speculation["label"] == document.document_type
+    assert document.speculation["source"] == "vote"
+    assert document.speculation["outcome"] == "hit"
+    assert document.speculation["llm_calls"] >= 1
+    assert "speculate" in {span["name"] for span in document.spans}
+    assert "extract" not in {span["name"] for span in document.spans}
+
+
+def test_overruled_speculation_is_discarded(
+    run_store: RunStore, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    classify_document = runner.classify_document
+
+    def early_votes_disagree(*args: Any, on_vote=None, **kwargs: Any) -> dict:
+        result = classify_document(*args, on_vote=None, **kwargs)
+        wrong = next(label for label in SCHEMAS if label != result["doc_type"])
+        for _ in range(2):
+            on_vote(wrong)
+        return result
+
+    monkeypatch.setattr(runner, "classify_document", early_votes_disagree)
+    (document,) = run(run_store).documents
+
+    assert document.speculation["label"] != document.document_type
+    assert document.speculation["outcome"] == "miss"
+    assert document.extracted
+    assert "extract" in {span["name"] for span in document.spans}
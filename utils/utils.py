@@ -3,9 +3,11 @@ Utilities shared among Streamlit pages.
 """
 
 from __future__ import annotations
-import json
 from pathlib import Path
 
+from src.config import load_config
+from src.domain.feedback_store import FeedbackStore
+
 # Get the project root directory (parent of the src directory)
 PROJECT_ROOT = Path(__file__).parent.parent
 DATA_DIR = PROJECT_ROOT / "data"
@@ -16,32 +18,31 @@ FEED_PATH = DATA_DIR / "feedback.jsonl"
 DATA_DIR.mkdir(exist_ok=True)
 SCHEMAS_DIR.mkdir(exist_ok=True)
 
+_FEEDBACK_STORES: dict[Path, FeedbackStore] = {}
+
 
 # ---------- 💾  feedback persistence ----------
-def load_feedback() -> list[dict]:
-    if not FEED_PATH.exists():
-        return []
-    with FEED_PATH.open(encoding="utf-8") as fp:
-        return [json.loads(ln) for ln in fp if ln.strip()]
+def get_feedback_store(db_path: Path | None = None) -> FeedbackStore:
+    """
+    Return the feedback store, importing the legacy JSONL file on first use.
+    """
+    if db_path is None:
+        db_path = load_config().feedback_db_path
+    if db_path not in _FEEDBACK_STORES:
+        _FEEDBACK_STORES[db_path] = FeedbackStore(db_path, legacy_jsonl_path=FEED_PATH)
+    return _FEEDBACK_STORES[db_path]
+
+
+def load_feedback(limit: int | None = None, offset: int = 0) -> list[dict]:
+    return get_feedback_store().query(limit=limit, offset=offset)
 
 
 # ---------- 🔁  feedback upsert ----------
-def upsert_feedback(new_row: dict, path: Path = None):
-    """Write row; overwrite existing line with same doc_id."""
-    if path is None:
-        path = FEED_PATH
-
-    rows = []
-    if path.exists():
-        with path.open(encoding="utf-8") as fp:
-            rows = [json.loads(x) for x in fp if x.strip()]
-
-    rows = [r for r in rows if r.get("doc_id") != new_row["doc_id"]]
-    rows.append(new_row)
-
-    with path.open("w", encoding="utf-8") as fp:
-        for r in rows:
-            fp.write(json.dumps(r, ensure_ascii=False) + "\n")
+def upsert_feedback(new_row: dict, store: FeedbackStore | None = None):
+    """Write row; overwrite existing row with same doc_id."""
+    if store is None:
+        store = get_feedback_store()
+    store.upsert(new_row)
 
 
 # ---------- 🔍  diff fields ----------